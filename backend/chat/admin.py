@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Company, ChatBotInstance, JiraSync, ConfluenceSync, ChatFeedback, Credential, JiraComment, JiraIssue, ConfluencePage, GitCredential, GitRepoSync, GitRepoFile, Document
+from .models import User, Company, ChatBotInstance, JiraSync, ConfluenceSync, ChatFeedback, Credential, JiraComment, JiraIssue, ConfluencePage, GitCredential, GitRepoSync, GitRepoFile, Document, Conversation, ConversationMessage, FAQAnswer, HTTPCacheEntry
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -21,3 +21,7 @@ admin.site.register(GitCredential)
 admin.site.register(GitRepoSync)
 admin.site.register(GitRepoFile)
 admin.site.register(Document)
+admin.site.register(Conversation)
+admin.site.register(ConversationMessage)
+admin.site.register(FAQAnswer)
+admin.site.register(HTTPCacheEntry)
@@ -7,3 +7,4 @@ class ChatConfig(AppConfig):
 
     def ready(self):
         import chat.checks  # noqa: F401
+        import chat.signals  # noqa: F401
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIMENSIONS = 1536
+
+_WORD_RE = re.compile(r"\w+")
+
+
+@dataclass
+class LatencyDistribution:
+    """Log-normal latency with the given median (ms) and shape ``sigma``."""
+
+    median_ms: float
+    sigma: float = 0.5
+
+    def sample_seconds(self) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        return random.lognormvariate(math.log(self.median_ms), self.sigma) / 1000
+
+
+def fake_embedding(text: str) -> List[float]:
+    """Deterministic bag-of-words embedding so similar texts land close together."""
+    vector = [0.0] * EMBEDDING_DIMENSIONS
+    for word in _WORD_RE.findall(text.lower()):
+        digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % EMBEDDING_DIMENSIONS
+        vector[index] += 1.0 if digest[4] % 2 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector))
+    if not norm:
+        vector[0] = 1.0
+        return vector
+    return [value / norm for value in vector]
+
+
+class _FakeOpenAIHandler(BaseHTTPRequestHandler):
+    server: "FakeOpenAIServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - signature from BaseHTTPRequestHandler
+        logger.debug("fake-openai: " + format, *args)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload: dict, status: int = 200) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):  # noqa: N802 - http.server naming
+        payload = self._read_json()
+        if self.path.rstrip("/").endswith("/embeddings"):
+            self._embeddings(payload)
+        elif self.path.rstrip("/").endswith("/chat/completions"):
+            self._chat_completion(payload)
+        else:
+            self._send_json({"error": {"message": f"Unknown path {self.path}"}}, status=404)
+
+    def _embeddings(self, payload: dict) -> None:
+        time.sleep(self.server.embedding_latency.sample_seconds())
+        inputs = payload.get("input")
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        data = [
+            {"object": "embedding", "index": idx, "embedding": fake_embedding(text)}
+            for idx, text in enumerate(inputs or [])
+        ]
+        tokens = sum(len(text) // 4 + 1 for text in inputs or [])
+        self._send_json({
+            "object": "list",
+            "data": data,
+            "model": payload.get("model", "text-embedding-3-small"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    def _chat_completion(self, payload: dict) -> None:
+        model = payload.get("model", "gpt-4o-mini")
+        prompt_tokens = sum(len(str(message.get("content", ""))) // 4 + 1 for message in payload.get("messages", []))
+        tokens = [f"token{idx} " for idx in range(self.server.completion_tokens)]
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        time.sleep(self.server.first_token_latency.sample_seconds())
+
+        if not payload.get("stream"):
+            time.sleep(self.server.token_latency.sample_seconds() * len(tokens))
+            self._send_json({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def send_chunk(choices, chunk_usage=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": choices,
+            }
+            if chunk_usage is not None:
+                chunk["usage"] = chunk_usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+
+        try:
+            for idx, token in enumerate(tokens):
+                if idx:
+                    time.sleep(self.server.token_latency.sample_seconds())
+                send_chunk([{"index": 0, "delta": {"content": token}, "finish_reason": None}])
+            send_chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            if (payload.get("stream_options") or {}).get("include_usage"):
+                send_chunk([], chunk_usage=usage)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client closed the stream, e.g. a losing hedged request.
+            pass
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Local OpenAI-compatible server for embeddings and (streamed) chat completions.
+
+    Used by the ``loadtest_chat`` command to measure throughput without
+    spending real money or hitting real rate limits.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        embedding_latency: LatencyDistribution | None = None,
+        first_token_latency: LatencyDistribution | None = None,
+        token_latency: LatencyDistribution | None = None,
+        completion_tokens: int = 40,
+    ):
+        super().__init__((host, port), _FakeOpenAIHandler)
+        self.embedding_latency = embedding_latency or LatencyDistribution(0)
+        self.first_token_latency = first_token_latency or LatencyDistribution(0)
+        self.token_latency = token_latency or LatencyDistribution(0)
+        self.completion_tokens = completion_tokens
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
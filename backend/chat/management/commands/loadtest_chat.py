@@ -0,0 +1,206 @@
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from chat.models import ChatBotInstance, Company, Document, User
+from chat.utils import embeddings
+from chat.management.commands._fake_openai import FakeOpenAIServer, LatencyDistribution, fake_embedding
+
+
+logger = logging.getLogger(__name__)
+
+_TOPICS = [
+    "deploy", "docker", "database", "migration", "login", "billing", "invoice", "search",
+    "index", "cache", "worker", "queue", "timeout", "retry", "release", "rollback",
+    "frontend", "backend", "api", "token", "permission", "sync", "jira", "confluence",
+]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of ``values`` (``pct`` in 0-100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _synthetic_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_TOPICS) for _ in range(words))
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the /chat/ and /query/ endpoints against a local fake OpenAI server '
+        'and report latency percentiles, throughput and error rate.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=8, help='Concurrent clients.')
+        parser.add_argument('--requests', type=int, default=50, help='Requests per client.')
+        parser.add_argument('--endpoint', choices=['chat', 'query', 'both'], default='both')
+        parser.add_argument('--turns', type=int, default=1, help='Chat turns per conversation before starting a new one.')
+        parser.add_argument('--documents', type=int, default=500, help='Synthetic documents to seed.')
+        parser.add_argument('--top-k', type=int, default=5)
+        parser.add_argument('--embedding-latency-ms', type=float, default=60.0, help='Median embedding latency.')
+        parser.add_argument('--first-token-latency-ms', type=float, default=400.0, help='Median time to first token.')
+        parser.add_argument('--token-latency-ms', type=float, default=15.0, help='Median delay between streamed tokens.')
+        parser.add_argument('--latency-sigma', type=float, default=0.5, help='Log-normal shape of every latency distribution.')
+        parser.add_argument('--completion-tokens', type=int, default=40)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--seed-data',
+            action='store_true',
+            help='Required: confirm seeding a throwaway company, chatbot, user and documents into the configured database.',
+        )
+        parser.add_argument('--keep-data', action='store_true', help='Keep the seeded company, chatbot and documents.')
+        parser.add_argument('--max-p95-ms', type=float, default=None, help='Fail if any endpoint p95 exceeds this.')
+        parser.add_argument('--max-error-rate', type=float, default=None, help='Fail if any endpoint error rate exceeds this (0-1).')
+
+    def handle(self, *args, **options):
+        if not options['seed_data']:
+            raise CommandError(
+                f"loadtest_chat writes synthetic rows to database '{connection.settings_dict['NAME']}' "
+                "(removed afterwards unless --keep-data); pass --seed-data to run it."
+            )
+        rng = random.Random(options['seed'])
+        sigma = options['latency_sigma']
+        server = FakeOpenAIServer(
+            embedding_latency=LatencyDistribution(options['embedding_latency_ms'], sigma),
+            first_token_latency=LatencyDistribution(options['first_token_latency_ms'], sigma),
+            token_latency=LatencyDistribution(options['token_latency_ms'], sigma),
+            completion_tokens=options['completion_tokens'],
+        ).start()
+        self.stdout.write(f'Fake OpenAI server listening on {server.base_url}')
+
+        company, chatbot, user = self._seed(rng, options['documents'])
+        endpoints = ['chat', 'query'] if options['endpoint'] == 'both' else [options['endpoint']]
+        try:
+            with override_settings(
+                OPENAI_BASE_URL=server.base_url,
+                OPENAI_API_KEY='loadtest',
+                ALLOWED_HOSTS=['testserver'],
+            ):
+                embeddings._shared_openai_client = None
+                try:
+                    report = self._run(rng, chatbot, user, endpoints, options)
+                finally:
+                    embeddings._shared_openai_client = None
+        finally:
+            server.stop()
+            if not options['keep_data']:
+                company.delete()
+                user.delete()
+
+        self._print_report(report)
+        self._check_thresholds(report, options)
+
+    def _seed(self, rng: random.Random, documents: int):
+        suffix = f'{int(time.time())}-{rng.randint(0, 9999)}'
+        with transaction.atomic():
+            company = Company.objects.create(name=f'Load test {suffix}')
+            chatbot = ChatBotInstance.objects.create(company=company, name='Load test bot')
+            user = User(username=f'loadtest-{suffix}', company=company)
+            user.set_unusable_password()
+            user.save()
+
+            batch = []
+            for idx in range(documents):
+                content = _synthetic_text(rng, 120)
+                batch.append(Document(
+                    company=company,
+                    chatbot=chatbot,
+                    source='confluence',
+                    source_id=f'loadtest-{idx}',
+                    content=content,
+                    embedding=fake_embedding(content),
+                ))
+            Document.objects.bulk_create(batch, batch_size=500)
+
+        self.stdout.write(f'Seeded {documents} documents for chatbot {chatbot.pk}')
+        return company, chatbot, user
+
+    def _run(self, rng, chatbot, user, endpoints, options) -> Dict[str, dict]:
+        latencies: Dict[str, List[float]] = {endpoint: [] for endpoint in endpoints}
+        errors: Dict[str, int] = {endpoint: 0 for endpoint in endpoints}
+        lock = threading.Lock()
+        questions = [f'How do I {_synthetic_text(rng, 4)}?' for _ in range(100)]
+
+        def client_loop(client_idx: int) -> None:
+            client_rng = random.Random(options['seed'] + client_idx)
+            client = APIClient()
+            client.force_authenticate(user)
+            conversation_id = None
+            turns = 0
+            try:
+                for request_idx in range(options['requests']):
+                    endpoint = endpoints[request_idx % len(endpoints)]
+                    payload = {'query': client_rng.choice(questions)}
+                    if endpoint == 'query':
+                        payload['top_k'] = options['top_k']
+                    elif conversation_id is not None:
+                        payload['conversation_id'] = conversation_id
+
+                    start = time.perf_counter()
+                    response = client.post(f'/api/chatbots/{chatbot.pk}/{endpoint}/', payload, format='json')
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+
+                    if endpoint == 'chat' and response.status_code == 200:
+                        turns += 1
+                        conversation_id = response.data.get('conversation_id') if turns < options['turns'] else None
+                        if conversation_id is None:
+                            turns = 0
+
+                    with lock:
+                        latencies[endpoint].append(elapsed_ms)
+                        if response.status_code >= 400:
+                            errors[endpoint] += 1
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['clients']) as executor:
+            list(executor.map(client_loop, range(options['clients'])))
+        wall_seconds = time.perf_counter() - started
+
+        report = {}
+        for endpoint in endpoints:
+            values = latencies[endpoint]
+            report[endpoint] = {
+                'requests': len(values),
+                'errors': errors[endpoint],
+                'error_rate': errors[endpoint] / len(values) if values else 0.0,
+                'throughput': len(values) / wall_seconds if wall_seconds else 0.0,
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'p99': percentile(values, 99),
+            }
+        return report
+
+    def _print_report(self, report: Dict[str, dict]) -> None:
+        self.stdout.write(f"{'endpoint':<8} {'requests':>8} {'errors':>7} {'err%':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for endpoint, stats in report.items():
+            self.stdout.write(
+                f"{endpoint:<8} {stats['requests']:>8} {stats['errors']:>7} {stats['error_rate'] * 100:>6.1f} "
+                f"{stats['throughput']:>8.1f} {stats['p50'] or 0:>9.1f} {stats['p95'] or 0:>9.1f} {stats['p99'] or 0:>9.1f}"
+            )
+
+    def _check_thresholds(self, report: Dict[str, dict], options) -> None:
+        failures = []
+        for endpoint, stats in report.items():
+            if options['max_p95_ms'] is not None and (stats['p95'] or 0) > options['max_p95_ms']:
+                failures.append(f"{endpoint} p95 {stats['p95']:.1f} ms exceeds {options['max_p95_ms']:.1f} ms")
+            if options['max_error_rate'] is not None and stats['error_rate'] > options['max_error_rate']:
+                failures.append(f"{endpoint} error rate {stats['error_rate']:.2%} exceeds {options['max_error_rate']:.2%}")
+        if failures:
+            raise CommandError('; '.join(failures))
+        self.stdout.write(self.style.SUCCESS('Load test completed.'))
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from chat.models import ChatBotInstance
+from chat.utils.faq import promote_feedback
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the vetted FAQ store for each chatbot from helpful feedback. Only database rows are '
+        'written; web workers load them on their next reload, within FAQ_CACHE_TTL seconds.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=settings.FAQ_PREWARM_TOP_N, help='Maximum answers to keep per chatbot.')
+        parser.add_argument('--chatbot', type=int, default=None, help='Only rebuild this chatbot.')
+
+    def handle(self, *args, **options):
+        chatbots = ChatBotInstance.objects.all()
+        if options['chatbot'] is not None:
+            chatbots = chatbots.filter(pk=options['chatbot'])
+
+        if not chatbots.exists():
+            self.stdout.write(self.style.WARNING('No chatbots found.'))
+            return
+
+        for chatbot in chatbots:
+            try:
+                stored = promote_feedback(chatbot, top_n=options['top'])
+                self.stdout.write(self.style.SUCCESS(f'Stored {stored} FAQ answers for {chatbot.name}'))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'Error prewarming FAQ answers for {chatbot.name}: {str(e)}'))
@@ -8,10 +8,17 @@ from django.utils import timezone
 
 from chat.models import SyncJob, SyncStatusMixin, JiraSync, ConfluenceSync, GitRepoSync
 from chat.tasks import run_jira_sync, run_confluence_sync, run_git_repo_sync
+from chat.utils.conversation import compact_pending_conversations
+from chat.utils.embeddings import get_openai_client
+from chat.utils.faq import promote_feedback
+from chat.utils.http_cache import prune_http_cache
 
 
 logger = logging.getLogger(__name__)
 
+# Conversations summarised per poll, so a backlog cannot delay sync jobs.
+_COMPACTION_BATCH_SIZE = 20
+
 
 class Command(BaseCommand):
     help = 'Process queued Jira, Confluence, and Git repository sync jobs.'
@@ -26,6 +33,7 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS('Sync job worker started.'))
         while True:
+            self._compact_conversations()
             job = self._dequeue_job()
             if not job:
                 if run_once:
@@ -34,6 +42,7 @@ class Command(BaseCommand):
                 continue
 
             self._process_job(job)
+            self._prune_http_cache()
             if run_once:
                 break
 
@@ -84,7 +93,34 @@ class Command(BaseCommand):
         job.finished_at = timezone.now()
         job.save(update_fields=['status', 'status_message', 'finished_at'])
 
-    def _load_sync_status_message(self, job: SyncJob) -> Optional[str]:
+        self._refresh_faq_answers(job)
+
+    def _refresh_faq_answers(self, job: SyncJob) -> None:
+        # Rebuild the chatbot's FAQ store after its sources changed; web
+        # workers pick it up within FAQ_CACHE_TTL.
+        sync = self._load_sync(job)
+        if sync is None:
+            return
+        try:
+            promote_feedback(sync.chatBot)
+        except Exception:
+            logger.exception('Failed to refresh FAQ answers after sync job %s', job.pk)
+
+    def _compact_conversations(self) -> None:
+        # Chat requests only flag long conversations; summarising them here
+        # keeps the LLM call out of the response time.
+        try:
+            compact_pending_conversations(get_openai_client(), _COMPACTION_BATCH_SIZE)
+        except Exception:
+            logger.exception('Failed to compact conversations')
+
+    def _prune_http_cache(self) -> None:
+        try:
+            prune_http_cache()
+        except Exception:
+            logger.exception('Failed to prune the HTTP cache')
+
+    def _load_sync(self, job: SyncJob):
         model = None
         if job.sync_type == SyncJob.JobType.JIRA:
             model = JiraSync
@@ -97,8 +133,9 @@ class Command(BaseCommand):
             return None
 
         try:
-            sync = model.objects.get(pk=job.sync_id)
+            return model.objects.select_related('chatBot').get(pk=job.sync_id)
         except model.DoesNotExist:  # type: ignore[attr-defined]
             return None
 
-        return getattr(sync, 'sync_status_message', None)
+    def _load_sync_status_message(self, job: SyncJob) -> Optional[str]:
+        return getattr(self._load_sync(job), 'sync_status_message', None)
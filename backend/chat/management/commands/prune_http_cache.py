@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from chat.utils.http_cache import prune_http_cache
+
+class Command(BaseCommand):
+    help = 'Delete stale and least recently used entries from the HTTP listing cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.HTTP_CACHE_TTL_DAYS, help='Delete entries unused for this many days.')
+        parser.add_argument('--max-entries', type=int, default=settings.HTTP_CACHE_MAX_ENTRIES, help='Maximum entries to keep.')
+
+    def handle(self, *args, **options):
+        deleted = prune_http_cache(ttl_days=options['days'], max_entries=options['max_entries'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} HTTP cache entries'))
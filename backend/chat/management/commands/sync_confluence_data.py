@@ -1,15 +1,22 @@
 from django.core.management.base import BaseCommand
 from chat.models import ConfluenceSync
-from chat.utils.confluence import fetch_confluence_pages
+from chat.utils.confluence import fetch_confluence_pages, ingest_confluence_pages
 
 class Command(BaseCommand):
     help = 'Sync Confluence pages for all configured syncs'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Reconcile every page instead of only recently modified ones.')
+
     def handle(self, *args, **options):
         for sync in ConfluenceSync.objects.all():
             try:
                 self.stdout.write(f"Syncing Confluence pages for {sync.space_url}")
-                fetch_confluence_pages(sync)
+                fetch_confluence_pages(
+                    sync,
+                    full=options['full'] or None,
+                    ingest=lambda pages: ingest_confluence_pages(sync, pages),
+                )
                 self.stdout.write(self.style.SUCCESS(f"Successfully synced Confluence pages for {sync.space_url}"))
             except Exception as e:
                 self.stderr.write(self.style.ERROR(f"Error syncing Confluence pages for {sync.space_url}: {e}"))
\ No newline at end of file
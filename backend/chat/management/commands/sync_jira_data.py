@@ -1,10 +1,13 @@
 from django.core.management.base import BaseCommand
 from chat.models import JiraSync
-from chat.utils.jira import fetch_jira_issues
+from chat.utils.jira import fetch_jira_issues, ingest_jira_issue
 
 class Command(BaseCommand):
     help = 'Sync Jira issues and comments for all JiraSync entries'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Reconcile every issue instead of only recently updated ones.')
+
     def handle(self, *args, **options):
         syncs = JiraSync.objects.all()
 
@@ -14,7 +17,13 @@ class Command(BaseCommand):
 
         for sync in syncs:
             try:
-                fetch_jira_issues(sync)
+                fetch_jira_issues(
+                    sync,
+                    full=options['full'] or None,
+                    ingest=lambda issue, comments: ingest_jira_issue(
+                        sync.chatBot.company, sync.chatBot, issue, comments, mode=sync.ingest_mode
+                    ),
+                )
                 self.stdout.write(self.style.SUCCESS(f'Successfully synced issues for {sync.board_url}'))
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f'Error syncing issues for {sync.board_url}: {str(e)}'))
\ No newline at end of file
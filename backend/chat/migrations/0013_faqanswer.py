@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-19 08:59
+
+import django.db.models.deletion
+import pgvector.django.vector
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0012_conversation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FAQAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question', models.TextField()),
+                ('normalized_question', models.CharField(max_length=500)),
+                ('answer', models.TextField()),
+                ('embedding', pgvector.django.vector.VectorField(dimensions=1536)),
+                ('helpful_count', models.PositiveIntegerField(default=0)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('chatBot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='faqAnswers', to='chat.chatbotinstance')),
+            ],
+            options={
+                'unique_together': {('chatBot', 'normalized_question')},
+            },
+        ),
+    ]
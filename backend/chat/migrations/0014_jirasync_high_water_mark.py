@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 09:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0013_faqanswer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jirasync',
+            name='last_full_sync_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='jirasync',
+            name='last_issue_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0014_jirasync_high_water_mark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jirasync',
+            name='ingest_mode',
+            field=models.CharField(choices=[('thread', 'Issue and comment thread'), ('comment', 'One document per comment')], default='thread', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='source',
+            field=models.CharField(choices=[('jira_issue', 'Jira Issue'), ('jira_comment', 'Jira Comment'), ('jira_thread', 'Jira Thread'), ('confluence', 'Confluence'), ('github', 'GitHub')], max_length=50),
+        ),
+    ]
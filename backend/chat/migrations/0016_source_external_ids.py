@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-19 09:09
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicate_issues(apps, schema_editor):
+    # Earlier syncs could store the same issue twice; keep the newest row.
+    JiraIssue = apps.get_model('chat', 'JiraIssue')
+    duplicates = (
+        JiraIssue.objects.values('sync_id', 'issue_key')
+        .annotate(rows=Count('id'), keep_id=Max('id'))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates:
+        JiraIssue.objects.filter(
+            sync_id=duplicate['sync_id'],
+            issue_key=duplicate['issue_key'],
+        ).exclude(pk=duplicate['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0015_jira_thread_ingest_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='confluencepage',
+            name='page_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='confluencepage',
+            name='version',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='jiracomment',
+            name='comment_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.RunPython(remove_duplicate_issues, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-19 09:09
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Kept separate from 0016 so the duplicate cleanup is committed before
+    # the unique indexes are built.
+
+    dependencies = [
+        ('chat', '0016_source_external_ids'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='confluencepage',
+            unique_together={('sync', 'page_id')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='jiracomment',
+            unique_together={('issue', 'comment_id')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='jiraissue',
+            unique_together={('sync', 'issue_key')},
+        ),
+    ]
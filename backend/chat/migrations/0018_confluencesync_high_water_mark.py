@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0017_source_natural_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='confluencesync',
+            name='last_full_sync_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='confluencesync',
+            name='last_page_modified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0018_confluencesync_high_water_mark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gitreposync',
+            name='last_synced_commit_sha',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
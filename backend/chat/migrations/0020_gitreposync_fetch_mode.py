@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 09:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0019_gitreposync_last_synced_commit_sha'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gitreposync',
+            name='fetch_mode',
+            field=models.CharField(choices=[('api', 'One API request per file'), ('archive', 'Branch tarball')], default='api', max_length=10),
+        ),
+    ]
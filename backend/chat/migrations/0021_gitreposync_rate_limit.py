@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 09:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0020_gitreposync_fetch_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gitreposync',
+            name='rate_limit_remaining',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gitreposync',
+            name='rate_limit_reset_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
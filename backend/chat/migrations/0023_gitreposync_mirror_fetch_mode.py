@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0022_httpcacheentry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gitreposync',
+            name='fetch_mode',
+            field=models.CharField(choices=[('api', 'One API request per file'), ('archive', 'Branch tarball'), ('mirror', 'Local bare git mirror')], default='api', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 09:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0023_gitreposync_mirror_fetch_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gitreposync',
+            name='exclude_globs',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-19 09:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0024_gitreposync_exclude_globs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatfeedback',
+            name='message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='feedbacks', to='chat.conversationmessage'),
+        ),
+        migrations.AddField(
+            model_name='chatfeedback',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='feedbacks', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-19 09:54
+
+from django.db import migrations, models
+
+
+def schedule_full_reconcile(apps, schema_editor):
+    # Pages ingested before the storage-format converter still hold raw
+    # markup; the next sync reconciles fully and re-ingests them.
+    ConfluenceSync = apps.get_model('chat', 'ConfluenceSync')
+    ConfluenceSync.objects.update(last_full_sync_at=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0025_chatfeedback_message_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='confluencepage',
+            name='text_format',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(schedule_full_reconcile, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 09:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0026_confluencepage_text_format'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='httpcacheentry',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
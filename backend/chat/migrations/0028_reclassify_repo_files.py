@@ -0,0 +1,69 @@
+# Generated by Django 5.2 on 2026-10-19 15:40
+
+import math
+import re
+from collections import Counter
+
+from django.db import migrations
+
+
+# A frozen copy of chat.utils.file_classifier.looks_generated as it stood when
+# this migration was written, so later classifier changes do not alter it.
+_SAMPLE_CHARS = 8192
+_MAX_AVERAGE_LINE_LENGTH = 500
+_MAX_LINE_LENGTH = 3000
+_MAX_ENTROPY_BITS = 5.5
+_MIN_ENTROPY_CHARS = 1000
+_GENERATED_MARKER_RE = re.compile(
+    r"@generated|DO NOT EDIT|Code generated .* DO NOT EDIT|auto-?generated by",
+    re.IGNORECASE,
+)
+_MARKER_LINES = 5
+
+
+def _shannon_entropy(text):
+    if not text:
+        return 0.0
+    total = len(text)
+    return -sum(count / total * math.log2(count / total) for count in Counter(text).values())
+
+
+def looks_generated(text):
+    sample = text[:_SAMPLE_CHARS]
+    lines = sample.splitlines() or [""]
+    for line in lines[:_MARKER_LINES]:
+        if _GENERATED_MARKER_RE.search(line):
+            return True
+    if len(text) > 1000 and len(text) / (text.count("\n") + 1) > _MAX_AVERAGE_LINE_LENGTH:
+        return True
+    if max(len(line) for line in lines) > _MAX_LINE_LENGTH:
+        return True
+    ascii_sample = "".join(ch for ch in sample if ch.isascii())
+    return len(ascii_sample) > _MIN_ENTROPY_CHARS and _shannon_entropy(ascii_sample) > _MAX_ENTROPY_BITS
+
+
+def force_full_repo_sync(apps, schema_editor):
+    # Files indexed before the classifier existed are never revisited by
+    # incremental syncs. A full listing sweeps paths that are excluded now,
+    # and blanking the sha of stored files whose content looks generated
+    # makes it download, reject and sweep them too.
+    GitRepoSync = apps.get_model('chat', 'GitRepoSync')
+    GitRepoFile = apps.get_model('chat', 'GitRepoFile')
+    GitRepoSync.objects.update(last_synced_commit_sha='')
+    generated = [
+        pk
+        for pk, content in GitRepoFile.objects.values_list('pk', 'content').iterator()
+        if looks_generated(content or '')
+    ]
+    GitRepoFile.objects.filter(pk__in=generated).update(sha='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0027_httpcacheentry_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(force_full_repo_sync, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-19 10:11
+
+from django.db import migrations, models
+
+
+def schedule_full_reconcile(apps, schema_editor):
+    # Issues stored before the iterative ADF renderer may hold a repr() of
+    # the raw document; the next sync reconciles fully and re-converts them.
+    JiraSync = apps.get_model('chat', 'JiraSync')
+    JiraSync.objects.update(last_full_sync_at=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0028_reclassify_repo_files'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jiraissue',
+            name='text_format',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(schedule_full_reconcile, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-19 10:13
+
+from django.db import migrations, models
+
+
+def schedule_full_reconcile(apps, schema_editor):
+    # Issues ingested before the mode was recorded may still have documents
+    # from the other mode (the default changed to 'thread'); with no recorded
+    # mode they are re-ingested in their sync's mode by the next reconcile.
+    JiraSync = apps.get_model('chat', 'JiraSync')
+    JiraSync.objects.update(last_full_sync_at=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0029_jiraissue_text_format'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jiraissue',
+            name='ingest_mode',
+            field=models.CharField(blank=True, default='', max_length=10),
+        ),
+        migrations.RunPython(schedule_full_reconcile, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0030_jiraissue_ingest_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='needs_compaction',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
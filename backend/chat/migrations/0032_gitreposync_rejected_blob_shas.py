@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-19 10:25
+
+from django.db import migrations, models
+
+
+def force_full_repo_sync(apps, schema_editor):
+    # build/ and dist/ are now only excluded at the repository root; a full
+    # listing picks up nested directories of those names that were skipped.
+    GitRepoSync = apps.get_model('chat', 'GitRepoSync')
+    GitRepoSync.objects.update(last_synced_commit_sha='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0031_conversation_needs_compaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gitreposync',
+            name='rejected_blob_shas',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(force_full_repo_sync, migrations.RunPython.noop),
+    ]
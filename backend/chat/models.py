@@ -111,6 +111,13 @@ class JiraSync(SyncStatusMixin):
         ('monthly', 'Monthly'),
     ]
     sync_interval = models.CharField(max_length=10, choices=SYNC_INTERVAL_CHOICES, default='manual')
+    last_issue_updated_at = models.DateTimeField(null=True, blank=True)
+    last_full_sync_at = models.DateTimeField(null=True, blank=True)
+    INGEST_MODE_CHOICES = [
+        ('thread', 'Issue and comment thread'),
+        ('comment', 'One document per comment'),
+    ]
+    ingest_mode = models.CharField(max_length=10, choices=INGEST_MODE_CHOICES, default='thread')
 
     def __str__(self):
         return f"Jira Sync for {self.chatBot.name} ({self.chatBot.company.name})"
@@ -128,6 +135,8 @@ class ConfluenceSync(SyncStatusMixin):
         ('monthly', 'Monthly'),
     ]
     sync_interval = models.CharField(max_length=10, choices=SYNC_INTERVAL_CHOICES, default='manual')
+    last_page_modified_at = models.DateTimeField(null=True, blank=True)
+    last_full_sync_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"Confluence Sync for {self.chatBot.name} ({self.chatBot.company.name})"
@@ -135,6 +144,12 @@ class ConfluenceSync(SyncStatusMixin):
 
 class ChatFeedback(models.Model):
     chatBot = models.ForeignKey(ChatBotInstance, on_delete=models.CASCADE, related_name='feedbacks')
+    user = models.ForeignKey('User', on_delete=models.SET_NULL, related_name='feedbacks', null=True, blank=True)
+    # The assistant turn being rated; only feedback linked to an answer the
+    # server recorded itself is eligible for the FAQ store.
+    message = models.ForeignKey(
+        'ConversationMessage', on_delete=models.SET_NULL, related_name='feedbacks', null=True, blank=True
+    )
     question = models.TextField()
     answer = models.TextField()
     is_helpful = models.BooleanField()
@@ -143,6 +158,57 @@ class ChatFeedback(models.Model):
     def __str__(self):
         return f"Feedback for {self.chatBot.name} ({self.chatBot.company.name}) - Helpful: {self.is_helpful}"
 
+class FAQAnswer(models.Model):
+    chatBot = models.ForeignKey(ChatBotInstance, on_delete=models.CASCADE, related_name='faqAnswers')
+    question = models.TextField()
+    normalized_question = models.CharField(max_length=500)
+    answer = models.TextField()
+    embedding = VectorField(dimensions=1536)
+    helpful_count = models.PositiveIntegerField(default=0)
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('chatBot', 'normalized_question')
+
+    def __str__(self):
+        return f"FAQ for {self.chatBot.name}: {self.question[:50]}"
+
+
+class Conversation(models.Model):
+    chatBot = models.ForeignKey(ChatBotInstance, on_delete=models.CASCADE, related_name='conversations')
+    user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='conversations', null=True, blank=True)
+    summary = models.TextField(blank=True)
+    # Set when the verbatim turns outgrow the history budget; the sync worker
+    # folds them into the summary outside the request.
+    needs_compaction = models.BooleanField(default=False, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Conversation {self.id} with {self.chatBot.name}"
+
+
+class ConversationMessage(models.Model):
+    class Role(models.TextChoices):
+        USER = 'user', 'User'
+        ASSISTANT = 'assistant', 'Assistant'
+
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
+    role = models.CharField(max_length=20, choices=Role.choices)
+    content = models.TextField()
+    is_summarized = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['conversation', 'is_summarized', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_role_display()} message in conversation {self.conversation_id}"
+
 class JiraIssue(models.Model):
     sync = models.ForeignKey(JiraSync, on_delete=models.CASCADE, related_name='issues')
     issue_key = models.CharField(max_length=100)
@@ -151,25 +217,45 @@ class JiraIssue(models.Model):
     status = models.CharField(max_length=100)
     created_at = models.DateTimeField()
     updated_at = models.DateTimeField()
+    # ``ADF_TEXT_FORMAT`` of the converter that produced the issue's
+    # documents; 0 until the issue is ingested.
+    text_format = models.PositiveSmallIntegerField(default=0)
+    # The sync's ``ingest_mode`` when the documents were built.
+    ingest_mode = models.CharField(max_length=10, blank=True, default='')
+
+    class Meta:
+        unique_together = ('sync', 'issue_key')
 
     def __str__(self):
         return f"{self.issue_key} - {self.summary}"
     
 class JiraComment(models.Model):
     issue = models.ForeignKey(JiraIssue, on_delete=models.CASCADE, related_name='comments')
+    comment_id = models.CharField(max_length=64, null=True, blank=True)
     author = models.CharField(max_length=255)
     content = models.TextField()
     created_at = models.DateTimeField()
 
+    class Meta:
+        unique_together = ('issue', 'comment_id')
+
     def __str__(self):
         return f"Comment by {self.author} on {self.issue.issue_key}"
     
 class ConfluencePage(models.Model):
     sync = models.ForeignKey(ConfluenceSync, on_delete=models.CASCADE, related_name='pages')
+    page_id = models.CharField(max_length=64, null=True, blank=True)
+    version = models.PositiveIntegerField(null=True, blank=True)
     title = models.CharField(max_length=255)
     content = models.TextField()
     url = models.URLField()
     last_updated = models.DateTimeField()
+    # ``STORAGE_TEXT_FORMAT`` of the converter that produced the page's
+    # documents; 0 until the page is ingested.
+    text_format = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('sync', 'page_id')
 
     def __str__(self):
         return f"{self.title}"
@@ -200,6 +286,9 @@ class GitRepoSync(SyncStatusMixin):
     repo_full_name = models.CharField(max_length=300)
     branch = models.CharField(max_length=100, default='main')
     last_sync_time = models.DateTimeField(null=True, blank=True)
+    # Branch head of the last completed sync; later syncs only process the
+    # files changed since this commit.
+    last_synced_commit_sha = models.CharField(max_length=64, blank=True, default='')
     SYNC_INTERVAL_CHOICES = [
         ('manual', 'Manual'),
         ('daily', 'Daily'),
@@ -207,6 +296,21 @@ class GitRepoSync(SyncStatusMixin):
         ('monthly', 'Monthly'),
     ]
     sync_interval = models.CharField(max_length=10, choices=SYNC_INTERVAL_CHOICES, default='manual')
+    FETCH_MODE_CHOICES = [
+        ('api', 'One API request per file'),
+        ('archive', 'Branch tarball'),
+        ('mirror', 'Local bare git mirror'),
+    ]
+    fetch_mode = models.CharField(max_length=10, choices=FETCH_MODE_CHOICES, default='api')
+    # Glob patterns (one per line) of files never to ingest, on top of the
+    # built-in list of vendored, generated and minified paths.
+    exclude_globs = models.TextField(blank=True, default='')
+    # path -> blob sha of files rejected by their content (empty, too large,
+    # minified or generated), so unchanged blobs are not fetched again.
+    rejected_blob_shas = models.JSONField(blank=True, default=dict)
+    # GitHub REST budget of the credential as of the last sync.
+    rate_limit_remaining = models.IntegerField(null=True, blank=True)
+    rate_limit_reset_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.repo_full_name}@{self.branch} ({self.chatBot.name})"
@@ -230,6 +334,7 @@ class Document(models.Model):
     SOURCE_CHOICES = [
         ('jira_issue', 'Jira Issue'),
         ('jira_comment', 'Jira Comment'),
+        ('jira_thread', 'Jira Thread'),
         ('confluence', 'Confluence'),
         ('github', 'GitHub'),
     ]
@@ -247,3 +352,17 @@ class Document(models.Model):
 
     def __str__(self):
         return f"Document {self.id} from {self.source} ({self.company.name})"
+
+class HTTPCacheEntry(models.Model):
+    # Validators and body of the last 200 response to a connector GET, keyed
+    # on a hash of the credential and full URL so tokens are never stored.
+    cache_key = models.CharField(max_length=64, unique=True)
+    url = models.TextField()
+    etag = models.CharField(max_length=500, blank=True, default='')
+    last_modified = models.CharField(max_length=100, blank=True, default='')
+    body = models.BinaryField()
+    # Also bumped when a 304 serves the entry, so pruning is least recently used.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"Cached {self.url}"
@@ -75,7 +75,12 @@ class ChatFeedbackSerializer(serializers.ModelSerializer):
     class Meta:
         model = ChatFeedback
         fields = '__all__'
-        read_only_fields = ('chatBot',)
+        read_only_fields = ('chatBot', 'user')
+        # Filled from the rated message when ``message`` is given.
+        extra_kwargs = {
+            'question': {'required': False},
+            'answer': {'required': False},
+        }
 
 class CredentialSummarySerializer(serializers.ModelSerializer):
     class Meta:
@@ -90,6 +95,7 @@ class JiraSyncSerializer(serializers.ModelSerializer):
         source='credential',
     )
     sync_interval = serializers.ChoiceField(choices=JiraSync.SYNC_INTERVAL_CHOICES, default='manual')
+    ingest_mode = serializers.ChoiceField(choices=JiraSync.INGEST_MODE_CHOICES, default='thread')
 
     class Meta:
         model = JiraSync
@@ -103,6 +109,7 @@ class JiraSyncSerializer(serializers.ModelSerializer):
             'credential',
             'credential_id',
             'sync_interval',
+            'ingest_mode',
         ]
         read_only_fields = ('sync_status', 'sync_status_message', 'current_job_id', 'last_sync_time')
 
@@ -114,6 +121,12 @@ class JiraSyncSerializer(serializers.ModelSerializer):
                 company=request.user.company
             )
 
+    def update(self, instance, validated_data):
+        if validated_data.get('ingest_mode', instance.ingest_mode) != instance.ingest_mode:
+            # Unchanged issues are only re-ingested in the new mode by a full reconcile.
+            validated_data['last_full_sync_at'] = None
+        return super().update(instance, validated_data)
+
 class ConfluenceSyncSerializer(serializers.ModelSerializer):
     credential = CredentialSummarySerializer(read_only=True)
     credential_id = serializers.PrimaryKeyRelatedField(
@@ -190,6 +203,7 @@ class GitRepoSyncSerializer(serializers.ModelSerializer):
         choices=GitRepoSync.SYNC_INTERVAL_CHOICES,
         default='manual'
     )
+    fetch_mode = serializers.ChoiceField(choices=GitRepoSync.FETCH_MODE_CHOICES, default='api')
 
     class Meta:
         model = GitRepoSync
@@ -202,6 +216,8 @@ class GitRepoSyncSerializer(serializers.ModelSerializer):
             'sync_status_message',
             'current_job_id',
             'sync_interval',
+            'fetch_mode',
+            'exclude_globs',
             'credential',
             'credential_id',
         ]
@@ -215,6 +231,13 @@ class GitRepoSyncSerializer(serializers.ModelSerializer):
                 company=req.user.company
             )
 
+    def update(self, instance, validated_data):
+        if validated_data.get('exclude_globs', instance.exclude_globs) != instance.exclude_globs:
+            # Re-list the whole tree on the next sync so the new patterns
+            # apply to files that have not changed.
+            validated_data['last_synced_commit_sha'] = ''
+        return super().update(instance, validated_data)
+
 class GitRepoFileSerializer(serializers.ModelSerializer):
     class Meta:
         model = GitRepoFile
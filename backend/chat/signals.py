@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, pre_save
+from django.dispatch import receiver
+
+from chat.models import GitRepoSync
+from chat.utils.git_mirror import delete_mirror
+
+
+@receiver(post_delete, sender=GitRepoSync)
+def delete_git_mirror(sender, instance, **kwargs):
+    """Remove the sync's bare clone once its deletion, direct or cascaded, commits."""
+    sync_id = instance.pk
+    transaction.on_commit(lambda: delete_mirror(sync_id))
+
+
+@receiver(pre_save, sender=GitRepoSync)
+def delete_unused_git_mirror(sender, instance, update_fields=None, **kwargs):
+    """Remove the sync's bare clone once a switch away from 'mirror' fetch mode commits."""
+    if instance.pk is None or instance.fetch_mode == 'mirror':
+        return
+    if update_fields is not None and 'fetch_mode' not in update_fields:
+        return
+    previous = GitRepoSync.objects.filter(pk=instance.pk).values_list('fetch_mode', flat=True).first()
+    if previous == 'mirror':
+        sync_id = instance.pk
+        transaction.on_commit(lambda: delete_mirror(sync_id))
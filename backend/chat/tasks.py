@@ -50,17 +50,23 @@ def run_jira_sync(sync_id: int, job_id: Optional[str] = None) -> Tuple[int, int]
     sync = JiraSync.objects.select_related('chatBot__company', 'credential').get(pk=sync_id)
     _set_status(sync, JiraSync.Status.RUNNING, 'Sync in progress.', job_id=job_id)
 
+    documents_created = 0
+
+    def ingest(issue, comments):
+        nonlocal documents_created
+        docs = ingest_jira_issue(
+            company=sync.chatBot.company,
+            chatbot=sync.chatBot,
+            issue=issue,
+            comments=comments,
+            mode=sync.ingest_mode,
+        )
+        documents_created += len(docs)
+
     try:
-        issues_with_comments = fetch_jira_issues(sync)
-        documents_created = 0
-        for issue, comments in issues_with_comments:
-            docs = ingest_jira_issue(
-                company=sync.chatBot.company,
-                chatbot=sync.chatBot,
-                issue=issue,
-                comments=comments,
-            )
-            documents_created += len(docs)
+        # Ingested inside the fetch so the high-water mark only moves once
+        # every returned issue has its documents.
+        issues_with_comments = fetch_jira_issues(sync, ingest=ingest)
     except requests.Timeout:
         message = 'Jira sync timed out while contacting the Jira API.'
         logger.exception("Jira sync timed out for sync %s", sync.pk)
@@ -91,9 +97,16 @@ def run_confluence_sync(sync_id: int, job_id: Optional[str] = None) -> Tuple[int
     sync = ConfluenceSync.objects.select_related('chatBot__company', 'credential').get(pk=sync_id)
     _set_status(sync, ConfluenceSync.Status.RUNNING, 'Sync in progress.', job_id=job_id)
 
+    documents_created = 0
+
+    def ingest(pages):
+        nonlocal documents_created
+        documents_created += ingest_confluence_pages(sync, pages=pages)
+
     try:
-        pages = fetch_confluence_pages(sync)
-        documents_created = ingest_confluence_pages(sync, pages=pages)
+        # Ingested inside the fetch so the high-water mark only moves once
+        # every returned page has its documents.
+        pages = fetch_confluence_pages(sync, ingest=ingest)
     except requests.Timeout:
         message = 'Confluence sync timed out while contacting the Confluence API.'
         logger.exception("Confluence sync timed out for sync %s", sync.pk)
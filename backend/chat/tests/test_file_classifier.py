@@ -0,0 +1,72 @@
+import base64
+import os
+
+from django.test import SimpleTestCase
+
+from chat.utils.file_classifier import FileClassifier, compile_globs, looks_generated, parse_exclude_globs
+
+
+class FileClassifierTests(SimpleTestCase):
+    def test_globs_follow_gitignore_rules(self):
+        globs = compile_globs(["node_modules/", "/build/", "*.min.js", "docs/generated/*.md"])
+
+        matched = [
+            path
+            for path in [
+                "node_modules/a.js", "web/node_modules/a.js", "build/out.js", "web/build/out.js",
+                "web/app.min.js", "docs/generated/api.md", "docs/generated/v1/api.md", "src/app.js",
+            ]
+            if globs.match(path)
+        ]
+
+        self.assertEqual(
+            matched,
+            ["node_modules/a.js", "web/node_modules/a.js", "build/out.js", "web/app.min.js", "docs/generated/api.md"],
+        )
+
+    def test_default_build_output_globs_are_anchored_at_the_root(self):
+        classifier = FileClassifier()
+
+        self.assertFalse(classifier.accepts_path("build/out.js"))
+        self.assertFalse(classifier.accepts_path("dist/index.js"))
+        self.assertTrue(classifier.accepts_path("src/build/compiler.py"))
+        self.assertTrue(classifier.accepts_path("packages/cli/dist/README.md"))
+
+    def test_gitattributes_later_rules_override_earlier_ones(self):
+        classifier = FileClassifier(gitattributes=(
+            "*.json linguist-generated\n"
+            "config/*.json -linguist-generated\n"
+            "third/** linguist-vendored=true\n"
+        ))
+
+        self.assertFalse(classifier.accepts_path("api/schema.json"))
+        self.assertTrue(classifier.accepts_path("config/settings.json"))
+        self.assertFalse(classifier.accepts_path("third/lib/util.py"))
+        self.assertTrue(classifier.accepts_path("src/third.py"))
+        self.assertEqual(classifier.skipped, {"gitattributes": 2})
+
+    def test_sync_globs_extend_the_defaults(self):
+        classifier = FileClassifier(parse_exclude_globs("fixtures/\n*.generated.ts, "))
+
+        self.assertFalse(classifier.accepts_path("tests/fixtures/data.json"))
+        self.assertFalse(classifier.accepts_path("src/api.generated.ts"))
+        self.assertFalse(classifier.accepts_path("package-lock.json"))
+        self.assertTrue(classifier.accepts_path("src/api.ts"))
+
+    def test_content_heuristics(self):
+        code = "\n".join(f"def handler_{idx}(request):\n    return respond(request, {idx})" for idx in range(200))
+
+        self.assertIsNone(looks_generated(code))
+        self.assertEqual(looks_generated("// Code generated by protoc. DO NOT EDIT.\npackage api\n"), "generated")
+        self.assertEqual(looks_generated("function a(){return 1};" * 200), "minified")
+        self.assertEqual(looks_generated("\n".join(base64.b64encode(os.urandom(48)).decode() for _ in range(100))), "high-entropy")
+
+    def test_non_latin_prose_is_not_high_entropy(self):
+        # Thousands of distinct characters push per-character entropy past 6 bits.
+        sentences = [
+            "".join(chr(0x4E00 + (idx * 37 + offset * 101) % 3000) for offset in range(30)) + "。"
+            for idx in range(150)
+        ]
+        prose = "\n".join("See `config.yaml` for details: " + sentence for sentence in sentences)
+
+        self.assertIsNone(looks_generated(prose))
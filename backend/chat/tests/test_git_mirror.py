@@ -0,0 +1,146 @@
+import os
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+from django.test import override_settings
+
+from chat.models import Document, GitRepoFile
+from chat.tests.test_github_sync import FakeGitHub, GitHubSyncTestCase
+from chat.utils.git_mirror import GitMirror, GitMirrorError, mirror_path
+
+
+class GitMirrorSyncTests(GitHubSyncTestCase):
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        self.work = root / "octocat" / "hello-world"
+        self.work.mkdir(parents=True)
+        self._git("init", "--quiet", "--initial-branch", "main")
+
+        settings_override = override_settings(
+            GIT_MIRROR_ROOT=str(root / "mirrors"),
+            GIT_MIRROR_REMOTE_TEMPLATE=f"file://{root}/{{full_name}}",
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.sync.fetch_mode = "mirror"
+        self.sync.save(update_fields=["fetch_mode"])
+
+    def _git(self, *args, date="2024-01-01T00:00:00+00:00"):
+        env = {**os.environ, "GIT_AUTHOR_DATE": date, "GIT_COMMITTER_DATE": date}
+        return subprocess.run(
+            ["git", "-c", "user.name=Octo", "-c", "user.email=octo@example.com", *args],
+            cwd=self.work, env=env, check=True, capture_output=True, text=True,
+        ).stdout.strip()
+
+    def _commit(self, files, date, removed=(), renamed=()):
+        for old, new in renamed:
+            self._git("mv", old, new)
+        for path in removed:
+            self._git("rm", "--quiet", path)
+        for path, content in files.items():
+            (self.work / path).write_bytes(content if isinstance(content, bytes) else content.encode())
+            self._git("add", path)
+        self._git("commit", "--quiet", "-m", f"Commit at {date}", date=date)
+        return self._git("rev-parse", "HEAD")
+
+    def test_mirror_sync_reads_changes_blobs_and_dates_from_git(self):
+        self._commit(
+            {"README.md": "hello", "app.py": "print(1)", "old.md": "bye", "logo.png": b"\x89PNG"},
+            date="2024-01-01T00:00:00+00:00",
+        )
+        github = FakeGitHub({})
+
+        files, _ = self._sync(github)
+
+        self.assertEqual(files, 3)
+        self.assertEqual(github.requests, [])
+        readme = GitRepoFile.objects.get(sync=self.sync, path="README.md")
+        self.assertEqual(readme.sha, self._git("rev-parse", "HEAD:README.md"))
+        self.assertEqual(readme.last_updated, datetime(2024, 1, 1, tzinfo=timezone.utc))
+        app = GitRepoFile.objects.get(sync=self.sync, path="app.py")
+        old = GitRepoFile.objects.get(sync=self.sync, path="old.md")
+
+        head = self._commit(
+            {"README.md": "hello again"},
+            date="2024-02-01T00:00:00+00:00",
+            removed=["old.md"],
+            renamed=[("app.py", "main.py")],
+        )
+        files, _ = self._sync(github)
+
+        self.assertEqual(files, 1)
+        self.assertEqual(github.requests, [])
+        stored = dict(GitRepoFile.objects.filter(sync=self.sync).values_list("path", "content"))
+        self.assertEqual(stored, {"README.md": "hello again", "main.py": "print(1)"})
+        self.assertEqual(GitRepoFile.objects.get(path="main.py").pk, app.pk)
+        self.assertEqual(
+            GitRepoFile.objects.get(path="README.md").last_updated,
+            datetime(2024, 2, 1, tzinfo=timezone.utc),
+        )
+        self.assertFalse(Document.objects.filter(source="github", source_id=str(old.pk)).exists())
+        self.sync.refresh_from_db()
+        self.assertEqual(self.sync.last_synced_commit_sha, head)
+
+        self.assertEqual(self._sync(github), (0, 0))
+
+    def test_deleting_the_sync_removes_its_mirror(self):
+        self._commit({"README.md": "hello"}, date="2024-01-01T00:00:00+00:00")
+        self._sync(FakeGitHub({}))
+        path = mirror_path(self.sync.pk)
+        self.assertTrue(path.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sync.chatBot.delete()
+
+        self.assertFalse(path.exists())
+
+    def test_changing_fetch_mode_removes_the_mirror(self):
+        self._commit({"README.md": "hello"}, date="2024-01-01T00:00:00+00:00")
+        self._sync(FakeGitHub({}))
+        path = mirror_path(self.sync.pk)
+        self.assertTrue(path.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sync.save(update_fields=["last_sync_time"])
+        self.assertTrue(path.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sync.fetch_mode = "api"
+            self.sync.save()
+
+        self.assertFalse(path.exists())
+
+    @override_settings(GIT_MIRROR_TIMEOUT=5)
+    def test_stalled_fetch_raises_mirror_error(self):
+        stalled = subprocess.TimeoutExpired(cmd=["git", "fetch"], timeout=5)
+        with patch("chat.utils.git_mirror.subprocess.run", side_effect=stalled) as mock_run:
+            with self.assertRaisesMessage(GitMirrorError, "timed out after 5s"):
+                GitMirror(self.sync, "token").update()
+
+        self.assertEqual(mock_run.call_args.kwargs["timeout"], 5)
+
+    def test_last_commit_dates_only_walk_commits_touching_the_paths(self):
+        self._commit({"README.md": "hello", "app.py": "print(1)"}, date="2024-01-01T00:00:00+00:00")
+        self._commit({"app.py": "print(2)"}, date="2024-02-01T00:00:00+00:00")
+        head = self._commit({"other.txt": "x"}, date="2024-03-01T00:00:00+00:00")
+        mirror = GitMirror(self.sync, "")
+        mirror.update()
+
+        dates = mirror.last_commit_dates(head, ["README.md", "app.py"])
+
+        self.assertEqual(dates, {
+            "README.md": datetime(2024, 1, 1, tzinfo=timezone.utc),
+            "app.py": datetime(2024, 2, 1, tzinfo=timezone.utc),
+        })
+        with override_settings(GIT_MIRROR_LOG_MAX_COMMITS=1):
+            dates = mirror.last_commit_dates(head, ["README.md", "app.py"])
+        # README.md is beyond the bound and falls back to the head commit date.
+        self.assertEqual(dates["README.md"], datetime(2024, 3, 1, tzinfo=timezone.utc))
+        self.assertEqual(dates["app.py"], datetime(2024, 2, 1, tzinfo=timezone.utc))
@@ -0,0 +1,404 @@
+import base64
+import importlib
+import io
+import re
+import tarfile
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from django.apps import apps
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from chat.models import ChatBotInstance, Company, Document, GitCredential, GitRepoFile, GitRepoSync
+from chat.utils import github as github_utils
+from chat.utils.file_classifier import FileClassifier
+from chat.utils.github import RateLimit, git_blob_sha, run_github_sync
+
+
+class DummyResponse:
+    def __init__(self, payload, status_code=200, headers=None):
+        self._payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = b""
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        return None
+
+    def close(self):
+        return None
+
+
+class ArchiveResponse:
+    def __init__(self, files):
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+            for path, content in files.items():
+                data = content.encode()
+                member = tarfile.TarInfo(f"octocat-hello-world-abc123/{path}")
+                member.size = len(data)
+                archive.addfile(member, io.BytesIO(data))
+        buffer.seek(0)
+        self.raw = buffer
+        self.status_code = 200
+
+    def raise_for_status(self):
+        return None
+
+    def close(self):
+        self.raw.close()
+
+
+class FakeGitHub:
+    """Serve the GitHub REST endpoints ``run_github_sync`` uses from a dict of files."""
+
+    def __init__(self, files, head="head-sha", truncated=False, compare=None, history_errors=False, remaining=None):
+        self.files = files
+        self.head = head
+        self.truncated = truncated
+        # Files reported by the compare endpoint; ``None`` answers 404 so the
+        # sync falls back to listing the tree.
+        self.compare = compare
+        # When set, GraphQL history lookups fail and only the head date resolves.
+        self.history_errors = history_errors
+        # When set, REST responses report this many requests left in the window.
+        self.remaining = remaining
+        self.requests = []
+        self.graphql_queries = []
+
+    def get(self, url, *_, **kwargs):
+        response = self._get(url, **kwargs)
+        if self.remaining is not None:
+            response.headers = {"X-RateLimit-Remaining": str(self.remaining), "X-RateLimit-Reset": "1900000000"}
+        return response
+
+    def _get(self, url, **kwargs):
+        self.requests.append(url)
+        if "/git/refs/heads/" in url:
+            return DummyResponse({"object": {"sha": self.head}})
+        if "/compare/" in url:
+            if self.compare is None:
+                return DummyResponse({"message": "Not Found"}, status_code=404)
+            return DummyResponse({"status": "ahead", "files": self.compare})
+        if "/contents/.gitattributes" in url:
+            if ".gitattributes" not in self.files:
+                return DummyResponse({"message": "Not Found"}, status_code=404)
+            content = base64.b64encode(self.files[".gitattributes"].encode()).decode()
+            return DummyResponse({"encoding": "base64", "content": content})
+        if "/tarball/" in url:
+            assert kwargs.get("stream"), "tarballs must be streamed"
+            return ArchiveResponse(self.files)
+        if "/git/trees/" in url:
+            return DummyResponse({
+                "tree": [
+                    {"type": "blob", "path": path, "sha": f"sha-{path}-{content}"}
+                    for path, content in self.files.items()
+                ],
+                "truncated": self.truncated,
+            })
+        if "/git/blobs/" in url:
+            sha = url.rsplit("/", 1)[1]
+            content = sha.split("-", 2)[2]
+            return DummyResponse({"encoding": "base64", "content": base64.b64encode(content.encode()).decode()})
+        raise AssertionError(f"Unexpected URL {url}")
+
+    def post(self, url, *_, **kwargs):
+        self.requests.append(url)
+        if url.endswith("/graphql"):
+            self.graphql_queries.append(kwargs["json"])
+            commit = {"committedDate": "2024-04-01T00:00:00Z"}
+            if self.history_errors:
+                return DummyResponse({"data": {"repository": {"object": commit}}, "errors": [{"message": "timeout"}]})
+            for alias in re.findall(r"(f\d+): history", kwargs["json"]["query"]):
+                commit[alias] = {"nodes": [{"committedDate": "2024-03-01T00:00:00Z"}]}
+            return DummyResponse({"data": {"repository": {"object": commit}}})
+        raise AssertionError(f"Unexpected URL {url}")
+
+
+class GitHubSyncTestCase(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Git Co")
+        self.chatbot = ChatBotInstance.objects.create(company=self.company, name="Git Bot")
+        credential = GitCredential(company=self.company, name="GitHub", github_username="octocat")
+        credential.token = "token"
+        credential.save()
+        self.sync = GitRepoSync.objects.create(
+            chatBot=self.chatbot,
+            credential=credential,
+            repo_full_name="octocat/hello-world",
+            branch="main",
+        )
+        self.addCleanup(github_utils._RATE_LIMITS.clear)
+
+    def _sync(self, github):
+        with patch("chat.utils.github._SESSION.get", side_effect=github.get), patch(
+            "chat.utils.github._SESSION.post", side_effect=github.post
+        ), patch(
+            "chat.utils.embeddings.embed_text", return_value=[0.1] * 1536
+        ):
+            return run_github_sync(self.sync)
+
+
+class GitHubSyncTests(GitHubSyncTestCase):
+    def test_sync_upserts_files_and_ingests_them(self):
+        self._sync(FakeGitHub({"README.md": "hello", "app.py": "print(1)", "logo.png": "binary"}, head="one"))
+        files, docs = self._sync(FakeGitHub({"README.md": "hello again", "app.py": "print(1)"}, head="two"))
+
+        self.assertEqual((files, docs), (1, 1))
+        stored = dict(GitRepoFile.objects.filter(sync=self.sync).values_list("path", "content"))
+        self.assertEqual(stored, {"README.md": "hello again", "app.py": "print(1)"})
+        self.assertEqual(
+            set(Document.objects.filter(chatbot=self.chatbot).values_list("source_id", flat=True)),
+            {str(pk) for pk in GitRepoFile.objects.values_list("pk", flat=True)},
+        )
+
+    def test_files_removed_upstream_are_swept_with_their_documents(self):
+        self._sync(FakeGitHub({"README.md": "hello", "old.md": "bye"}, head="one"))
+        old_file = GitRepoFile.objects.get(path="old.md")
+
+        self._sync(FakeGitHub({"README.md": "hello"}, head="two", truncated=True))
+        self.assertTrue(GitRepoFile.objects.filter(pk=old_file.pk).exists())
+        self.sync.refresh_from_db()
+        self.assertEqual(self.sync.last_synced_commit_sha, "one")
+
+        self._sync(FakeGitHub({"README.md": "hello"}, head="two"))
+
+        self.assertFalse(GitRepoFile.objects.filter(pk=old_file.pk).exists())
+        self.assertFalse(Document.objects.filter(source="github", source_id=str(old_file.pk)).exists())
+        self.assertEqual(Document.objects.filter(source="github").count(), 1)
+
+    def test_unchanged_head_is_a_no_op(self):
+        self._sync(FakeGitHub({"README.md": "hello"}))
+        github = FakeGitHub({"README.md": "hello"})
+
+        self.assertEqual(self._sync(github), (0, 0))
+        self.assertEqual(len(github.requests), 1)
+        self.assertIn("/git/refs/heads/", github.requests[0])
+
+    def test_only_files_changed_since_last_commit_are_processed(self):
+        self._sync(FakeGitHub({"README.md": "hello", "old.md": "bye", "app.py": "print(1)"}, head="one"))
+        app = GitRepoFile.objects.get(path="app.py")
+        github = FakeGitHub({}, head="two", compare=[
+            {"status": "modified", "filename": "README.md", "sha": "sha-README.md-hello again"},
+            {"status": "removed", "filename": "old.md", "sha": "sha-old.md-bye"},
+            {"status": "renamed", "filename": "main.py", "previous_filename": "app.py", "sha": "sha-main.py-print(1)"},
+            {"status": "added", "filename": "logo.png", "sha": "sha-logo.png-binary"},
+        ])
+
+        files, _ = self._sync(github)
+
+        self.assertEqual(files, 2)
+        self.assertFalse(any("/git/trees/" in url for url in github.requests))
+        self.assertEqual(sum("/git/blobs/" in url for url in github.requests), 2)
+        stored = dict(GitRepoFile.objects.filter(sync=self.sync).values_list("path", "content"))
+        self.assertEqual(stored, {"README.md": "hello again", "main.py": "print(1)"})
+        self.assertFalse(Document.objects.filter(source="github", source_id=str(app.pk)).exists())
+        self.assertEqual(Document.objects.filter(source="github").count(), 2)
+        self.sync.refresh_from_db()
+        self.assertEqual(self.sync.last_synced_commit_sha, "two")
+
+    def test_unchanged_blobs_are_not_downloaded_or_reingested(self):
+        self._sync(FakeGitHub({"README.md": "hello", "app.py": "print(1)"}, head="one"))
+        github = FakeGitHub({"README.md": "hello", "app.py": "print(2)"}, head="two")
+
+        with patch("chat.utils.github.ingest_github_files", return_value=0) as mock_ingest:
+            files, _ = self._sync(github)
+
+        blobs = [url.rsplit("/", 1)[1] for url in github.requests if "/git/blobs/" in url]
+        self.assertEqual(files, 1)
+        self.assertEqual(blobs, ["sha-app.py-print(2)"])
+        self.assertEqual([f.path for f in mock_ingest.call_args.kwargs["files"]], ["app.py"])
+        self.assertEqual(GitRepoFile.objects.filter(sync=self.sync).count(), 2)
+
+    def test_file_whose_ingestion_failed_is_ingested_by_the_next_sync(self):
+        self._sync(FakeGitHub({"README.md": "hello"}, head="one"))
+        github = FakeGitHub({"README.md": "hello again"}, head="two")
+
+        with patch("chat.utils.github.ingest_github_files", side_effect=RuntimeError("embedding failed")):
+            with self.assertRaises(RuntimeError):
+                self._sync(github)
+        readme = GitRepoFile.objects.get(path="README.md")
+        self.assertEqual(readme.sha, "sha-README.md-hello")
+
+        files, docs = self._sync(github)
+
+        self.assertEqual((files, docs), (1, 1))
+        readme.refresh_from_db()
+        self.assertEqual(readme.sha, "sha-README.md-hello again")
+        self.assertEqual(Document.objects.get(source="github", source_id=str(readme.pk)).content, "hello again")
+
+    def test_pure_rename_moves_the_existing_row(self):
+        self._sync(FakeGitHub({"app.py": "print(1)"}, head="one"))
+        app = GitRepoFile.objects.get(path="app.py")
+        github = FakeGitHub({}, head="two", compare=[
+            {"status": "renamed", "filename": "main.py", "previous_filename": "app.py", "sha": app.sha},
+        ])
+
+        self.assertEqual(self._sync(github), (0, 0))
+
+        app.refresh_from_db()
+        self.assertEqual(app.path, "main.py")
+        self.assertTrue(app.url.endswith("/main.py"))
+        self.assertFalse(any("/git/blobs/" in url for url in github.requests))
+        self.assertTrue(Document.objects.filter(source="github", source_id=str(app.pk)).exists())
+
+    def test_archive_mode_reads_every_file_from_one_tarball(self):
+        self.sync.fetch_mode = "archive"
+        self.sync.save(update_fields=["fetch_mode"])
+        github = FakeGitHub({"README.md": "hello\n", "docs/guide.md": "read me", "logo.png": "binary"})
+
+        files, _ = self._sync(github)
+
+        self.assertEqual(files, 2)
+        self.assertFalse(any("/git/trees/" in url or "/git/blobs/" in url for url in github.requests))
+        self.assertEqual(sum("/tarball/" in url for url in github.requests), 1)
+        readme = GitRepoFile.objects.get(sync=self.sync, path="README.md")
+        self.assertEqual(readme.sha, "ce013625030ba8dba906f756967f9e9ca394464a")
+        self.assertEqual(GitRepoFile.objects.get(path="docs/guide.md").content, "read me")
+
+        github = FakeGitHub({"README.md": "hello\n", "docs/guide.md": "read me"}, head="two")
+        self.assertEqual(self._sync(github)[0], 0)
+
+    def test_git_blob_sha_matches_git_hash_object(self):
+        self.assertEqual(git_blob_sha(b""), "e69de29bb2d1d6434b8b29ae775ad8c2e48c5391")
+
+    @override_settings(GITHUB_COMMIT_DATE_BATCH_SIZE=2)
+    def test_last_commit_dates_are_batched_through_graphql(self):
+        github = FakeGitHub({"a.md": "a", "b.md": "b", "c.md": "c"})
+
+        self._sync(github)
+
+        self.assertFalse(any("/commits" in url for url in github.requests))
+        self.assertEqual(len(github.graphql_queries), 2)
+        self.assertEqual(github.graphql_queries[0]["variables"]["oid"], "head-sha")
+        self.assertIn('path: "a.md"', github.graphql_queries[0]["query"])
+        self.assertEqual(
+            set(GitRepoFile.objects.values_list("last_updated", flat=True)),
+            {datetime(2024, 3, 1, tzinfo=timezone.utc)},
+        )
+
+    def test_unresolved_history_falls_back_to_head_commit_date(self):
+        self._sync(FakeGitHub({"a.md": "a"}, history_errors=True))
+
+        self.assertEqual(GitRepoFile.objects.get().last_updated, datetime(2024, 4, 1, tzinfo=timezone.utc))
+
+    def test_sync_records_the_remaining_rate_limit_budget(self):
+        self._sync(FakeGitHub({"README.md": "hello"}, remaining=4321))
+
+        self.sync.refresh_from_db()
+        self.assertEqual(self.sync.rate_limit_remaining, 4321)
+        self.assertEqual(self.sync.rate_limit_reset_at, datetime.fromtimestamp(1900000000, tz=timezone.utc))
+
+
+    def test_vendored_generated_and_minified_files_are_not_ingested(self):
+        self.sync.exclude_globs = "docs/archive/"
+        self.sync.save(update_fields=["exclude_globs"])
+        github = FakeGitHub({
+            ".gitattributes": "api/*.json linguist-generated\n",
+            "README.md": "hello",
+            "node_modules/lib/index.js": "module.exports = 1",
+            "static/app.min.js": "var a=1;",
+            "api/schema.json": "{}",
+            "docs/archive/old.md": "old",
+            "bundle.js": "var a=1;" * 500,
+        })
+
+        files, _ = self._sync(github)
+
+        self.assertEqual(files, 1)
+        self.assertEqual(list(GitRepoFile.objects.values_list("path", flat=True)), ["README.md"])
+        downloaded = {url.rsplit("/", 1)[1].split("-", 2)[1] for url in github.requests if "/git/blobs/" in url}
+        self.assertEqual(downloaded, {"README.md", "bundle.js"})
+
+    def test_blobs_rejected_by_content_are_not_downloaded_again_while_unchanged(self):
+        files = {"README.md": "hello", "bundle.js": "var a=1;" * 500}
+        self._sync(FakeGitHub(files))
+        self.sync.refresh_from_db()
+        self.assertEqual(self.sync.rejected_blob_shas, {"bundle.js": f"sha-bundle.js-{files['bundle.js']}"})
+
+        # The compare endpoint answers 404, so the next sync lists the whole tree.
+        github = FakeGitHub(files, head="head-2")
+        self._sync(github)
+
+        self.assertFalse(any("/git/blobs/" in url for url in github.requests))
+        self.sync.refresh_from_db()
+        self.assertEqual(list(self.sync.rejected_blob_shas), ["bundle.js"])
+
+        github = FakeGitHub({"README.md": "hello", "bundle.js": "export const a = 1;\n"}, head="head-3")
+        self._sync(github)
+
+        self.assertEqual(sorted(GitRepoFile.objects.values_list("path", flat=True)), ["README.md", "bundle.js"])
+        self.sync.refresh_from_db()
+        self.assertEqual(self.sync.rejected_blob_shas, {})
+
+    def test_files_indexed_before_the_classifier_are_swept_after_migrating(self):
+        github = FakeGitHub({
+            "README.md": "hello",
+            "app.min.js": "var a=1;",
+            "bundle.js": "var a=1;" * 500,
+        })
+        with patch.object(FileClassifier, "accepts_path", return_value=True), patch.object(
+            FileClassifier, "accepts_content", return_value=True
+        ):
+            self._sync(github)
+        self.assertEqual(GitRepoFile.objects.count(), 3)
+
+        migration = importlib.import_module("chat.migrations.0028_reclassify_repo_files")
+        migration.force_full_repo_sync(apps, None)
+        self.sync.refresh_from_db()
+        self._sync(github)
+
+        self.assertEqual(list(GitRepoFile.objects.values_list("path", flat=True)), ["README.md"])
+        self.assertEqual(Document.objects.filter(source="github").count(), 1)
+
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(github_utils._RATE_LIMITS.clear)
+
+    @patch("chat.utils.github.time.sleep")
+    @patch("chat.utils.github.time.time", return_value=1000.0)
+    def test_exhausted_budget_sleeps_until_reset(self, _mock_time, mock_sleep):
+        limit = RateLimit()
+        limit.update(DummyResponse({}, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1030"}))
+
+        limit.wait()
+
+        mock_sleep.assert_called_once_with(31.0)
+
+    @override_settings(GITHUB_RATE_LIMIT_RESERVE=100)
+    @patch("chat.utils.github.time.sleep")
+    @patch("chat.utils.github.time.time", return_value=1000.0)
+    def test_low_budget_spreads_requests_over_the_window(self, _mock_time, mock_sleep):
+        limit = RateLimit()
+        limit.update(DummyResponse({}, headers={"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": "1100"}))
+
+        limit.wait()
+        limit.wait()
+
+        mock_sleep.assert_called_once_with(10.0)
+
+    @patch("chat.utils.github.time.sleep")
+    def test_rate_limited_request_waits_and_retries(self, mock_sleep):
+        responses = [
+            DummyResponse({"message": "secondary rate limit"}, status_code=403, headers={"Retry-After": "7"}),
+            DummyResponse({"ok": True}),
+        ]
+
+        with patch("chat.utils.github._SESSION.get", side_effect=responses) as mock_get:
+            response = github_utils._gh_get("https://api.github.com/rate", "token")
+
+        self.assertEqual(response.json(), {"ok": True})
+        self.assertEqual(mock_get.call_count, 2)
+        mock_sleep.assert_called_once_with(7.0)
+
+    def test_forbidden_without_rate_limit_headers_is_returned(self):
+        denied = DummyResponse({"message": "Resource not accessible"}, status_code=403)
+
+        with patch("chat.utils.github._SESSION.get", return_value=denied) as mock_get:
+            response = github_utils._gh_get("https://api.github.com/private", "token")
+
+        self.assertIs(response, denied)
+        self.assertEqual(mock_get.call_count, 1)
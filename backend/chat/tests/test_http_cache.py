@@ -0,0 +1,107 @@
+from datetime import timedelta
+from unittest.mock import Mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from chat.models import HTTPCacheEntry
+from chat.utils.http_cache import cache_key, cached_get, prune_http_cache
+
+
+class DummyResponse:
+    def __init__(self, status_code=200, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+class CachedGetTests(TestCase):
+    url = "https://api.github.com/repos/octocat/hello-world/git/refs/heads/main"
+
+    def test_not_modified_response_serves_the_stored_body(self):
+        session = Mock()
+        session.get.side_effect = [
+            DummyResponse(content=b'{"object": {"sha": "abc"}}', headers={"ETag": '"v1"'}),
+            DummyResponse(status_code=304, headers={"X-RateLimit-Remaining": "4999"}),
+        ]
+
+        cached_get(session, self.url, credential="token", headers={"Accept": "application/json"})
+        response = cached_get(session, self.url, credential="token", headers={"Accept": "application/json"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"object": {"sha": "abc"}})
+        self.assertEqual(response.headers["X-RateLimit-Remaining"], "4999")
+        self.assertNotIn("If-None-Match", session.get.call_args_list[0].kwargs["headers"])
+        self.assertEqual(
+            session.get.call_args_list[1].kwargs["headers"],
+            {"Accept": "application/json", "If-None-Match": '"v1"'},
+        )
+
+    def test_entries_are_separate_per_credential_and_query(self):
+        session = Mock()
+        session.get.return_value = DummyResponse(
+            content=b"[]", headers={"Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"}
+        )
+
+        cached_get(session, self.url, credential="token", params={"page": 1})
+        cached_get(session, self.url, credential="other-token", params={"page": 1})
+        cached_get(session, self.url, credential="token", params={"page": 2})
+
+        self.assertEqual(HTTPCacheEntry.objects.count(), 3)
+        for call in session.get.call_args_list:
+            self.assertNotIn("If-Modified-Since", call.kwargs["headers"])
+        self.assertFalse(HTTPCacheEntry.objects.filter(url__contains="token").exists())
+
+    def test_responses_without_validators_are_not_stored(self):
+        session = Mock()
+        session.get.return_value = DummyResponse(content=b"{}")
+
+        response = cached_get(session, self.url, credential="token")
+
+        self.assertIs(response, session.get.return_value)
+        self.assertFalse(HTTPCacheEntry.objects.exists())
+
+    @override_settings(HTTP_CACHE_TTL_DAYS=7)
+    def test_expired_entries_are_not_revalidated(self):
+        session = Mock()
+        session.get.return_value = DummyResponse(content=b"{}", headers={"ETag": '"v1"'})
+        cached_get(session, self.url, credential="token")
+        HTTPCacheEntry.objects.update(updated_at=timezone.now() - timedelta(days=8))
+
+        cached_get(session, self.url, credential="token")
+
+        self.assertNotIn("If-None-Match", session.get.call_args_list[1].kwargs["headers"])
+        self.assertGreater(HTTPCacheEntry.objects.get().updated_at, timezone.now() - timedelta(days=1))
+
+    def test_not_modified_response_marks_the_entry_as_used(self):
+        session = Mock()
+        session.get.side_effect = [
+            DummyResponse(content=b"{}", headers={"ETag": '"v1"'}),
+            DummyResponse(status_code=304),
+        ]
+        cached_get(session, self.url, credential="token")
+        HTTPCacheEntry.objects.update(updated_at=timezone.now() - timedelta(days=3))
+
+        cached_get(session, self.url, credential="token")
+
+        self.assertGreater(HTTPCacheEntry.objects.get().updated_at, timezone.now() - timedelta(days=1))
+
+
+class PruneHTTPCacheTests(TestCase):
+    def _entry(self, url, age_days):
+        entry = HTTPCacheEntry.objects.create(cache_key=cache_key("token", url), url=url, etag='"v1"', body=b"{}")
+        HTTPCacheEntry.objects.filter(pk=entry.pk).update(updated_at=timezone.now() - timedelta(days=age_days))
+        return url
+
+    def test_deletes_expired_and_least_recently_used_entries(self):
+        stale = self._entry("https://example.com/stale", 30)
+        oldest = self._entry("https://example.com/oldest", 3)
+        recent = self._entry("https://example.com/recent", 2)
+        newest = self._entry("https://example.com/newest", 1)
+
+        deleted = prune_http_cache(ttl_days=14, max_entries=2)
+
+        self.assertEqual(deleted, 2)
+        self.assertCountEqual(HTTPCacheEntry.objects.values_list("url", flat=True), [recent, newest])
+        self.assertNotIn(stale, HTTPCacheEntry.objects.values_list("url", flat=True))
+        self.assertNotIn(oldest, HTTPCacheEntry.objects.values_list("url", flat=True))
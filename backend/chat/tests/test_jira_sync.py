@@ -0,0 +1,400 @@
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from chat.encryption import encrypt_api_key
+from chat.models import ChatBotInstance, Company, Credential, Document, JiraComment, JiraIssue, JiraSync
+from chat.utils.jira import (
+    ADF_TEXT_FORMAT,
+    build_issue_jql,
+    fetch_comments_concurrently,
+    fetch_jira_issues,
+    ingest_jira_issue,
+)
+
+
+class DummyResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        return None
+
+
+def _issue(key, updated):
+    return {
+        "id": key,
+        "key": key,
+        "fields": {
+            "summary": f"Summary {key}",
+            "description": f"Description {key}",
+            "status": {"name": "To Do"},
+            "created": "2024-01-01T00:00:00.000+0000",
+            "updated": updated,
+        },
+    }
+
+
+def _comments(*authors):
+    return {
+        "startAt": 0,
+        "maxResults": 50,
+        "total": len(authors),
+        "isLast": True,
+        "comments": [
+            {
+                "id": str(idx),
+                "created": "2024-01-02T00:00:00.000+0000",
+                "author": {"displayName": author},
+                "body": {"type": "doc", "content": []},
+            }
+            for idx, author in enumerate(authors)
+        ],
+    }
+
+
+@override_settings(JIRA_SYNC_SKEW_MINUTES=10, JIRA_FULL_SYNC_DAYS=7)
+class IncrementalJiraSyncTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Jira Co")
+        self.chatbot = ChatBotInstance.objects.create(company=self.company, name="Jira Bot")
+        credential = Credential.objects.create(
+            company=self.company,
+            name="Atlassian",
+            email="user@example.com",
+            _api_key=encrypt_api_key("token"),
+        )
+        self.sync = JiraSync.objects.create(
+            chatBot=self.chatbot,
+            board_url="https://example.atlassian.net/jira/software/c/projects/TEST/boards/1",
+            credential=credential,
+        )
+        self.high_water = datetime(2024, 1, 2, tzinfo=dt_timezone.utc)
+        JiraIssue.objects.create(
+            sync=self.sync,
+            issue_key="TEST-1",
+            summary="Summary TEST-1",
+            status="To Do",
+            created_at=datetime(2024, 1, 1, tzinfo=dt_timezone.utc),
+            updated_at=self.high_water,
+            text_format=ADF_TEXT_FORMAT,
+            ingest_mode="thread",
+        )
+
+    def _ingested(self, issue_key, source="jira_thread"):
+        Document.objects.create(
+            company=self.company,
+            chatbot=self.chatbot,
+            source=source,
+            source_id=f"{issue_key}_thread_0" if source == "jira_thread" else issue_key,
+            content=f"Summary {issue_key}",
+            embedding=[0.0] * 1536,
+        )
+
+    def _fetch(self, issues, comment_pages, ingest=None):
+        requests_made = []
+
+        def fake_get(url, *_, **kwargs):
+            params = kwargs.get("params") or {}
+            requests_made.append((url, params))
+            if "/rest/api/3/search" in url:
+                return DummyResponse({"startAt": 0, "total": len(issues), "isLast": True, "issues": issues})
+            issue_key = url.split("/issue/")[1].split("/")[0]
+            return DummyResponse(comment_pages[issue_key])
+
+        with patch("chat.utils.jira._SESSION.get", side_effect=fake_get):
+            processed = fetch_jira_issues(self.sync, ingest=ingest)
+        return processed, requests_made
+
+    def test_build_issue_jql_uses_relative_window_with_skew(self):
+        now = datetime(2024, 1, 2, 1, 0, 30, tzinfo=dt_timezone.utc)
+
+        self.assertEqual(build_issue_jql("TEST"), "project=TEST ORDER BY key ASC")
+        self.assertEqual(build_issue_jql("TEST", after_key="TEST-9"), 'project=TEST AND key > "TEST-9" ORDER BY key ASC')
+        self.assertEqual(
+            build_issue_jql("TEST", self.high_water, now=now),
+            "project=TEST AND updated >= -71m ORDER BY key ASC",
+        )
+        self.assertEqual(
+            build_issue_jql("TEST", self.high_water, now=now, after_key="TEST-9"),
+            'project=TEST AND updated >= -71m AND key > "TEST-9" ORDER BY key ASC',
+        )
+
+    def test_incremental_listing_pages_by_key(self):
+        self.sync.last_issue_updated_at = self.high_water
+        self.sync.last_full_sync_at = timezone.now() - timedelta(days=1)
+        self.sync.save()
+        pages = {
+            None: [_issue("TEST-2", "2024-01-03T00:00:00.000+0000"), _issue("TEST-3", "2024-01-04T00:00:00.000+0000")],
+            "TEST-3": [_issue("TEST-4", "2024-01-03T12:00:00.000+0000")],
+        }
+        searches = []
+
+        def fake_get(url, *_, **kwargs):
+            params = kwargs.get("params") or {}
+            if "/rest/api/3/search" in url:
+                searches.append(params)
+                after = re.search(r'key > "([^"]+)"', params["jql"])
+                batch = pages[after.group(1) if after else None]
+                remaining = 1 if after else 3
+                return DummyResponse({"startAt": 0, "maxResults": 2, "total": remaining, "issues": batch})
+            return DummyResponse(_comments())
+
+        with patch("chat.utils.jira._SESSION.get", side_effect=fake_get):
+            processed = fetch_jira_issues(self.sync)
+
+        self.assertEqual([issue.issue_key for issue, _ in processed], ["TEST-2", "TEST-3", "TEST-4"])
+        self.assertEqual([params["startAt"] for params in searches], [0, 0])
+        self.assertIn("updated >= -", searches[1]["jql"])
+        self.sync.refresh_from_db()
+        self.assertEqual(self.sync.last_issue_updated_at, datetime(2024, 1, 4, tzinfo=dt_timezone.utc))
+
+    def test_incremental_sync_only_refetches_touched_issues(self):
+        self.sync.last_issue_updated_at = self.high_water
+        self.sync.last_full_sync_at = timezone.now() - timedelta(days=1)
+        self.sync.save()
+        self._ingested("TEST-1")
+
+        processed, requests_made = self._fetch(
+            [
+                _issue("TEST-1", "2024-01-02T00:00:00.000+0000"),
+                _issue("TEST-2", "2024-01-03T00:00:00.000+0000"),
+            ],
+            {"TEST-2": _comments("Dana")},
+        )
+
+        self.assertEqual([issue.issue_key for issue, _ in processed], ["TEST-2"])
+        self.assertIn("updated >= -", requests_made[0][1]["jql"])
+        self.assertFalse(any("TEST-1/comment" in url for url, _ in requests_made))
+        self.assertEqual(JiraComment.objects.filter(issue__issue_key="TEST-2").count(), 1)
+        self.sync.refresh_from_db()
+        self.assertEqual(self.sync.last_issue_updated_at, datetime(2024, 1, 3, tzinfo=dt_timezone.utc))
+
+    def test_stale_full_sync_triggers_reconcile(self):
+        self.sync.last_issue_updated_at = self.high_water
+        self.sync.last_full_sync_at = timezone.now() - timedelta(days=8)
+        self.sync.save()
+
+        processed, requests_made = self._fetch(
+            [_issue("TEST-1", "2024-01-02T00:00:00.000+0000")],
+            {"TEST-1": _comments("Alice")},
+        )
+
+        self.assertEqual(requests_made[0][1]["jql"], "project=TEST ORDER BY key ASC")
+        self.assertEqual(len(processed), 1)
+        self.sync.refresh_from_db()
+        self.assertGreater(self.sync.last_full_sync_at, timezone.now() - timedelta(minutes=1))
+
+    def test_failed_ingest_keeps_the_high_water_mark_and_is_retried(self):
+        self.sync.last_issue_updated_at = self.high_water
+        self.sync.last_full_sync_at = timezone.now() - timedelta(days=1)
+        self.sync.save()
+        issues = [_issue("TEST-2", "2024-01-03T00:00:00.000+0000")]
+
+        def failing_ingest(issue, comments):
+            raise RuntimeError("embedding failed")
+
+        with self.assertRaises(RuntimeError):
+            self._fetch(issues, {"TEST-2": _comments()}, ingest=failing_ingest)
+        self.sync.refresh_from_db()
+        self.assertEqual(self.sync.last_issue_updated_at, self.high_water)
+
+        ingested = []
+        processed, _ = self._fetch(
+            issues, {"TEST-2": _comments()}, ingest=lambda issue, comments: ingested.append(issue.issue_key)
+        )
+
+        self.assertEqual([issue.issue_key for issue, _ in processed], ["TEST-2"])
+        self.assertEqual(ingested, ["TEST-2"])
+        self.sync.refresh_from_db()
+        self.assertEqual(self.sync.last_issue_updated_at, datetime(2024, 1, 3, tzinfo=dt_timezone.utc))
+
+    def test_full_reconcile_only_returns_changed_or_uningested_issues(self):
+        JiraIssue.objects.create(
+            sync=self.sync,
+            issue_key="TEST-3",
+            summary="Summary TEST-3",
+            status="To Do",
+            created_at=self.high_water,
+            updated_at=self.high_water,
+        )
+        self._ingested("TEST-1")
+
+        processed, _ = self._fetch(
+            [
+                _issue("TEST-1", "2024-01-02T00:00:00.000+0000"),
+                _issue("TEST-2", "2024-01-03T00:00:00.000+0000"),
+                _issue("TEST-3", "2024-01-02T00:00:00.000+0000"),
+            ],
+            {"TEST-2": _comments(), "TEST-3": _comments()},
+        )
+
+        self.assertEqual([issue.issue_key for issue, _ in processed], ["TEST-2", "TEST-3"])
+
+    def test_full_reconcile_reconverts_issues_ingested_by_an_older_converter(self):
+        description = {"type": "doc", "content": [{"type": "paragraph", "content": [{"type": "text", "text": "Plain"}]}]}
+        JiraIssue.objects.filter(issue_key="TEST-1").update(description=repr(description), text_format=0)
+        self._ingested("TEST-1")
+        issue = _issue("TEST-1", "2024-01-02T00:00:00.000+0000")
+        issue["fields"]["description"] = description
+        ingested = []
+
+        processed, _ = self._fetch(
+            [issue], {"TEST-1": _comments()}, ingest=lambda issue, comments: ingested.append(issue.issue_key)
+        )
+
+        self.assertEqual(ingested, ["TEST-1"])
+        self.assertEqual(JiraIssue.objects.get(issue_key="TEST-1").description, "Plain")
+
+    def test_full_reconcile_reingests_issues_built_in_another_mode(self):
+        JiraIssue.objects.filter(issue_key="TEST-1").update(ingest_mode="comment")
+        self._ingested("TEST-1", source="jira_issue")
+        ingested = []
+
+        self._fetch(
+            [_issue("TEST-1", "2024-01-02T00:00:00.000+0000")],
+            {"TEST-1": _comments()},
+            ingest=lambda issue, comments: ingested.append(issue.issue_key),
+        )
+
+        self.assertEqual(ingested, ["TEST-1"])
+
+    @patch("chat.utils.embeddings.embed_text", return_value=[0.1] * 1536)
+    def test_failed_ingest_of_a_changed_issue_is_retried(self, mock_embed_text):
+        self.sync.last_issue_updated_at = self.high_water
+        self.sync.last_full_sync_at = timezone.now() - timedelta(days=1)
+        self.sync.save()
+        self._ingested("TEST-1")
+        issues = [_issue("TEST-1", "2024-01-03T00:00:00.000+0000")]
+
+        def failing_ingest(issue, comments):
+            raise RuntimeError("embedding failed")
+
+        with self.assertRaises(RuntimeError):
+            self._fetch(issues, {"TEST-1": _comments()}, ingest=failing_ingest)
+        self.assertEqual(JiraIssue.objects.get(issue_key="TEST-1").text_format, 0)
+
+        processed, _ = self._fetch(
+            issues,
+            {"TEST-1": _comments()},
+            ingest=lambda issue, comments: ingest_jira_issue(self.company, self.chatbot, issue, comments, mode="thread"),
+        )
+
+        self.assertEqual([issue.issue_key for issue, _ in processed], ["TEST-1"])
+        self.assertEqual(JiraIssue.objects.get(issue_key="TEST-1").text_format, ADF_TEXT_FORMAT)
+
+    def test_search_trims_fields_and_uses_complete_inline_comments(self):
+        inline = _issue("TEST-2", "2024-01-03T00:00:00.000+0000")
+        inline["fields"]["comment"] = _comments("Alice", "Bob")
+        inline["fields"]["description"] = {
+            "type": "doc",
+            "content": [{"type": "paragraph", "content": [{"type": "text", "text": "Rich description"}]}],
+        }
+        truncated = _issue("TEST-3", "2024-01-03T00:00:00.000+0000")
+        truncated["fields"]["comment"] = {**_comments("Carol"), "total": 2}
+
+        processed, requests_made = self._fetch(
+            [inline, truncated],
+            {"TEST-3": _comments("Carol", "Dana")},
+        )
+
+        self.assertEqual(
+            requests_made[0][1]["fields"],
+            "summary,description,status,created,updated,comment",
+        )
+        comment_urls = [url for url, _ in requests_made if "/comment" in url]
+        self.assertEqual(len(comment_urls), 1)
+        self.assertIn("TEST-3", comment_urls[0])
+        self.assertEqual(
+            [(issue.issue_key, len(comments)) for issue, comments in processed],
+            [("TEST-2", 2), ("TEST-3", 2)],
+        )
+        self.assertEqual(processed[0][0].description, "Rich description")
+
+    def test_comments_are_keyed_on_their_jira_id(self):
+        legacy = JiraComment.objects.create(
+            issue=JiraIssue.objects.get(issue_key="TEST-1"),
+            author="Alice",
+            content="Stored before comment ids were tracked",
+            created_at=self.high_water,
+        )
+        first = _comments("Alice", "Bob")
+        edited = _comments("Alice", "Bob")
+        edited["comments"][1]["body"] = {
+            "type": "doc",
+            "content": [{"type": "paragraph", "content": [{"type": "text", "text": "Edited"}]}],
+        }
+
+        self._fetch([_issue("TEST-1", "2024-01-03T00:00:00.000+0000")], {"TEST-1": first})
+        self.sync.last_issue_updated_at = None
+        self._fetch([_issue("TEST-1", "2024-01-04T00:00:00.000+0000")], {"TEST-1": edited})
+
+        comments = JiraComment.objects.filter(issue__issue_key="TEST-1").order_by("comment_id")
+        self.assertEqual(
+            [(comment.comment_id, comment.content) for comment in comments],
+            [("0", "Unknown content"), ("1", "Edited")],
+        )
+        self.assertFalse(JiraComment.objects.filter(pk=legacy.pk).exists())
+
+    @patch("chat.utils.embeddings.embed_text", return_value=[0.1] * 1536)
+    def test_full_reconcile_sweeps_deleted_issues_and_documents(self, mock_embed_text):
+        other_sync = JiraSync.objects.create(
+            chatBot=self.chatbot,
+            board_url="https://example.atlassian.net/jira/software/c/projects/OTHER/boards/2",
+        )
+        other_issue = JiraIssue.objects.create(
+            sync=other_sync,
+            issue_key="OTHER-1",
+            summary="Other project",
+            status="To Do",
+            created_at=self.high_water,
+            updated_at=self.high_water,
+        )
+        ingest_jira_issue(self.company, self.chatbot, JiraIssue.objects.get(issue_key="TEST-1"), mode="thread")
+        ingest_jira_issue(self.company, self.chatbot, other_issue, comments=[])
+
+        self._fetch([_issue("TEST-2", "2024-01-03T00:00:00.000+0000")], {"TEST-2": _comments()})
+
+        self.assertEqual(
+            set(JiraIssue.objects.values_list("issue_key", flat=True)),
+            {"TEST-2", "OTHER-1"},
+        )
+        self.assertEqual(
+            set(Document.objects.filter(chatbot=self.chatbot).values_list("source_id", flat=True)),
+            {"OTHER-1"},
+        )
+
+
+class ConcurrentCommentFetchTests(TestCase):
+    @override_settings(JIRA_COMMENT_WORKERS=4)
+    def test_comments_are_fetched_in_parallel_and_yielded_in_order(self):
+        keys = [f"TEST-{idx}" for idx in range(8)]
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def fake_get(url, *_, **kwargs):
+            issue_key = url.split("/issue/")[1].split("/")[0]
+            with lock:
+                active.append(issue_key)
+                peak.append(len(active))
+            # Earlier issues answer last so ordering is exercised.
+            time.sleep(0.02 * (len(keys) - int(issue_key.split("-")[1])) / len(keys))
+            with lock:
+                active.remove(issue_key)
+            return DummyResponse(_comments(issue_key))
+
+        with patch("chat.utils.jira._SESSION.get", side_effect=fake_get):
+            batches = list(fetch_comments_concurrently("https://example.atlassian.net", keys, "token", "a@b.c"))
+
+        self.assertEqual([batch[0]["author"]["displayName"] for batch in batches], keys)
+        self.assertGreater(max(peak), 1)
+        self.assertLessEqual(max(peak), 4)
@@ -53,3 +53,90 @@ def test_extract_plain_text_from_adf_mixed_format_comment():
 )
 def test_extract_plain_text_from_adf_returns_empty_string_for_no_text(body):
     assert extract_plain_text_from_adf(body) == ""
+
+
+def _paragraph(*content):
+    return {"type": "paragraph", "content": list(content)}
+
+
+def _text(text, **extra):
+    return {"type": "text", "text": text, **extra}
+
+
+def test_extract_plain_text_from_adf_renders_structured_nodes():
+    body = {
+        "type": "doc",
+        "content": [
+            _paragraph(
+                _text("See "),
+                _text("docs", marks=[{"type": "link", "attrs": {"href": "https://example.com"}}]),
+                _text(" and ask "),
+                {"type": "mention", "attrs": {"id": "1", "text": "@Ann"}},
+                _text(" "),
+                {"type": "status", "attrs": {"text": "DONE"}},
+            ),
+            {
+                "type": "bulletList",
+                "content": [
+                    {
+                        "type": "listItem",
+                        "content": [
+                            _paragraph(_text("parent")),
+                            {
+                                "type": "orderedList",
+                                "attrs": {"order": 3},
+                                "content": [
+                                    {"type": "listItem", "content": [_paragraph(_text("third"))]},
+                                    {"type": "listItem", "content": [_paragraph(_text("fourth"))]},
+                                ],
+                            },
+                        ],
+                    },
+                ],
+            },
+            {"type": "codeBlock", "attrs": {"language": "python"}, "content": [_text("print(1)")]},
+            {
+                "type": "table",
+                "content": [
+                    {
+                        "type": "tableRow",
+                        "content": [
+                            {"type": "tableHeader", "content": [_paragraph(_text("Key"))]},
+                            {"type": "tableHeader", "content": [_paragraph(_text("Value"))]},
+                        ],
+                    },
+                    {
+                        "type": "tableRow",
+                        "content": [
+                            {"type": "tableCell", "content": [_paragraph(_text("a")), _paragraph(_text("b"))]},
+                            {"type": "tableCell", "content": [_paragraph(_text("c"))]},
+                        ],
+                    },
+                ],
+            },
+        ],
+    }
+
+    result = extract_plain_text_from_adf(body)
+
+    assert result == (
+        "See docs (https://example.com) and ask @Ann [DONE]\n"
+        "- parent\n"
+        "  3. third\n"
+        "  4. fourth\n"
+        "print(1)\n"
+        "Key | Value\n"
+        "a b | c"
+    )
+
+
+def test_extract_plain_text_from_adf_handles_deep_documents():
+    node = _paragraph(_text("leaf"))
+    for _ in range(10000):
+        node = {"type": "blockquote", "content": [node]}
+
+    assert extract_plain_text_from_adf({"type": "doc", "content": [node]}) == "leaf"
+
+
+def test_extract_plain_text_from_adf_passes_plain_strings_through():
+    assert extract_plain_text_from_adf("  Legacy description \n") == "Legacy description"
@@ -0,0 +1,90 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import httpx
+from django.test import SimpleTestCase, override_settings
+from openai import APITimeoutError
+
+from chat.utils.llm import LLMDeadlineExceeded, RequestDeadline, complete_chat
+
+
+def _completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class FakeStream:
+    def __init__(self, tokens, delay=0.0):
+        self.tokens = tokens
+        self.delay = delay
+        self.closed = False
+
+    def __iter__(self):
+        time.sleep(self.delay)
+        for token in self.tokens:
+            yield SimpleNamespace(
+                usage=None,
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=token))],
+            )
+
+    def close(self):
+        self.closed = True
+
+
+@override_settings(OPENAI_CHAT_MODEL="primary-model", OPENAI_MAX_RETRIES=0, OPENAI_HEDGE_AFTER=0)
+class CompleteChatTests(SimpleTestCase):
+    def test_passes_stage_deadline_as_request_timeout(self):
+        client = Mock()
+        client.chat.completions.create.return_value = _completion("answer")
+
+        result = complete_chat(client, [{"role": "user", "content": "hi"}], deadline=12.0)
+
+        self.assertEqual(result.content, "answer")
+        self.assertEqual(client.chat.completions.create.call_args.kwargs["timeout"], 12.0)
+
+    @override_settings(OPENAI_FALLBACK_MODEL="fast-model", OPENAI_FALLBACK_RESERVE=5.0)
+    def test_falls_back_to_faster_model_on_timeout(self):
+        client = Mock()
+        client.chat.completions.create.side_effect = [
+            APITimeoutError(httpx.Request("POST", "https://api.openai.com")),
+            _completion("fallback answer"),
+        ]
+
+        result = complete_chat(client, [{"role": "user", "content": "hi"}], deadline=20.0)
+
+        self.assertEqual(result.content, "fallback answer")
+        self.assertEqual(result.model, "fast-model")
+        calls = client.chat.completions.create.call_args_list
+        self.assertEqual(calls[0].kwargs["model"], "primary-model")
+        self.assertEqual(calls[0].kwargs["timeout"], 15.0)
+        self.assertEqual(calls[1].kwargs["model"], "fast-model")
+        self.assertLessEqual(calls[1].kwargs["timeout"], 20.0)
+
+    @override_settings(OPENAI_HEDGE_AFTER=0.05)
+    def test_hedges_stalled_request_and_uses_first_token(self):
+        slow = FakeStream(["slow"], delay=0.5)
+        fast = FakeStream(["fast ", "answer"])
+        client = Mock()
+        client.chat.completions.create.side_effect = [slow, fast]
+
+        result = complete_chat(client, [{"role": "user", "content": "hi"}], deadline=5.0, hedge=True)
+
+        self.assertEqual(result.content, "fast answer")
+        self.assertTrue(result.hedged)
+        self.assertEqual(client.chat.completions.create.call_count, 2)
+        # The losing stream is closed rather than left to hold a pool thread.
+        self.assertTrue(slow.closed)
+
+
+class RequestDeadlineTests(SimpleTestCase):
+    def test_stage_budget_is_capped_by_the_time_left(self):
+        deadline = RequestDeadline(5.0)
+
+        self.assertEqual(deadline.budget(2.0), 2.0)
+        self.assertLessEqual(deadline.budget(40.0), 5.0)
+
+    def test_raises_once_too_little_time_is_left(self):
+        deadline = RequestDeadline(0.5)
+
+        with self.assertRaises(LLMDeadlineExceeded):
+            deadline.budget(40.0)
@@ -0,0 +1,79 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TransactionTestCase
+from openai import OpenAI
+
+from chat.management.commands.loadtest_chat import percentile
+from chat.management.commands._fake_openai import EMBEDDING_DIMENSIONS, FakeOpenAIServer
+from chat.models import Company, Document
+
+
+class FakeOpenAIServerTests(SimpleTestCase):
+    def setUp(self):
+        self.server = FakeOpenAIServer(completion_tokens=3).start()
+        self.addCleanup(self.server.stop)
+        self.client = OpenAI(api_key="loadtest", base_url=self.server.base_url, max_retries=0)
+
+    def test_serves_embeddings(self):
+        response = self.client.embeddings.create(model="text-embedding-3-small", input="deploy docker")
+
+        self.assertEqual(len(response.data[0].embedding), EMBEDDING_DIMENSIONS)
+
+    def test_streams_completion_tokens_with_usage(self):
+        stream = self.client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": "hello"}],
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+
+        parts = []
+        usage = None
+        for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            for choice in chunk.choices:
+                if choice.delta.content:
+                    parts.append(choice.delta.content)
+
+        self.assertEqual("".join(parts), "token0 token1 token2 ")
+        self.assertEqual(usage.completion_tokens, 3)
+
+
+class PercentileTests(SimpleTestCase):
+    def test_nearest_rank_percentiles(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertIsNone(percentile([], 50))
+
+
+class LoadtestCommandTests(TransactionTestCase):
+    def _call(self, *args):
+        out = StringIO()
+        call_command(
+            "loadtest_chat", *args,
+            "--clients", "2", "--requests", "2", "--documents", "20",
+            "--embedding-latency-ms", "1", "--first-token-latency-ms", "1", "--token-latency-ms", "1",
+            "--completion-tokens", "2",
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def test_refuses_to_seed_without_flag(self):
+        with self.assertRaisesMessage(CommandError, "--seed-data"):
+            self._call()
+
+        self.assertFalse(Company.objects.exists())
+
+    def test_runs_against_fake_server_and_removes_seeded_data(self):
+        output = self._call("--seed-data", "--max-error-rate", "0")
+
+        self.assertIn("Seeded 20 documents", output)
+        self.assertIn("Load test completed.", output)
+        self.assertFalse(Company.objects.exists())
+        self.assertFalse(Document.objects.exists())
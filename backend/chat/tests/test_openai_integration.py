@@ -10,7 +10,7 @@ from chat.utils import rag
 
 
 class EmbedTextTests(SimpleTestCase):
-    @override_settings(OPENAI_API_KEY="test-key")
+    @override_settings(OPENAI_API_KEY="test-key", OPENAI_EMBEDDING_TIMEOUT=10.0, OPENAI_MAX_RETRIES=1)
     def test_embed_text_success(self):
         mock_client = Mock()
         mock_response = Mock()
@@ -24,6 +24,7 @@ class EmbedTextTests(SimpleTestCase):
         mock_client.embeddings.create.assert_called_once_with(
             model="text-embedding-3-small",
             input="hello world",
+            timeout=5.0,
         )
 
     @override_settings(OPENAI_API_KEY="test-key")
@@ -52,7 +53,7 @@ class EmbedTextTests(SimpleTestCase):
 
 
 class GenerateAnswerTests(SimpleTestCase):
-    @override_settings(OPENAI_API_KEY="test-key")
+    @override_settings(OPENAI_API_KEY="test-key", OPENAI_EMBEDDING_TIMEOUT=10.0)
     def test_generate_answer_success(self):
         mock_client = Mock()
         mock_choice = SimpleNamespace(message=SimpleNamespace(content="final answer"))
@@ -72,7 +73,30 @@ class GenerateAnswerTests(SimpleTestCase):
             },
         )
         mock_client.chat.completions.create.assert_called_once()
-        mock_search_documents.assert_called_once_with(1, 2, "question", 5)
+        mock_search_documents.assert_called_once_with(
+            1, 2, "question", 5, query_embedding=None, embedding_timeout=10.0
+        )
+
+    @override_settings(OPENAI_API_KEY="test-key")
+    def test_generate_answer_debug_reports_stage_timings(self):
+        mock_client = Mock()
+        mock_choice = SimpleNamespace(message=SimpleNamespace(content="final answer"))
+        mock_usage = SimpleNamespace(prompt_tokens=120, completion_tokens=30)
+        mock_client.chat.completions.create.return_value = SimpleNamespace(
+            choices=[mock_choice], usage=mock_usage
+        )
+
+        with patch("chat.utils.rag.get_openai_client", return_value=mock_client), patch(
+            "chat.utils.rag.search_documents", return_value=[]
+        ):
+            result = rag.generate_answer(company_id=1, chatbot_id=2, query="question", debug=True)
+
+        debug = result["debug"]
+        self.assertIn("prompt_build", debug["stages_ms"])
+        self.assertIn("completion", debug["stages_ms"])
+        self.assertEqual(debug["prompt_tokens"], 120)
+        self.assertEqual(debug["completion_tokens"], 30)
+        self.assertIsNotNone(debug["total_ms"])
 
     @override_settings(OPENAI_API_KEY="test-key")
     def test_generate_answer_rate_limit_error(self):
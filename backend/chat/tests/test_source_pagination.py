@@ -180,7 +180,9 @@ class SourcePaginationTests(TestCase):
         def fake_get(url, *_, **kwargs):
             params = kwargs.get("params") or {}
             if "/rest/api/3/search" in url:
-                start = params.get("startAt", 0)
+                # Full listings page by key, not by offset.
+                self.assertEqual(params.get("startAt"), 0)
+                start = 2 if 'key > "TEST-2"' in params["jql"] else 0
                 return DummyResponse(issue_pages.get(start, {"issues": []}))
             if "/comment" in url:
                 issue_key = url.split("/issue/")[1].split("/")[0]
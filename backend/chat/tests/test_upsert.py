@@ -0,0 +1,41 @@
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from chat.models import ChatBotInstance, Company, JiraIssue, JiraSync
+from chat.utils.upsert import bulk_upsert
+
+
+class BulkUpsertTests(TestCase):
+    def setUp(self):
+        company = Company.objects.create(name="Upsert Co")
+        chatbot = ChatBotInstance.objects.create(company=company, name="Upsert Bot")
+        self.sync = JiraSync.objects.create(
+            chatBot=chatbot,
+            board_url="https://example.atlassian.net/jira/software/c/projects/TEST/boards/1",
+        )
+
+    def _issues(self, summary, count):
+        now = timezone.now()
+        return [
+            JiraIssue(
+                sync=self.sync,
+                issue_key=f"TEST-{idx}",
+                summary=summary,
+                status="To Do",
+                created_at=now,
+                updated_at=now,
+            )
+            for idx in range(count)
+        ]
+
+    @override_settings(SYNC_UPSERT_BATCH_SIZE=2)
+    def test_upserts_in_batches_and_returns_primary_keys(self):
+        created = bulk_upsert(JiraIssue, self._issues("first", 5), ["sync", "issue_key"], ["summary"])
+
+        # One INSERT per batch, each wrapped in its own transaction.
+        with self.assertNumQueries(9):
+            updated = bulk_upsert(JiraIssue, self._issues("second", 5), ["sync", "issue_key"], ["summary"])
+
+        self.assertEqual([obj.pk for obj in updated], [obj.pk for obj in created])
+        self.assertEqual(JiraIssue.objects.count(), 5)
+        self.assertEqual(set(JiraIssue.objects.values_list("summary", flat=True)), {"second"})
@@ -0,0 +1,137 @@
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from chat.models import ConfluencePage, GitRepoFile, JiraComment, JiraIssue
+from chat.utils.embeddings import base_source_id
+from chat.utils.jira import get_base_domain
+
+
+_JIRA_COMMENT_ID_RE = re.compile(r"^(?P<issue_key>.+)_comment_(?P<comment_id>\d+)$")
+_JIRA_THREAD_ID_RE = re.compile(r"^(?P<issue_key>.+)_thread_\d+$")
+
+Citation = Dict[str, object]
+
+
+def _int_ids(values: Iterable[str]) -> List[int]:
+    ids = []
+    for value in values:
+        try:
+            ids.append(int(value))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def _jira_browse_url(board_url: str, issue_key: str) -> str:
+    return f"{get_base_domain(board_url)}/browse/{issue_key}"
+
+
+def _resolve_github(chatbot_id: int, source_ids: Iterable[str]) -> Dict[str, Citation]:
+    files = GitRepoFile.objects.filter(
+        pk__in=_int_ids(source_ids),
+        sync__chatBot_id=chatbot_id,
+    ).only('id', 'path', 'url', 'last_updated')
+    return {
+        str(f.id): {"url": f.url, "title": f.path, "last_updated": f.last_updated}
+        for f in files
+    }
+
+
+def _resolve_confluence(chatbot_id: int, source_ids: Iterable[str]) -> Dict[str, Citation]:
+    pages = ConfluencePage.objects.filter(
+        pk__in=_int_ids(source_ids),
+        sync__chatBot_id=chatbot_id,
+    ).only('id', 'title', 'url', 'last_updated')
+    return {
+        str(page.id): {"url": page.url, "title": page.title, "last_updated": page.last_updated}
+        for page in pages
+    }
+
+
+def _resolve_jira_issues(chatbot_id: int, source_ids: Iterable[str]) -> Dict[str, Citation]:
+    issues = JiraIssue.objects.filter(
+        issue_key__in=set(source_ids),
+        sync__chatBot_id=chatbot_id,
+    ).select_related('sync').only('issue_key', 'summary', 'updated_at', 'sync__board_url')
+    return {
+        issue.issue_key: {
+            "url": _jira_browse_url(issue.sync.board_url, issue.issue_key),
+            "title": f"{issue.issue_key}: {issue.summary}",
+            "last_updated": issue.updated_at,
+        }
+        for issue in issues
+    }
+
+
+def _resolve_jira_comments(chatbot_id: int, source_ids: Iterable[str]) -> Dict[str, Citation]:
+    parsed: Dict[int, str] = {}
+    for source_id in source_ids:
+        match = _JIRA_COMMENT_ID_RE.match(source_id)
+        if match:
+            parsed[int(match.group("comment_id"))] = source_id
+
+    comments = JiraComment.objects.filter(
+        pk__in=parsed.keys(),
+        issue__sync__chatBot_id=chatbot_id,
+    ).select_related('issue__sync').only(
+        'id', 'author', 'created_at', 'issue__issue_key', 'issue__summary', 'issue__sync__board_url'
+    )
+    citations = {}
+    for comment in comments:
+        issue = comment.issue
+        citations[parsed[comment.id]] = {
+            "url": _jira_browse_url(issue.sync.board_url, issue.issue_key),
+            "title": f"{issue.issue_key}: {issue.summary} (comment by {comment.author})",
+            "last_updated": comment.created_at,
+        }
+    return citations
+
+
+def _resolve_jira_threads(chatbot_id: int, source_ids: Iterable[str]) -> Dict[str, Citation]:
+    issue_keys: Dict[str, List[str]] = defaultdict(list)
+    for source_id in source_ids:
+        match = _JIRA_THREAD_ID_RE.match(source_id)
+        if match:
+            issue_keys[match.group("issue_key")].append(source_id)
+
+    issues = _resolve_jira_issues(chatbot_id, issue_keys.keys())
+    return {
+        source_id: citation
+        for issue_key, citation in issues.items()
+        for source_id in issue_keys[issue_key]
+    }
+
+
+_RESOLVERS = {
+    "github": _resolve_github,
+    "confluence": _resolve_confluence,
+    "jira_issue": _resolve_jira_issues,
+    "jira_comment": _resolve_jira_comments,
+    "jira_thread": _resolve_jira_threads,
+}
+
+
+def resolve_citations(chatbot_id: int, docs: List[dict]) -> List[dict]:
+    """Enrich search results in place with ``url``, ``title`` and ``last_updated``.
+
+    Runs at most one query per source table regardless of how many results
+    cite it. Results whose source row no longer exists are left unchanged.
+    """
+    wanted: Dict[str, set] = defaultdict(set)
+    keyed: List[Tuple[dict, str, str]] = []
+    for doc in docs:
+        source = doc.get("source")
+        if source not in _RESOLVERS:
+            continue
+        base_id = base_source_id(str(doc.get("source_id")))
+        wanted[source].add(base_id)
+        keyed.append((doc, source, base_id))
+
+    resolved = {source: _RESOLVERS[source](chatbot_id, ids) for source, ids in wanted.items()}
+
+    for doc, source, base_id in keyed:
+        citation = resolved[source].get(base_id)
+        if citation:
+            doc.update(citation)
+    return docs
@@ -1,13 +1,24 @@
 import logging
-from typing import Iterable, List
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from html.parser import HTMLParser
+from typing import Callable, Iterable, Iterator, List, Optional
 
 import requests
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from urllib.parse import urlparse, urlencode, parse_qsl, urlunparse
-from chat.models import ConfluencePage, ConfluenceSync
+from chat.models import ConfluencePage, ConfluenceSync, Document
 from chat.encryption import decrypt_api_key
-from chat.utils.embeddings import save_document
+from chat.utils.embeddings import base_source_id, save_document
+from chat.utils.sweep import sweep_documents, sweep_rows
+from chat.utils.upsert import bulk_upsert
 
 
 logger = logging.getLogger(__name__)
@@ -17,13 +28,17 @@ _REQUEST_TIMEOUT = (5, 30)
 
 def _build_session() -> requests.Session:
     session = requests.Session()
+    # Page bodies are fetched concurrently on this session: honour
+    # Retry-After on 429/503 and back off exponentially.
     retry = Retry(
-        total=3,
+        total=5,
         backoff_factor=0.5,
         status_forcelist=(429, 500, 502, 503, 504),
         allowed_methods=("GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS", "HEAD"),
+        respect_retry_after_header=True,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    pool_size = max(settings.CONFLUENCE_FETCH_WORKERS, 1)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
     return session
@@ -31,6 +46,178 @@ def _build_session() -> requests.Session:
 
 _SESSION = _build_session()
 
+_WHITESPACE_RE = re.compile(r"[ \t\r\n\f\v\xa0]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+_BLOCK_TAGS = frozenset({
+    "p", "div", "h1", "h2", "h3", "h4", "h5", "h6", "br", "hr", "blockquote", "pre",
+    "table", "tr", "ul", "ol", "li", "dl", "dt", "dd", "section",
+    "ac:layout-section", "ac:layout-cell", "ac:rich-text-body", "ac:task",
+})
+# Elements whose content is markup metadata rather than page text.
+_SKIP_TAGS = frozenset({
+    "ac:parameter", "ac:placeholder", "ac:image", "ac:emoticon", "style", "script",
+})
+_CELL_TAGS = frozenset({"td", "th"})
+_LINK_TAGS = frozenset({"a", "ac:link"})
+# Attributes used as the text of a link that has no body.
+_LINK_TARGET_ATTRS = ("ri:content-title", "ri:value", "ri:filename", "ri:space-key", "href")
+
+
+class _StorageTextParser(HTMLParser):
+    """Stream Confluence storage-format XHTML into compact plain text.
+
+    Block elements become line breaks, list items get ``-``/``1.`` markers,
+    table rows become ``|``-separated cells, code macros keep their CDATA
+    body verbatim, links are reduced to their text (or target title), and
+    macro parameters, images and emoticons are dropped.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+        self._verbatim_depth = 0
+        self._cell_depth = 0
+        self._cells_in_row: List[int] = []
+        self._lists: List[Optional[int]] = []
+        # One entry per open link: [text emitted, fallback target].
+        self._links: List[list] = []
+
+    def _break(self) -> None:
+        if not self.parts:
+            return
+        if self._cell_depth:
+            if not self.parts[-1].endswith((" ", "\n", "| ")):
+                self.parts.append(" ")
+        elif not self.parts[-1].endswith("\n"):
+            self.parts.append("\n")
+
+    def _text(self, text: str) -> None:
+        if not text:
+            return
+        self.parts.append(text)
+        if self._links:
+            self._links[-1][0] = True
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+
+        if tag in _LINK_TAGS:
+            self._links.append([False, None])
+        elif tag.startswith("ri:") and self._links:
+            attributes = dict(attrs)
+            for name in _LINK_TARGET_ATTRS:
+                if attributes.get(name):
+                    self._links[-1][1] = attributes[name]
+                    break
+        elif tag == "ac:structured-macro" and dict(attrs).get("ac:name") in {"code", "noformat"}:
+            self._break()
+        elif tag in {"pre", "ac:plain-text-body"}:
+            self._verbatim_depth += 1
+            self._break()
+        elif tag == "tr":
+            self._break()
+            self._cells_in_row.append(0)
+        elif tag in _CELL_TAGS:
+            if self._cells_in_row:
+                if self._cells_in_row[-1]:
+                    if self.parts:
+                        self.parts[-1] = self.parts[-1].rstrip(" ")
+                    self.parts.append(" | ")
+                self._cells_in_row[-1] += 1
+            self._cell_depth += 1
+        elif tag in {"ul", "ol"}:
+            self._break()
+            self._lists.append(1 if tag == "ol" else None)
+        elif tag == "li":
+            self._break()
+            indent = "  " * max(len(self._lists) - 1, 0)
+            if self._lists and self._lists[-1] is not None:
+                self.parts.append(f"{indent}{self._lists[-1]}. ")
+                self._lists[-1] += 1
+            else:
+                self.parts.append(f"{indent}- ")
+        elif tag in _BLOCK_TAGS:
+            self._break()
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+            return
+        if self._skip_depth:
+            return
+
+        if tag in _LINK_TAGS:
+            if self._links:
+                emitted, target = self._links.pop()
+                if not emitted and target:
+                    self._text(target)
+        elif tag in {"pre", "ac:plain-text-body"}:
+            self._verbatim_depth = max(self._verbatim_depth - 1, 0)
+            self._break()
+        elif tag == "tr":
+            if self._cells_in_row:
+                self._cells_in_row.pop()
+            if self.parts:
+                self.parts[-1] = self.parts[-1].rstrip(" ")
+            self._break()
+        elif tag in _CELL_TAGS:
+            self._cell_depth = max(self._cell_depth - 1, 0)
+        elif tag in {"ul", "ol"}:
+            if self._lists:
+                self._lists.pop()
+            self._break()
+        elif tag in _BLOCK_TAGS or tag == "ac:structured-macro":
+            self._break()
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in _SKIP_TAGS and tag not in _LINK_TAGS and tag not in {"pre", "ac:plain-text-body"}:
+            # Void elements such as <br/> and <ri:page/> have no content.
+            if tag in _BLOCK_TAGS and tag not in {"br", "hr"}:
+                self.handle_endtag(tag)
+            return
+        self.handle_endtag(tag)
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._verbatim_depth:
+            self._text(data)
+            return
+        text = _WHITESPACE_RE.sub(" ", data)
+        if text.startswith(" ") and (not self.parts or self.parts[-1].endswith((" ", "\n"))):
+            text = text[1:]
+        self._text(text)
+
+    def unknown_decl(self, data):
+        if self._skip_depth or not data.startswith("CDATA["):
+            return
+        self._text(data[len("CDATA["):])
+
+
+# Bump when ``storage_to_text`` changes: the next full reconcile re-ingests
+# pages whose documents were converted by an older version.
+STORAGE_TEXT_FORMAT = 1
+
+
+def storage_to_text(storage: str) -> str:
+    """Return compact plain text for a Confluence storage-format body."""
+    if not storage:
+        return ""
+    parser = _StorageTextParser()
+    parser.feed(storage)
+    parser.close()
+    # Only trailing whitespace is trimmed so code keeps its indentation.
+    lines = (line.rstrip() for line in "".join(parser.parts).split("\n"))
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
 def get_confluence_base_url(space_url):
     """
     Extract base URL from Confluence space URL
@@ -54,7 +241,110 @@ def extract_space_key(space_url):
         logger.exception("Error extracting Confluence space key from URL")
     return ""
 
-def fetch_confluence_pages(sync: ConfluenceSync) -> List[ConfluencePage]:
+def _adopt_legacy_pages(sync: ConfluenceSync, pages: Iterable[ConfluencePage]) -> None:
+    """Attach page ids to rows stored before ids were tracked, matched by title.
+
+    The rows keep their primary key, and so the documents keyed on it.
+    """
+    legacy = {
+        page.title: page
+        for page in ConfluencePage.objects.filter(sync=sync, page_id__isnull=True).only('id', 'title')
+    }
+    if not legacy:
+        return
+    adopted = []
+    for page in pages:
+        row = legacy.pop(page.title, None)
+        if row is not None:
+            row.page_id = page.page_id
+            adopted.append(row)
+    ConfluencePage.objects.bulk_update(adopted, ['page_id'])
+
+
+def sweep_confluence_pages(sync: ConfluenceSync, listed_ids: List[str]) -> int:
+    """Remove pages missing from a complete listing, with their documents."""
+    if not listed_ids:
+        logger.warning("Skipping Confluence sweep for sync %s: the listing was empty", sync.pk)
+        return 0
+
+    deleted = sweep_rows(ConfluencePage.objects.filter(sync=sync), 'page_id', listed_ids)
+    live_ids = ConfluencePage.objects.filter(sync__chatBot_id=sync.chatBot_id).values_list('id', flat=True)
+    sweep_documents(sync.chatBot, "confluence", {str(pk) for pk in live_ids})
+    return deleted
+
+
+def fetch_page_bodies(base_url: str, page_ids: List[str], auth) -> Iterator[Optional[dict]]:
+    """Yield each page in ``page_ids`` with its storage body, in order.
+
+    ``None`` is yielded for a page deleted since it was listed. Requests run
+    on up to ``CONFLUENCE_FETCH_WORKERS`` threads sharing the module session.
+    """
+    def fetch(page_id: str) -> Optional[dict]:
+        response = _SESSION.get(
+            f"{base_url}/wiki/rest/api/content/{page_id}",
+            auth=auth,
+            headers={"Accept": "application/json"},
+            timeout=_REQUEST_TIMEOUT,
+            params={"expand": "body.storage,version"},
+        )
+        if response.status_code == 404:
+            logger.info("Confluence page %s was deleted after it was listed", page_id)
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    workers = min(settings.CONFLUENCE_FETCH_WORKERS, len(page_ids))
+    if workers <= 1:
+        for page_id in page_ids:
+            yield fetch(page_id)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="confluence-bodies")
+    try:
+        yield from executor.map(fetch, page_ids)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _needs_full_sync(sync: ConfluenceSync, now: datetime) -> bool:
+    if sync.last_page_modified_at is None or sync.last_full_sync_at is None:
+        return True
+    return now - sync.last_full_sync_at >= timedelta(days=settings.CONFLUENCE_FULL_SYNC_DAYS)
+
+
+def build_page_cql(space_key: str, modified_since: Optional[datetime] = None, now: Optional[datetime] = None) -> str:
+    """Return the search CQL, limited to pages modified since ``modified_since``.
+
+    The window is a relative ``now("-Nm")`` offset widened by
+    ``CONFLUENCE_SYNC_SKEW_MINUTES``, so the server's time zone and clock do
+    not matter.
+    """
+    if modified_since is None:
+        return f'space="{space_key}"'
+
+    now = now or timezone.now()
+    elapsed = max((now - modified_since).total_seconds(), 0)
+    minutes = math.ceil(elapsed / 60) + settings.CONFLUENCE_SYNC_SKEW_MINUTES
+    return f'space="{space_key}" and lastmodified >= now("-{minutes}m")'
+
+
+def fetch_confluence_pages(
+    sync: ConfluenceSync,
+    full: Optional[bool] = None,
+    ingest: Optional[Callable[[List[ConfluencePage]], object]] = None,
+) -> List[ConfluencePage]:
+    """Fetch pages modified since the last sync.
+
+    Only pages modified after the stored high-water mark are listed, with
+    their version number but no body. Bodies are then downloaded
+    concurrently for new or changed versions only, so only changed pages are
+    returned. A full reconcile, which also sweeps deleted pages,
+    runs on the first sync, every ``CONFLUENCE_FULL_SYNC_DAYS`` days, or when
+    ``full`` is true.
+
+    ``ingest`` is called with the returned pages before the high-water mark
+    is saved, so pages whose ingestion fails are listed again next time.
+    """
     try:
         api_key = decrypt_api_key(sync.credential._api_key)
         email = sync.credential.email
@@ -64,10 +354,14 @@ def fetch_confluence_pages(sync: ConfluenceSync) -> List[ConfluencePage]:
 
     base_url = get_confluence_base_url(sync.space_url)
     space_key = extract_space_key(sync.space_url)
-    cql_query = f'space="{space_key}"'
+    now = timezone.now()
+    if full is None:
+        full = _needs_full_sync(sync, now)
+    cql_query = build_page_cql(space_key, None if full else sync.last_page_modified_at, now=now)
     query_params = {
         "cql": cql_query,
-        "expand": "body.storage,version",
+        # Only versions are listed; bodies are fetched for changed pages.
+        "expand": "version",
         "limit": 100,  # Adjust limit as needed
     }
     query_string = urlencode(query_params)
@@ -133,37 +427,124 @@ def fetch_confluence_pages(sync: ConfluenceSync) -> List[ConfluencePage]:
 
         params = {
             "cql": cql_query,
-            "expand": "body.storage,version",
+            "expand": query_params["expand"],
             "limit": limit,
             "start": next_start,
         }
         next_url = None
 
-    processed: List[ConfluencePage] = []
+    stored = ConfluencePage.objects.filter(sync=sync)
+    if not full:
+        stored = stored.filter(page_id__in=[str(page.get("id", "")) for page in pages])
+    stored_rows = list(stored.values_list("page_id", "version", "id", "text_format")) if pages else []
+    ingested = None
+    if full and stored_rows:
+        # Re-fetch pages whose documents are missing, e.g. after a failed
+        # ingestion, even though their version is unchanged.
+        ingested = {
+            base_source_id(source_id)
+            for source_id in Document.objects.filter(
+                chatbot_id=sync.chatBot_id, source="confluence"
+            ).values_list("source_id", flat=True)
+        }
+    known_versions = {
+        page_id: version
+        for page_id, version, pk, _text_format in stored_rows
+        if ingested is None or str(pk) in ingested
+    }
+
+    listed_ids: List[str] = []
+    changed: dict = {}
+    high_water = sync.last_page_modified_at
     for page in pages:
-        title = page.get("title", "")
-        content = page.get("body", {}).get("storage", {}).get("value", "")
-        last_updated = page.get("version", {}).get("when", "")
-        page_url = f"{base_url}/wiki{page.get('_links', {}).get('webui', '')}"
+        page_id = str(page.get("id", ""))
+        if not page_id:
+            continue
+        listed_ids.append(page_id)
+        version = page.get("version", {}) or {}
+        last_updated = parse_datetime(version.get("when", ""))
+        if last_updated is not None and (high_water is None or last_updated > high_water):
+            high_water = last_updated
+        if version.get("number") is not None and known_versions.get(page_id) == version.get("number"):
+            continue
+        # Keyed by page id so a page listed twice is fetched and upserted once.
+        changed[page_id] = page
+
+    missing_bodies = [page_id for page_id, page in changed.items() if "body" not in page]
+    deleted_ids = set()
+    for page_id, page in zip(missing_bodies, fetch_page_bodies(base_url, missing_bodies, auth)):
+        if page is None:
+            del changed[page_id]
+            deleted_ids.add(page_id)
+        else:
+            changed[page_id] = page
+    if deleted_ids:
+        # Leave them out of the listing so a full reconcile sweeps them.
+        listed_ids = [page_id for page_id in listed_ids if page_id not in deleted_ids]
 
-        page_obj, _ = ConfluencePage.objects.update_or_create(
+    page_objs: dict = {}
+    for page_id, page in changed.items():
+        version = page.get("version", {}) or {}
+        page_objs[page_id] = ConfluencePage(
             sync=sync,
-            title=title,
-            defaults={
-                "content": content,
-                "url": page_url,
-                "last_updated": last_updated
-            }
+            page_id=page_id,
+            version=version.get("number"),
+            title=page.get("title", ""),
+            content=page.get("body", {}).get("storage", {}).get("value", ""),
+            url=f"{base_url}/wiki{page.get('_links', {}).get('webui', '')}",
+            last_updated=parse_datetime(version.get("when", "")),
         )
-        processed.append(page_obj)
 
-    if processed:
-        from django.utils import timezone
+    _adopt_legacy_pages(sync, page_objs.values())
+    # The version is stored by ingest_confluence_pages once the page's
+    # documents are saved, so a failed ingestion leaves the page eligible
+    # for the next run; new rows start without one.
+    versions = {page_id: page.version for page_id, page in page_objs.items()}
+    for page in page_objs.values():
+        page.version = None
+    processed: List[ConfluencePage] = bulk_upsert(
+        ConfluencePage,
+        list(page_objs.values()),
+        unique_fields=["sync", "page_id"],
+        update_fields=["title", "content", "url", "last_updated"],
+    )
+    for page in processed:
+        page.version = versions[page.page_id]
+    if full:
+        # Unchanged pages ingested by an older converter are re-ingested
+        # from their stored body.
+        listed = set(listed_ids)
+        outdated = [
+            page_id for page_id, _version, _pk, text_format in stored_rows
+            if text_format < STORAGE_TEXT_FORMAT
+            and page_id in listed
+            and page_id in known_versions
+            and page_id not in changed
+        ]
+        if outdated:
+            processed.extend(ConfluencePage.objects.filter(sync=sync, page_id__in=outdated).order_by("id"))
+        sweep_confluence_pages(sync, listed_ids)
 
-        sync.last_sync_time = timezone.now()
-        sync.save(update_fields=["last_sync_time"])
+    if ingest is not None and processed:
+        ingest(processed)
 
-    logger.info("Fetched %s Confluence pages for sync %s", len(processed), sync.pk)
+    update_fields = ["last_page_modified_at"]
+    sync.last_page_modified_at = high_water
+    if full:
+        sync.last_full_sync_at = now
+        update_fields.append("last_full_sync_at")
+    if processed:
+        sync.last_sync_time = now
+        update_fields.append("last_sync_time")
+    sync.save(update_fields=update_fields)
+
+    logger.info(
+        "Fetched %s changed Confluence pages (%s listed, %s sync) for sync %s",
+        len(processed),
+        len(listed_ids),
+        "full" if full else "incremental",
+        sync.pk,
+    )
 
     return processed
 
@@ -177,8 +558,13 @@ def ingest_confluence_pages(sync: ConfluenceSync, pages: Iterable[ConfluencePage
             chatbot=sync.chatBot,
             source="confluence",
             source_id=page.id,
-            content=page.content
+            content=storage_to_text(page.content)
         )
         documents_created += len(docs)
+        # Drop chunks left over from a longer earlier version of the page.
+        Document.objects.filter(chatbot=sync.chatBot, source="confluence").filter(
+            Q(source_id=str(page.id)) | Q(source_id__startswith=f"{page.id}_part_")
+        ).exclude(source_id__in=[doc.source_id for doc in docs]).delete()
+        ConfluencePage.objects.filter(pk=page.pk).update(version=page.version, text_format=STORAGE_TEXT_FORMAT)
 
     return documents_created
@@ -0,0 +1,199 @@
+import logging
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from openai import APIConnectionError, APITimeoutError, InternalServerError, OpenAI, RateLimitError
+
+from chat.models import Conversation, ConversationMessage
+from chat.utils.llm import LLMDeadlineExceeded, complete_chat
+
+
+logger = logging.getLogger(__name__)
+
+# Same rough characters-per-token ratio used by ``chunk_text``.
+_CHARS_PER_TOKEN = 4
+
+# Summarising with less time than this is unlikely to finish; skip it instead.
+_MIN_SUMMARY_SECONDS = 2.0
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text or "") // _CHARS_PER_TOKEN + 1
+
+
+def _format_transcript(messages: List[dict]) -> str:
+    return "\n".join(f"{message['role'].capitalize()}: {message['content']}" for message in messages)
+
+
+def load_history(conversation: Conversation) -> Tuple[str, List[dict]]:
+    """Return the running summary and the verbatim turns that fit the history budget.
+
+    Turns are folded into the summary by ``compact_history`` in the sync
+    worker, so the budget is enforced here as well: a turn that has not been
+    summarised yet can never make the prompt grow without bound.
+    """
+    messages = list(
+        conversation.messages.filter(is_summarized=False).order_by('-created_at', '-id')
+    )
+
+    budget = settings.CHAT_HISTORY_TOKEN_BUDGET
+    used = 0
+    recent: List[dict] = []
+    for message in messages:
+        tokens = estimate_tokens(message.content)
+        if used + tokens > budget:
+            break
+        used += tokens
+        recent.append({"role": message.role, "content": message.content})
+
+    recent.reverse()
+    return conversation.summary, recent
+
+
+def condense_question(
+    client: OpenAI,
+    summary: str,
+    history: List[dict],
+    query: str,
+    timeout: Optional[float] = None,
+) -> str:
+    """Rewrite a follow-up question into a standalone question for retrieval.
+
+    ``timeout`` defaults to ``OPENAI_HISTORY_TIMEOUT``.
+    """
+    if not summary and not history:
+        return query
+
+    context_parts = []
+    if summary:
+        context_parts.append(f"Summary of the earlier conversation:\n{summary}")
+    if history:
+        context_parts.append(f"Recent messages:\n{_format_transcript(history)}")
+    context_text = "\n\n".join(context_parts)
+
+    try:
+        completion = complete_chat(
+            client,
+            [
+                {
+                    "role": "system",
+                    "content": (
+                        "Rewrite the user's follow-up question as a single standalone question "
+                        "that can be understood without the conversation. "
+                        "Reply with the question only."
+                    ),
+                },
+                {"role": "user", "content": f"{context_text}\n\nFollow-up question: {query}"},
+            ],
+            deadline=settings.OPENAI_HISTORY_TIMEOUT if timeout is None else timeout,
+            temperature=0,
+            max_tokens=200,
+        )
+    except (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError):
+        logger.warning("Failed to condense follow-up question; retrieving with the raw question.", exc_info=True)
+        return query
+
+    condensed = (completion.content or "").strip()
+    return condensed or query
+
+
+def _summarize(client: OpenAI, summary: str, messages: List[ConversationMessage], timeout: float) -> str:
+    budget = settings.CHAT_SUMMARY_TOKEN_BUDGET
+    transcript = _format_transcript(
+        [{"role": message.role, "content": message.content} for message in messages]
+    )
+    previous = summary or "(none)"
+
+    completion = complete_chat(
+        client,
+        [
+            {
+                "role": "system",
+                "content": (
+                    "You maintain a running summary of a support conversation. "
+                    "Merge the new messages into the existing summary, keeping facts, "
+                    "decisions and open questions. "
+                    f"Keep the summary under {budget * 3 // 4} words."
+                ),
+            },
+            {"role": "user", "content": f"Existing summary:\n{previous}\n\nNew messages:\n{transcript}"},
+        ],
+        deadline=timeout,
+        temperature=0,
+        max_tokens=budget,
+    )
+    new_summary = (completion.content or "").strip()
+    return new_summary[: budget * _CHARS_PER_TOKEN]
+
+
+def _messages_to_fold(conversation: Conversation) -> List[ConversationMessage]:
+    """Return the oldest verbatim turns that no longer fit the history budget."""
+    messages = list(
+        conversation.messages.filter(is_summarized=False).order_by('created_at', 'id')
+    )
+
+    budget = settings.CHAT_HISTORY_TOKEN_BUDGET
+    kept_tokens = 0
+    split = len(messages)
+    for idx in range(len(messages) - 1, -1, -1):
+        tokens = estimate_tokens(messages[idx].content)
+        if kept_tokens + tokens > budget:
+            break
+        kept_tokens += tokens
+        split = idx
+    return messages[:split]
+
+
+def compact_history(client: OpenAI, conversation: Conversation, timeout: Optional[float] = None) -> None:
+    """Fold the oldest verbatim turns into the summary once they exceed the budget.
+
+    ``timeout`` defaults to ``OPENAI_HISTORY_TIMEOUT``. With too little time
+    left, or when summarising fails, the turns stay verbatim and the
+    conversation stays flagged; ``load_history`` keeps the prompt bounded
+    until a later attempt summarises them.
+    """
+    to_fold = _messages_to_fold(conversation)
+    if not to_fold:
+        Conversation.objects.filter(pk=conversation.pk).update(needs_compaction=False)
+        return
+
+    timeout = settings.OPENAI_HISTORY_TIMEOUT if timeout is None else timeout
+    if timeout < _MIN_SUMMARY_SECONDS:
+        logger.info("No time left to summarise conversation %s; will retry on the next turn.", conversation.pk)
+        return
+
+    try:
+        summary = _summarize(client, conversation.summary, to_fold, timeout)
+    except (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError, LLMDeadlineExceeded):
+        logger.warning("Failed to summarise conversation %s; will retry on the next turn.", conversation.pk, exc_info=True)
+        return
+
+    with transaction.atomic():
+        ConversationMessage.objects.filter(pk__in=[message.pk for message in to_fold]).update(is_summarized=True)
+        conversation.summary = summary
+        conversation.needs_compaction = False
+        conversation.save(update_fields=['summary', 'needs_compaction', 'updated_at'])
+
+
+def compact_pending_conversations(client: OpenAI, limit: int) -> int:
+    """Compact up to ``limit`` conversations flagged by ``record_turn``; returns how many were tried."""
+    conversations = list(Conversation.objects.filter(needs_compaction=True).order_by('updated_at')[:limit])
+    for conversation in conversations:
+        compact_history(client, conversation)
+    return len(conversations)
+
+
+def record_turn(conversation: Conversation, question: str, answer: str) -> ConversationMessage:
+    """Store a question and its answer; returns the answer message.
+
+    Summarising is an LLM call, so it is left to the sync worker: the
+    conversation is only flagged once its verbatim turns exceed the budget.
+    """
+    _question_message, answer_message = ConversationMessage.objects.bulk_create([
+        ConversationMessage(conversation=conversation, role=ConversationMessage.Role.USER, content=question),
+        ConversationMessage(conversation=conversation, role=ConversationMessage.Role.ASSISTANT, content=answer),
+    ])
+    if _messages_to_fold(conversation):
+        Conversation.objects.filter(pk=conversation.pk).update(needs_compaction=True)
+    return answer_message
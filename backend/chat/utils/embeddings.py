@@ -10,10 +10,15 @@ from django.db.models import ExpressionWrapper, F, FloatField, Value
 from django.db import connection
 from pgvector.django import CosineDistance
 from math import sqrt
+import re
+from chat.utils.llm import attempt_timeout
+from chat.utils.timing import collect_timings, current_timings, record_metric, stage
 
 
 _shared_openai_client = None
 
+_CHUNK_SUFFIX_RE = re.compile(r"_part_\d+$")
+
 
 def get_openai_client() -> OpenAI:
     """Return a shared OpenAI client instance configured from settings."""
@@ -23,14 +28,22 @@ def get_openai_client() -> OpenAI:
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY is not set in environment or settings.py")
 
-        _shared_openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        _shared_openai_client = OpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            timeout=settings.OPENAI_COMPLETION_TIMEOUT,
+        )
 
     return _shared_openai_client
 
-def embed_text(text: str) -> list:
+def embed_text(text: str, timeout: float | None = None) -> list:
     """
     Generate a vector embedding for a given text using OpenAI.
     Returns a list of floats (embedding vector).
+
+    ``timeout`` (default ``OPENAI_EMBEDDING_TIMEOUT``) bounds the call
+    including the client's retries.
     """
     client = get_openai_client()
 
@@ -38,6 +51,7 @@ def embed_text(text: str) -> list:
         response = client.embeddings.create(
             model="text-embedding-3-small",
             input=text,
+            timeout=attempt_timeout(settings.OPENAI_EMBEDDING_TIMEOUT if timeout is None else timeout),
         )
     except RateLimitError as exc:
         raise RuntimeError("OpenAI rate limit exceeded while generating embeddings") from exc
@@ -57,6 +71,10 @@ def chunk_text(text, max_tokens=1000):
         start = end
     return chunks
 
+def base_source_id(source_id: str) -> str:
+    """Strip the ``_part_<n>`` suffix ``save_document`` adds to chunked documents."""
+    return _CHUNK_SUFFIX_RE.sub("", source_id)
+
 def save_document(company, chatbot, source, source_id, content):
     """
     Save a document with its embedding to the database.
@@ -77,13 +95,26 @@ def save_document(company, chatbot, source, source_id, content):
         docs.append(doc)
     return docs
 
-def search_documents(company_id, chatbot_id, query, top_k=5):
+def search_documents(company_id, chatbot_id, query, top_k=5, query_embedding=None, embedding_timeout=None):
     """
     Semantic search: find the most relevant documents to a query.
-    Uses cosine similarity with pgvector.
+    Uses cosine similarity with pgvector. Pass ``query_embedding`` when the
+    caller already embedded the query to avoid a second embedding call, or
+    ``embedding_timeout`` to bound the embedding call.
+
+    Stage timings are logged per call; when called inside an existing
+    ``collect_timings`` block (e.g. ``generate_answer``) they are folded into
+    that request's record instead.
     """
+    with collect_timings("search_documents", company_id=company_id, chatbot_id=chatbot_id):
+        return _search_documents(company_id, chatbot_id, query, top_k, query_embedding, embedding_timeout)
+
+
+def _search_documents(company_id, chatbot_id, query, top_k, query_embedding=None, embedding_timeout=None):
     # 1. Embed the query text
-    query_embedding = embed_text(query)
+    if query_embedding is None:
+        with stage("embed"):
+            query_embedding = embed_text(query, timeout=embedding_timeout)
 
     # 2. Run similarity search using pgvector helpers
     base_queryset = Document.objects.filter(company_id=company_id, chatbot_id=chatbot_id)
@@ -97,13 +128,16 @@ def search_documents(company_id, chatbot_id, query, top_k=5):
                 return 0.0
             return dot / (norm1 * norm2)
 
-        scored_docs = [
-            (doc, cosine_similarity(doc.embedding, query_embedding))
-            for doc in base_queryset
-        ]
-        scored_docs.sort(key=lambda item: item[1], reverse=True)
+        with stage("vector_search"):
+            scored_docs = [
+                (doc, cosine_similarity(doc.embedding, query_embedding))
+                for doc in base_queryset
+            ]
+            scored_docs.sort(key=lambda item: item[1], reverse=True)
         rows = [doc for doc, _ in scored_docs[:top_k]]
         scores = {doc.id: score for doc, score in scored_docs}
+        record_metric("candidates_scanned", len(scored_docs))
+        record_metric("results_returned", len(rows))
 
         return [
             {
@@ -128,7 +162,15 @@ def search_documents(company_id, chatbot_id, query, top_k=5):
         .order_by("distance")
     )
 
-    rows = queryset[:top_k]
+    with stage("vector_search"):
+        rows = list(queryset[:top_k])
+    record_metric("results_returned", len(rows))
+
+    timings = current_timings()
+    if timings is not None and timings.detailed:
+        # Without an ANN index pgvector scores every row of the chatbot.
+        with stage("candidate_count"):
+            record_metric("candidates_scanned", base_queryset.count())
 
     return [
         {
@@ -0,0 +1,179 @@
+import logging
+import re
+import threading
+from collections import Counter, defaultdict
+from time import monotonic
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Min
+
+from chat.models import ChatBotInstance, ChatFeedback, Conversation, ConversationMessage, FAQAnswer
+from chat.utils.embeddings import embed_text
+
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# chatbot id -> (loaded_at, entries, unit-normalised embedding matrix)
+_faq_cache: Dict[int, tuple] = {}
+_faq_cache_lock = threading.Lock()
+
+
+def normalize_question(question: str) -> str:
+    normalized = _WHITESPACE_RE.sub(" ", (question or "").strip().lower())
+    return normalized.rstrip("?!. ")[:500]
+
+
+def _opening_turns(conversation_ids) -> Dict[int, tuple]:
+    """Return ``conversation id -> (first question, first answer message id)``."""
+    first_ids: Dict[tuple, int] = {
+        (row['conversation_id'], row['role']): row['first_id']
+        for row in ConversationMessage.objects.filter(conversation_id__in=conversation_ids)
+        .values('conversation_id', 'role')
+        .annotate(first_id=Min('id'))
+    }
+    question_ids = [
+        message_id for (_conversation_id, role), message_id in first_ids.items()
+        if role == ConversationMessage.Role.USER
+    ]
+    questions = dict(ConversationMessage.objects.filter(pk__in=question_ids).values_list('id', 'content'))
+
+    turns = {}
+    for conversation_id in conversation_ids:
+        question_id = first_ids.get((conversation_id, ConversationMessage.Role.USER))
+        answer_id = first_ids.get((conversation_id, ConversationMessage.Role.ASSISTANT))
+        if question_id is not None and answer_id is not None:
+            turns[conversation_id] = (questions[question_id], answer_id)
+    return turns
+
+
+def promote_feedback(chatbot: ChatBotInstance, top_n: Optional[int] = None) -> int:
+    """Build the vetted answer store from helpful ratings of recorded answers.
+
+    Only feedback on an answer the server recorded itself counts, and only
+    for the opening turn of a conversation, since only opening questions are
+    answered from the store; the free text a client posts is never served.
+    Questions are grouped by their normalised text. A question qualifies once
+    at least ``FAQ_MIN_RATERS`` distinct users rated it helpful and they
+    outnumber those who rated it unhelpful; qualifying questions are ranked
+    by how many conversations opened with them and the most recent helpful
+    answer is used. Entries that no longer qualify are removed. Returns the
+    number of stored answers.
+    """
+    top_n = top_n or settings.FAQ_PREWARM_TOP_N
+
+    feedback = list(
+        ChatFeedback.objects.filter(chatBot=chatbot, message__isnull=False, user__isnull=False)
+        .order_by('created_at', 'id')
+        .values_list('user_id', 'is_helpful', 'message_id', 'message__conversation_id', 'message__content')
+    )
+    turns = _opening_turns(list(Conversation.objects.filter(chatBot=chatbot).values_list('id', flat=True)))
+    asked = Counter(normalize_question(question) for question, _answer_id in turns.values())
+
+    helpful: Dict[str, Set[int]] = defaultdict(set)
+    unhelpful: Dict[str, Set[int]] = defaultdict(set)
+    latest: Dict[str, tuple] = {}
+    for user_id, is_helpful, message_id, conversation_id, answer in feedback:
+        question, opening_answer_id = turns.get(conversation_id, ("", None))
+        if message_id != opening_answer_id:
+            continue
+        key = normalize_question(question)
+        if not key:
+            continue
+        if is_helpful:
+            helpful[key].add(user_id)
+            latest[key] = (question, answer)
+        else:
+            unhelpful[key].add(user_id)
+
+    ranked = sorted(
+        (
+            key for key in helpful
+            if len(helpful[key]) >= settings.FAQ_MIN_RATERS and len(helpful[key]) > len(unhelpful[key])
+        ),
+        key=lambda key: (asked[key], len(helpful[key])),
+        reverse=True,
+    )[:top_n]
+
+    existing = {faq.normalized_question: faq for faq in FAQAnswer.objects.filter(chatBot=chatbot)}
+    # Embed new questions before opening the transaction so it is not held
+    # open across OpenAI round-trips.
+    new_embeddings = {key: embed_text(latest[key][0]) for key in ranked if key not in existing}
+    with transaction.atomic():
+        for key in ranked:
+            question, answer = latest[key]
+            faq = existing.get(key)
+            if faq is None:
+                faq = FAQAnswer(chatBot=chatbot, normalized_question=key, embedding=new_embeddings[key])
+            faq.question = question
+            faq.answer = answer
+            faq.helpful_count = len(helpful[key])
+            faq.save()
+
+        stale = set(existing) - set(ranked)
+        if stale:
+            FAQAnswer.objects.filter(chatBot=chatbot, normalized_question__in=stale).delete()
+
+    invalidate_cache(chatbot.id)
+    return len(ranked)
+
+
+def invalidate_cache(chatbot_id: Optional[int] = None) -> None:
+    with _faq_cache_lock:
+        if chatbot_id is None:
+            _faq_cache.clear()
+        else:
+            _faq_cache.pop(chatbot_id, None)
+
+
+def _load_entries(chatbot_id: int):
+    with _faq_cache_lock:
+        cached = _faq_cache.get(chatbot_id)
+        if cached and monotonic() - cached[0] < settings.FAQ_CACHE_TTL:
+            return cached[1], cached[2]
+
+    entries: List[dict] = []
+    vectors = []
+    for faq in FAQAnswer.objects.filter(chatBot_id=chatbot_id).only('id', 'question', 'answer', 'embedding'):
+        entries.append({"id": faq.id, "question": faq.question, "answer": faq.answer})
+        vectors.append(np.asarray(faq.embedding, dtype=np.float32))
+
+    matrix = None
+    if vectors:
+        matrix = np.vstack(vectors)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = matrix / norms
+
+    with _faq_cache_lock:
+        _faq_cache[chatbot_id] = (monotonic(), entries, matrix)
+    return entries, matrix
+
+
+def match_faq(chatbot_id: int, query_embedding) -> Optional[dict]:
+    """Return the vetted answer closest to ``query_embedding`` if it clears the threshold.
+
+    Entries are kept in process memory and reloaded every ``FAQ_CACHE_TTL``
+    seconds, so a hit costs no retrieval and no LLM call.
+    """
+    entries, matrix = _load_entries(chatbot_id)
+    if matrix is None:
+        return None
+
+    query = np.asarray(query_embedding, dtype=np.float32)
+    norm = np.linalg.norm(query)
+    if not norm:
+        return None
+    scores = matrix @ (query / norm)
+    best = int(np.argmax(scores))
+    similarity = float(scores[best])
+    if similarity < settings.FAQ_MATCH_THRESHOLD:
+        return None
+
+    entry = entries[best]
+    FAQAnswer.objects.filter(pk=entry["id"]).update(hit_count=F('hit_count') + 1)
+    return {**entry, "similarity": similarity}
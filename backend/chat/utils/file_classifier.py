@@ -0,0 +1,184 @@
+import math
+import re
+from collections import Counter
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+
+# Paths that are almost never worth embedding: dependency trees, build
+# output, lockfiles, minified bundles, source maps and test snapshots.
+DEFAULT_EXCLUDE_GLOBS = [
+    "node_modules/",
+    "bower_components/",
+    "vendor/",
+    "third_party/",
+    # Anchored at the root: a nested directory named "build" or "dist" (for
+    # example src/build/ holding build tooling) is often real source.
+    "/dist/",
+    "/build/",
+    "coverage/",
+    "__snapshots__/",
+    "*.min.js",
+    "*.min.css",
+    "*-min.js",
+    "*.bundle.js",
+    "*.chunk.js",
+    "*.map",
+    "*.snap",
+    "*.lock",
+    "package-lock.json",
+    "npm-shrinkwrap.json",
+    "pnpm-lock.yaml",
+    "composer.lock",
+    "go.sum",
+    "*.pb.go",
+    "*_pb2.py",
+]
+
+# Content heuristics, applied to the first _SAMPLE_CHARS characters.
+_SAMPLE_CHARS = 8192
+_MAX_AVERAGE_LINE_LENGTH = 500
+_MAX_LINE_LENGTH = 3000
+# Prose and code sit around 4-5 bits per character; base64 and other
+# encoded payloads approach 6. Only ASCII characters are measured: encoded
+# payloads are ASCII, while CJK and other large scripts exceed 6 bits as
+# ordinary prose.
+_MAX_ENTROPY_BITS = 5.5
+_MIN_ENTROPY_CHARS = 1000
+_GENERATED_MARKER_RE = re.compile(
+    r"@generated|DO NOT EDIT|Code generated .* DO NOT EDIT|auto-?generated by",
+    re.IGNORECASE,
+)
+_MARKER_LINES = 5
+
+_LINGUIST_ATTRS = ("linguist-generated", "linguist-vendored")
+
+
+def glob_to_regex(pattern: str) -> str:
+    """Translate a gitignore-style glob into a regex matched against a full path.
+
+    ``*`` and ``?`` do not cross ``/``, ``**`` does, a pattern without a
+    slash matches a basename at any depth, and a trailing slash matches
+    everything below a directory of that name. Other patterns are relative
+    to the repository root.
+    """
+    pattern = pattern.strip()
+    # Only a pattern whose sole slash is a trailing one floats to any depth.
+    floating = "/" not in pattern.rstrip("/")
+    pattern = pattern.lstrip("/")
+    if pattern.endswith("/"):
+        pattern += "**"
+    if floating:
+        pattern = "**/" + pattern
+
+    parts = []
+    idx = 0
+    while idx < len(pattern):
+        if pattern.startswith("**/", idx):
+            parts.append("(?:.*/)?")
+            idx += 3
+        elif pattern.startswith("**", idx):
+            parts.append(".*")
+            idx += 2
+        elif pattern[idx] == "*":
+            parts.append("[^/]*")
+            idx += 1
+        elif pattern[idx] == "?":
+            parts.append("[^/]")
+            idx += 1
+        else:
+            parts.append(re.escape(pattern[idx]))
+            idx += 1
+    return "".join(parts)
+
+
+def compile_globs(patterns: Iterable[str]) -> Optional[Pattern]:
+    regexes = [glob_to_regex(p) for p in patterns if p.strip() and not p.strip().startswith("#")]
+    if not regexes:
+        return None
+    return re.compile("|".join(f"(?:{regex})" for regex in regexes) + r"\Z")
+
+
+def parse_exclude_globs(value: str) -> List[str]:
+    """Split a sync's ``exclude_globs`` (one pattern per line or comma) into patterns."""
+    return [p.strip() for p in re.split(r"[\n,]", value or "") if p.strip()]
+
+
+def parse_gitattributes(text: str) -> List[Tuple[Pattern, bool]]:
+    """Return ``(pattern, excluded)`` rules for the linguist attributes in ``text``.
+
+    Later rules override earlier ones, as in git; ``-linguist-generated`` and
+    ``linguist-generated=false`` re-include paths.
+    """
+    rules = []
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        pattern, *attrs = line.split()
+        for attr in attrs:
+            name, _, value = attr.lstrip("-!").partition("=")
+            if name not in _LINGUIST_ATTRS:
+                continue
+            excluded = not attr.startswith(("-", "!")) and value.lower() not in ("false", "0")
+            rules.append((re.compile(glob_to_regex(pattern) + r"\Z"), excluded))
+    return rules
+
+
+def shannon_entropy(text: str) -> float:
+    if not text:
+        return 0.0
+    total = len(text)
+    return -sum(count / total * math.log2(count / total) for count in Counter(text).values())
+
+
+def looks_generated(text: str) -> Optional[str]:
+    """Return why ``text`` looks machine-written (minified, encoded, generated), or ``None``."""
+    sample = text[:_SAMPLE_CHARS]
+    lines = sample.splitlines() or [""]
+    for line in lines[:_MARKER_LINES]:
+        if _GENERATED_MARKER_RE.search(line):
+            return "generated"
+    if len(text) > 1000 and len(text) / (text.count("\n") + 1) > _MAX_AVERAGE_LINE_LENGTH:
+        return "minified"
+    if max(len(line) for line in lines) > _MAX_LINE_LENGTH:
+        return "minified"
+    ascii_sample = "".join(ch for ch in sample if ch.isascii())
+    if len(ascii_sample) > _MIN_ENTROPY_CHARS and shannon_entropy(ascii_sample) > _MAX_ENTROPY_BITS:
+        return "high-entropy"
+    return None
+
+
+class FileClassifier:
+    """Decide which repository files are worth embedding.
+
+    Paths are checked against ``DEFAULT_EXCLUDE_GLOBS``, the sync's own
+    ``exclude_globs`` and the repository's root ``.gitattributes``
+    (``linguist-generated`` / ``linguist-vendored``) before any blob is
+    downloaded; ``accepts_content`` then rejects minified, encoded or
+    generated text. Skips are counted by reason for the sync log.
+    """
+
+    def __init__(self, exclude_globs: Iterable[str] = (), gitattributes: str = ""):
+        self._globs = compile_globs([*DEFAULT_EXCLUDE_GLOBS, *exclude_globs])
+        self._attributes = parse_gitattributes(gitattributes)
+        self.skipped: Counter = Counter()
+
+    def accepts_path(self, path: str) -> bool:
+        if self._globs is not None and self._globs.match(path):
+            self.skipped["excluded"] += 1
+            return False
+        excluded = False
+        for pattern, rule_excludes in self._attributes:
+            if pattern.match(path):
+                excluded = rule_excludes
+        if excluded:
+            self.skipped["gitattributes"] += 1
+            return False
+        return True
+
+    def accepts_content(self, text: str) -> bool:
+        reason = looks_generated(text)
+        if reason:
+            self.skipped[reason] += 1
+            return False
+        return True
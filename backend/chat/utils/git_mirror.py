@@ -0,0 +1,213 @@
+import base64
+import logging
+import os
+import shutil
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+# ``git diff --raw`` status letters, in the compare API's vocabulary.
+_DIFF_STATUSES = {
+    "A": "added",
+    "C": "added",
+    "D": "removed",
+    "M": "modified",
+    "R": "renamed",
+    "T": "changed",
+}
+
+
+class GitMirrorError(Exception):
+    pass
+
+
+def mirror_path(sync_id) -> Path:
+    return Path(settings.GIT_MIRROR_ROOT) / f"{sync_id}.git"
+
+
+def delete_mirror(sync_id) -> None:
+    """Remove the bare clone kept for sync ``sync_id``, if there is one."""
+    path = mirror_path(sync_id)
+    if path.exists():
+        logger.info("Deleting git mirror %s", path)
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class GitMirror:
+    """An on-disk bare mirror of one branch, read with the git CLI.
+
+    The mirror lives at ``GIT_MIRROR_ROOT/<sync id>.git`` and is updated with
+    an incremental ``git fetch``; changed paths, blob contents and last-commit
+    dates are then computed locally instead of through the GitHub API. The
+    token is passed to git through the environment for each fetch and never
+    written to the mirror's config.
+    """
+
+    def __init__(self, sync, token: str):
+        self.sync = sync
+        self.token = token
+        self.path = mirror_path(sync.pk)
+        self.remote_url = settings.GIT_MIRROR_REMOTE_TEMPLATE.format(full_name=sync.repo_full_name)
+        self.ref = f"refs/heads/{sync.branch}"
+
+    def _env(self) -> Dict[str, str]:
+        env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+        if self.token and self.remote_url.startswith("https://"):
+            credentials = base64.b64encode(f"x-access-token:{self.token}".encode()).decode()
+            env.update({
+                "GIT_CONFIG_COUNT": "1",
+                "GIT_CONFIG_KEY_0": "http.extraHeader",
+                "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credentials}",
+            })
+        return env
+
+    def _run(self, *args: str) -> subprocess.CompletedProcess:
+        try:
+            return subprocess.run(
+                ["git", "--git-dir", str(self.path), *args],
+                capture_output=True,
+                env=self._env(),
+                timeout=settings.GIT_MIRROR_TIMEOUT,
+            )
+        except subprocess.TimeoutExpired:
+            raise GitMirrorError(
+                f"git {args[0]} timed out after {settings.GIT_MIRROR_TIMEOUT}s for {self.sync.repo_full_name}"
+            )
+
+    def _git(self, *args: str) -> bytes:
+        result = self._run(*args)
+        if result.returncode != 0:
+            message = result.stderr.decode("utf-8", errors="replace").strip()
+            raise GitMirrorError(f"git {args[0]} failed for {self.sync.repo_full_name}: {message}")
+        return result.stdout
+
+    def update(self) -> str:
+        """Create the mirror if needed, fetch the branch and return its head sha."""
+        if not self.path.exists():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._git("init", "--bare", "--quiet")
+        self._git("fetch", "--quiet", "--no-tags", "--prune", self.remote_url, f"+{self.ref}:{self.ref}")
+        return self._git("rev-parse", f"{self.ref}^{{commit}}").decode().strip()
+
+    def read_file(self, commit_sha: str, path: str) -> Optional[bytes]:
+        """Return the content of ``path`` at ``commit_sha``, or ``None`` if it does not exist."""
+        result = self._run("cat-file", "blob", f"{commit_sha}:{path}")
+        return result.stdout if result.returncode == 0 else None
+
+    def diff(self, base_sha: str, head_sha: str) -> Optional[List[dict]]:
+        """Return the files changed from ``base_sha`` to ``head_sha`` in the compare API's shape.
+
+        Returns ``None`` when ``base_sha`` is no longer in the mirror.
+        """
+        if self._run("cat-file", "-e", f"{base_sha}^{{commit}}").returncode != 0:
+            return None
+
+        fields = iter(self._git("diff", "--raw", "-z", "-M", "--no-abbrev", base_sha, head_sha).split(b"\0"))
+        changes = []
+        for header in fields:
+            if not header:
+                continue
+            _, _, _, new_sha, status = header.decode().lstrip(":").split(" ")
+            path = next(fields).decode("utf-8", errors="surrogateescape")
+            change = {"status": _DIFF_STATUSES.get(status[0], "modified"), "filename": path, "sha": new_sha}
+            if status[0] in "RC":
+                change["previous_filename"] = path
+                change["filename"] = next(fields).decode("utf-8", errors="surrogateescape")
+                if status[0] == "C":
+                    del change["previous_filename"]
+            changes.append(change)
+        return changes
+
+    def list_tree(self, head_sha: str) -> Iterator[Tuple[str, str, int]]:
+        """Yield ``(path, sha, size)`` for each blob at ``head_sha``."""
+        for entry in self._git("ls-tree", "-r", "-z", "--long", head_sha).split(b"\0"):
+            if not entry:
+                continue
+            meta, path = entry.split(b"\t", 1)
+            mode, kind, sha, size = meta.decode().split()
+            # Skip submodules and symlinks (mode 120000), which have no text of their own.
+            if kind != "blob" or mode == "120000":
+                continue
+            yield path.decode("utf-8", errors="surrogateescape"), sha, int(size)
+
+    def read_blobs(self, shas: Iterable[str]) -> Iterator[bytes]:
+        """Yield the content of each blob in ``shas``, in order, from one ``cat-file --batch``."""
+        process = subprocess.Popen(
+            ["git", "--git-dir", str(self.path), "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=self._env(),
+        )
+        try:
+            for sha in shas:
+                process.stdin.write(f"{sha}\n".encode())
+                process.stdin.flush()
+                header = process.stdout.readline().split()
+                if len(header) != 3:
+                    raise GitMirrorError(f"Blob {sha} is missing from the mirror of {self.sync.repo_full_name}")
+                data = process.stdout.read(int(header[2]))
+                process.stdout.read(1)  # trailing newline
+                yield data
+        finally:
+            process.stdin.close()
+            process.stdout.close()
+            process.wait()
+
+    def last_commit_dates(self, head_sha: str, paths: List[str]) -> Dict[str, datetime]:
+        """Return the date of the last commit touching each of ``paths``.
+
+        History is walked once from ``head_sha``, limited to commits touching
+        ``paths`` (read from stdin, so any number fits) and to at most
+        ``GIT_MIRROR_LOG_MAX_COMMITS`` of them, and stops as soon as every path
+        has been seen; paths never seen fall back to the head commit date.
+        """
+        wanted = set(paths)
+        dates: Dict[str, datetime] = {}
+        if not wanted:
+            return dates
+
+        process = subprocess.Popen(
+            [
+                "git", "--git-dir", str(self.path), "--literal-pathspecs", "-c", "core.quotePath=false",
+                "log", "--format=%x00%ct", "--name-only", "--no-renames",
+                f"--max-count={settings.GIT_MIRROR_LOG_MAX_COMMITS}", "--stdin", head_sha,
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=self._env(),
+        )
+        committed = None
+        try:
+            # git reads all of stdin before it starts walking history.
+            process.stdin.write(b"--\n")
+            for path in wanted:
+                process.stdin.write(path.encode("utf-8", errors="surrogateescape") + b"\n")
+            process.stdin.close()
+            for line in process.stdout:
+                line = line.rstrip(b"\n")
+                if line.startswith(b"\0"):
+                    committed = datetime.fromtimestamp(int(line[1:]), tz=timezone.utc)
+                    continue
+                path = line.decode("utf-8", errors="surrogateescape")
+                if path in wanted:
+                    wanted.discard(path)
+                    dates[path] = committed
+                    if not wanted:
+                        break
+        finally:
+            process.stdout.close()
+            process.kill()
+            process.wait()
+
+        if wanted:
+            head_date = self._git("log", "-1", "--format=%ct", head_sha).strip()
+            fallback = datetime.fromtimestamp(int(head_date), tz=timezone.utc)
+        else:
+            fallback = None
+        return {path: dates.get(path, fallback) for path in paths}
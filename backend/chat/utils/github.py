@@ -1,16 +1,31 @@
 import base64
+import hashlib
+import json
 import logging
-from typing import Iterable, List, Tuple
+import re
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from datetime import datetime, timezone
 from urllib.parse import quote
+from django.conf import settings
+from django.db.models import Q
 from chat.encryption import decrypt_api_key
-from chat.models import GitRepoSync, GitRepoFile
+from chat.models import Document, GitRepoSync, GitRepoFile
+from chat.utils.file_classifier import FileClassifier, parse_exclude_globs
+from chat.utils.git_mirror import GitMirror
+from chat.utils.http_cache import cached_get
+from chat.utils.sweep import delete_in_batches, sweep_documents, sweep_rows
+from chat.utils.upsert import bulk_upsert
 
 GITHUB_API = "https://api.github.com"
+GITHUB_GRAPHQL_API = f"{GITHUB_API}/graphql"
 
 # Simple allow-list of textual file extensions for MVP (tweak as needed)
 TEXT_EXTS = {'.md', '.mdx', '.txt', '.py', '.js', '.ts', '.tsx', '.jsx', '.json', '.yml', '.yaml', '.toml', '.ini', '.css', '.scss', '.html', '.c', '.cc', '.cpp', '.h', '.go', '.rs'}
@@ -22,16 +37,31 @@ logger = logging.getLogger(__name__)
 
 _REQUEST_TIMEOUT = (5, 30)
 
+# The compare API lists at most this many files; a longer diff is re-read
+# from the tree instead.
+_COMPARE_MAX_FILES = 300
+
+
+# How many times a request that hit a rate limit is retried after waiting.
+_RATE_LIMIT_RETRIES = 3
+# GitHub asks clients to wait at least a minute after a secondary rate limit
+# that carries no Retry-After header.
+_SECONDARY_LIMIT_WAIT = 60
+
 
 def _build_session() -> requests.Session:
     session = requests.Session()
+    # 429s are left to _gh_get, which waits for the window GitHub reports
+    # instead of retrying blindly.
     retry = Retry(
         total=3,
         backoff_factor=0.5,
-        status_forcelist=(429, 500, 502, 503, 504),
+        status_forcelist=(500, 502, 503, 504),
         allowed_methods=("GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS", "HEAD"),
+        respect_retry_after_header=True,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    pool_size = max(settings.GITHUB_BLOB_WORKERS, 1)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
     return session
@@ -39,11 +69,109 @@ def _build_session() -> requests.Session:
 
 _SESSION = _build_session()
 
+
+class RateLimit:
+    """Track GitHub's REST rate-limit budget for one token and pace requests to it.
+
+    Every response updates the budget from ``X-RateLimit-Remaining`` and
+    ``X-RateLimit-Reset``. Once fewer than ``GITHUB_RATE_LIMIT_RESERVE``
+    requests remain, requests are spread evenly over the rest of the window;
+    with none left, callers sleep until the window resets.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.time()
+            if self.remaining is None or self.reset_at is None or now >= self.reset_at:
+                return
+            if self.remaining <= 0:
+                delay = self.reset_at - now + 1
+            elif self.remaining < settings.GITHUB_RATE_LIMIT_RESERVE:
+                slot = max(now, self._next_slot)
+                self._next_slot = slot + (self.reset_at - now) / self.remaining
+                delay = slot - now
+            else:
+                delay = 0
+            # Count the request now so concurrent callers see the reduced budget.
+            self.remaining -= 1
+        if delay > 0:
+            logger.info("Pacing GitHub requests: sleeping %.1fs (%s requests left)", delay, self.remaining)
+            time.sleep(delay)
+
+    def update(self, response) -> Optional[float]:
+        """Record the budget from ``response``; return how long to wait if it was rate limited."""
+        headers = getattr(response, 'headers', None) or {}
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        with self._lock:
+            if remaining is not None and reset is not None:
+                self.remaining = int(remaining)
+                self.reset_at = float(reset)
+
+        if getattr(response, 'status_code', 200) not in (403, 429):
+            return None
+        retry_after = headers.get('Retry-After')
+        if retry_after is not None:
+            return float(retry_after)
+        if remaining is not None and int(remaining) == 0 and reset is not None:
+            return max(float(reset) - time.time(), 0) + 1
+        if getattr(response, 'status_code', None) == 429:
+            return _SECONDARY_LIMIT_WAIT
+        # A 403 without rate-limit headers is a permission error.
+        return None
+
+    def reset_time(self) -> Optional[datetime]:
+        if self.reset_at is None:
+            return None
+        return datetime.fromtimestamp(self.reset_at, tz=timezone.utc)
+
+
+_RATE_LIMITS: Dict[str, RateLimit] = {}
+_RATE_LIMITS_LOCK = threading.Lock()
+
+
+def rate_limit_for(token: str) -> RateLimit:
+    """Return the budget shared by every request made with ``token``."""
+    key = hashlib.sha256(token.encode()).hexdigest()
+    with _RATE_LIMITS_LOCK:
+        return _RATE_LIMITS.setdefault(key, RateLimit())
+
+
+def _gh_get(url: str, token: str, cache: bool = False, **kwargs):
+    """GET ``url`` within the token's rate limit.
+
+    With ``cache`` the request is revalidated against the stored ETag; GitHub
+    does not charge 304 responses against the rate limit. Only the branch ref
+    is cached: tree and compare URLs name a commit and are rarely repeated.
+    """
+    limit = rate_limit_for(token)
+    for attempt in range(_RATE_LIMIT_RETRIES + 1):
+        limit.wait()
+        if cache:
+            r = cached_get(_SESSION, url, credential=token, headers=_gh_headers(token), timeout=_REQUEST_TIMEOUT, **kwargs)
+        else:
+            r = _SESSION.get(url, headers=_gh_headers(token), timeout=_REQUEST_TIMEOUT, **kwargs)
+        delay = limit.update(r)
+        if delay is None or attempt == _RATE_LIMIT_RETRIES:
+            return r
+        logger.warning("GitHub rate limit hit for %s; retrying in %.0fs", url, delay)
+        r.close()
+        time.sleep(delay)
+    return r
+
+_TEXT_PATH_RE = re.compile(
+    "(?:" + "|".join(re.escape(ext) for ext in sorted(TEXT_EXTS)) + r")\Z",
+    re.IGNORECASE,
+)
+
 def _is_text_path(path: str) -> bool:
-    for ext in TEXT_EXTS:
-        if path.lower().endswith(ext):
-            return True
-    return False
+    return _TEXT_PATH_RE.search(path) is not None
 
 def _gh_headers(token: str):
     return {
@@ -52,22 +180,47 @@ def _gh_headers(token: str):
         "X-GitHub-Api-Version": "2022-11-28",
     }
 
-def _list_tree(full_name: str, branch: str, token: str):
-    # Get the SHA for the branch head
+def _get_head_sha(full_name: str, branch: str, token: str) -> str:
     ref_url = f"{GITHUB_API}/repos/{full_name}/git/refs/heads/{quote(branch)}"
-    r = _SESSION.get(ref_url, headers=_gh_headers(token), timeout=_REQUEST_TIMEOUT)
+    r = _gh_get(ref_url, token, cache=True)
     r.raise_for_status()
-    commit_sha = r.json()['object']['sha']
+    return r.json()['object']['sha']
 
+def _list_tree(full_name: str, commit_sha: str, token: str):
     # Get full recursive tree
     tree_url = f"{GITHUB_API}/repos/{full_name}/git/trees/{commit_sha}?recursive=1"
-    t = _SESSION.get(tree_url, headers=_gh_headers(token), timeout=_REQUEST_TIMEOUT)
+    t = _gh_get(tree_url, token)
     t.raise_for_status()
-    return t.json().get('tree', [])
+    payload = t.json()
+    if payload.get('truncated'):
+        logger.warning("GitHub tree for %s@%s was truncated", full_name, commit_sha)
+    return payload.get('tree', []), not payload.get('truncated', False)
+
+def _compare_commits(full_name: str, base_sha: str, head_sha: str, token: str) -> Optional[List[dict]]:
+    """Return the files changed between ``base_sha`` and ``head_sha``.
+
+    Returns ``None`` when the comparison cannot stand in for a tree listing:
+    the base commit is gone (force push, renamed repo), the histories
+    diverged, or GitHub capped the file list.
+    """
+    compare_url = f"{GITHUB_API}/repos/{full_name}/compare/{base_sha}...{head_sha}"
+    c = _gh_get(compare_url, token)
+    if c.status_code != 200:
+        logger.info("GitHub compare %s...%s for %s returned %s", base_sha, head_sha, full_name, c.status_code)
+        return None
+    payload = c.json()
+    files = payload.get('files') or []
+    if payload.get('status') not in ('ahead', 'identical') or len(files) >= _COMPARE_MAX_FILES:
+        logger.info(
+            "GitHub compare %s...%s for %s is %s with %s files; listing the full tree",
+            base_sha, head_sha, full_name, payload.get('status'), len(files),
+        )
+        return None
+    return files
 
 def _get_blob(full_name: str, sha: str, token: str) -> bytes:
     blob_url = f"{GITHUB_API}/repos/{full_name}/git/blobs/{sha}"
-    b = _SESSION.get(blob_url, headers=_gh_headers(token), timeout=_REQUEST_TIMEOUT)
+    b = _gh_get(blob_url, token)
     b.raise_for_status()
     data = b.json()
     if data.get('encoding') == 'base64':
@@ -75,81 +228,422 @@ def _get_blob(full_name: str, sha: str, token: str) -> bytes:
         return raw
     return b.content
 
-def _get_last_commit_date(full_name: str, path: str, token: str) -> datetime:
-    # fetch last commit touching this file (lightweight; can be rate-limited)
-    commits_url = f"{GITHUB_API}/repos/{full_name}/commits?path={quote(path)}&per_page=1"
-    c = _SESSION.get(commits_url, headers=_gh_headers(token), timeout=_REQUEST_TIMEOUT)
-    if c.status_code == 200 and isinstance(c.json(), list) and c.json():
-        iso = c.json()[0]['commit']['committer']['date']  # ISO string
-        return datetime.fromisoformat(iso.replace('Z', '+00:00'))
-    # fallback to now
-    return datetime.now(timezone.utc)
-
-def run_github_sync(sync: GitRepoSync) -> Tuple[int, int]:
+def fetch_blobs_concurrently(full_name: str, shas: List[str], token: str) -> Iterator[bytes]:
+    """Yield the content of each blob in ``shas``, in order.
+
+    Blobs are downloaded by up to ``GITHUB_BLOB_WORKERS`` threads that share
+    the token's ``RateLimit``, so the pool slows down as the budget runs low
+    and waits for the reset instead of failing.
+    """
+    workers = min(settings.GITHUB_BLOB_WORKERS, len(shas))
+    if workers <= 1:
+        for sha in shas:
+            yield _get_blob(full_name, sha, token)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="github-blobs")
+    try:
+        yield from executor.map(lambda sha: _get_blob(full_name, sha, token), shas)
+    finally:
+        # Do not keep fetching for an abandoned or failed sync.
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def git_blob_sha(data: bytes) -> str:
+    """Return the sha git (and the trees API) assigns to a blob with ``data``."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+def _iter_archive(
+    full_name: str,
+    commit_sha: str,
+    token: str,
+    include: Callable[[str], bool] = _is_text_path,
+) -> Iterator[Tuple[str, str, bytes]]:
+    """Yield ``(path, sha, data)`` for each included file in the tarball of ``commit_sha``.
+
+    The archive is read from the socket in stream mode, and members that are
+    not included or exceed ``MAX_FILE_BYTES`` are skipped without being read, so
+    neither the archive nor skipped files are held in memory.
+    """
+    archive_url = f"{GITHUB_API}/repos/{full_name}/tarball/{commit_sha}"
+    r = _gh_get(archive_url, token, stream=True)
+    try:
+        r.raise_for_status()
+        r.raw.decode_content = True
+        with tarfile.open(fileobj=r.raw, mode="r|gz") as archive:
+            for member in archive:
+                if not member.isfile() or member.size > MAX_FILE_BYTES:
+                    continue
+                # Members live under a "<owner>-<repo>-<sha>/" top-level directory.
+                _, _, path = member.name.partition("/")
+                if not path or not include(path):
+                    continue
+                data = archive.extractfile(member).read()
+                yield path, git_blob_sha(data), data
+    finally:
+        r.close()
+
+def _parse_github_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def _commit_dates_query(paths: List[str]) -> str:
+    # One aliased history(first: 1, path: ...) per file; json.dumps yields a
+    # valid GraphQL string literal for any path.
+    aliases = "".join(
+        f"        f{idx}: history(first: 1, path: {json.dumps(path)}) {{ nodes {{ committedDate }} }}\n"
+        for idx, path in enumerate(paths)
+    )
+    return (
+        "query($owner: String!, $name: String!, $oid: GitObjectID!) {\n"
+        "  repository(owner: $owner, name: $name) {\n"
+        "    object(oid: $oid) {\n"
+        "      ... on Commit {\n"
+        "        committedDate\n"
+        f"{aliases}"
+        "      }\n"
+        "    }\n"
+        "  }\n"
+        "}"
+    )
+
+def _get_last_commit_dates(full_name: str, commit_sha: str, paths: List[str], token: str) -> Dict[str, datetime]:
+    """Return the date of the last commit touching each of ``paths`` at ``commit_sha``.
+
+    Dates are fetched ``GITHUB_COMMIT_DATE_BATCH_SIZE`` paths per GraphQL
+    query instead of one REST request per file. Paths GitHub cannot resolve
+    (a failed batch, or history too deep to walk in time) fall back to the
+    date of ``commit_sha`` itself, or to now if even that is unknown.
+    """
+    owner, _, name = full_name.partition("/")
+    batch_size = settings.GITHUB_COMMIT_DATE_BATCH_SIZE
+    dates: Dict[str, datetime] = {}
+    head_date: Optional[datetime] = None
+    for start in range(0, len(paths), batch_size):
+        batch = paths[start:start + batch_size]
+        try:
+            r = _SESSION.post(
+                GITHUB_GRAPHQL_API,
+                json={
+                    "query": _commit_dates_query(batch),
+                    "variables": {"owner": owner, "name": name, "oid": commit_sha},
+                },
+                headers=_gh_headers(token),
+                timeout=_REQUEST_TIMEOUT,
+            )
+            r.raise_for_status()
+            payload = r.json()
+        except (requests.RequestException, ValueError) as exc:
+            logger.warning("Commit date lookup for %s failed for %s paths: %s", full_name, len(batch), exc)
+            continue
+
+        if payload.get('errors'):
+            # Partial data is still returned for the aliases that resolved.
+            logger.warning("Commit date lookup for %s returned errors: %s", full_name, payload['errors'][:3])
+        commit = ((payload.get('data') or {}).get('repository') or {}).get('object') or {}
+        head_date = head_date or _parse_github_date(commit.get('committedDate'))
+        for idx, path in enumerate(batch):
+            nodes = (commit.get(f"f{idx}") or {}).get('nodes') or []
+            committed = _parse_github_date(nodes[0].get('committedDate')) if nodes else None
+            if committed:
+                dates[path] = committed
+
+    fallback = head_date or datetime.now(timezone.utc)
+    return {path: dates.get(path, fallback) for path in paths}
+
+def sweep_repo_files(sync: GitRepoSync, kept_paths: List[str]) -> int:
+    """Remove files no longer indexed from the repository, with their documents.
+
+    Files deleted upstream and files that stopped qualifying (no longer text
+    or now too large) are both removed.
+    """
+    if not kept_paths:
+        logger.warning("Skipping GitHub sweep for sync %s: no files were indexed", sync.pk)
+        return 0
+
+    deleted = sweep_rows(GitRepoFile.objects.filter(sync=sync), 'path', kept_paths)
+    live_ids = GitRepoFile.objects.filter(sync__chatBot_id=sync.chatBot_id).values_list('id', flat=True)
+    sweep_documents(sync.chatBot, "github", {str(pk) for pk in live_ids})
+    return deleted
+
+def remove_repo_files(sync: GitRepoSync, paths: Iterable[str]) -> int:
+    """Delete the files at ``paths`` and their documents."""
+    files = list(GitRepoFile.objects.filter(sync=sync, path__in=set(paths)).values_list('pk', flat=True))
+    if not files:
+        return 0
+
+    ids = [str(pk) for pk in files]
+    matches = Q(source_id__in=ids)
+    for source_id in ids:
+        matches |= Q(source_id__startswith=f"{source_id}_part_")
+    Document.objects.filter(chatbot=sync.chatBot, source="github").filter(matches).delete()
+    return delete_in_batches(GitRepoFile, files)
+
+def _html_url(sync: GitRepoSync, path: str) -> str:
+    return f"https://github.com/{sync.repo_full_name}/blob/{quote(sync.branch)}/{path}"
+
+def _build_repo_file(
+    sync: GitRepoSync,
+    token: str,
+    path: str,
+    sha: str,
+    blob: Optional[bytes] = None,
+    classifier: Optional[FileClassifier] = None,
+) -> Optional[GitRepoFile]:
+    full_name = sync.repo_full_name
+    if not _is_text_path(path):
+        return None
+
+    if blob is None:
+        blob = _get_blob(full_name, sha, token)
+    if not blob or len(blob) > MAX_FILE_BYTES:
+        return None
+
+    try:
+        text = blob.decode('utf-8', errors='replace')
+    except Exception:
+        return None
+    if classifier is not None and not classifier.accepts_content(text):
+        return None
+
+    return GitRepoFile(
+        sync=sync,
+        path=path,
+        sha=sha,
+        size=len(blob),
+        url=_html_url(sync, path),
+        content=text,
+    )
+
+def _get_gitattributes(sync: GitRepoSync, token: str, commit_sha: str, mirror: Optional[GitMirror] = None) -> str:
+    """Return the repository's root ``.gitattributes`` at ``commit_sha``, or ``""``."""
+    if mirror is not None:
+        data = mirror.read_file(commit_sha, ".gitattributes")
+    else:
+        contents_url = f"{GITHUB_API}/repos/{sync.repo_full_name}/contents/.gitattributes?ref={commit_sha}"
+        r = _gh_get(contents_url, token)
+        if r.status_code != 200:
+            return ""
+        payload = r.json()
+        data = base64.b64decode(payload['content']) if payload.get('encoding') == 'base64' else None
+    return data.decode('utf-8', errors='replace') if data else ""
+
+def _record_rate_limit(sync: GitRepoSync, token: str, mirror: Optional[GitMirror] = None) -> List[str]:
+    if mirror is not None:
+        # Mirror syncs make no API calls, so there is no new budget to record.
+        return []
+    limit = rate_limit_for(token)
+    sync.rate_limit_remaining = limit.remaining
+    sync.rate_limit_reset_at = limit.reset_time()
+    return ['rate_limit_remaining', 'rate_limit_reset_at']
+
+def run_github_sync(sync: GitRepoSync, full: bool = False) -> Tuple[int, int]:
     """
     Pull textual files from a repo branch and store/update GitRepoFile rows.
-    Returns count of files indexed.
+
+    When the branch head has not moved since ``last_synced_commit_sha`` the
+    sync is a no-op. Otherwise only files the compare API reports as added,
+    modified, renamed or removed are processed; the full recursive tree is
+    listed (and stale files swept) on the first sync, when ``full`` is set,
+    or when the comparison is unusable; in ``archive`` fetch mode that
+    listing is a single streamed tarball download instead of the tree plus
+    one blob request per file. In ``mirror`` fetch mode the branch is
+    fetched into a local bare clone and the head, changes, listing, blobs
+    and commit dates all come from git instead of the API. Files whose blob
+    sha matches the stored ``GitRepoFile.sha`` are never re-ingested, and
+    vendored, generated or minified files are skipped by ``FileClassifier``;
+    blobs rejected by content are remembered in ``rejected_blob_shas`` and
+    not fetched again while unchanged.
+    Returns count of files indexed and documents ingested.
     """
+    from django.utils import timezone
+
     # decrypt token
     token = decrypt_api_key(sync.credential._token)
     full_name = sync.repo_full_name
-    branch = sync.branch
+    mirror = GitMirror(sync, token) if sync.fetch_mode == 'mirror' else None
+    head_sha = mirror.update() if mirror else _get_head_sha(full_name, sync.branch, token)
 
-    tree = _list_tree(full_name, branch, token)
-    processed_files: List[GitRepoFile] = []
-    count = 0
-    for node in tree:
-        if node.get('type') != 'blob':
-            continue
-        path = node['path']
-        sha = node['sha']
+    if not full and head_sha == sync.last_synced_commit_sha:
+        logger.info("GitHub sync %s is up to date at %s", sync.pk, head_sha)
+        sync.last_sync_time = timezone.now()
+        sync.save(update_fields=['last_sync_time'] + _record_rate_limit(sync, token, mirror))
+        return 0, 0
 
-        if not _is_text_path(path):
-            continue
+    changes = None
+    if not full and sync.last_synced_commit_sha:
+        if mirror:
+            changes = mirror.diff(sync.last_synced_commit_sha, head_sha)
+        else:
+            changes = _compare_commits(full_name, sync.last_synced_commit_sha, head_sha, token)
+        if changes and any(change['filename'] == '.gitattributes' for change in changes):
+            # Attribute changes can re-classify files that did not change.
+            changes = None
 
-        blob = _get_blob(full_name, sha, token)
-        if not blob or len(blob) > MAX_FILE_BYTES:
-            continue
+    classifier = FileClassifier(
+        parse_exclude_globs(sync.exclude_globs),
+        _get_gitattributes(sync, token, head_sha, mirror),
+    )
 
-        try:
-            text = blob.decode('utf-8', errors='replace')
-        except Exception:
-            continue
+    def indexable(path: str) -> bool:
+        return _is_text_path(path) and classifier.accepts_path(path)
+
+    # Blob shas identify content, so files whose sha is unchanged are neither
+    # downloaded nor re-embedded.
+    stored_shas = dict(GitRepoFile.objects.filter(sync=sync).values_list('path', 'sha'))
+    # Likewise for blobs an earlier sync rejected by their content.
+    known_rejected: Dict[str, str] = sync.rejected_blob_shas or {}
+    rejected: Dict[str, str] = {}
+    processed_files: List[GitRepoFile] = []
+    unchanged_paths: List[str] = []
+    # (path, sha) of text files whose blob must be downloaded.
+    to_fetch: List[Tuple[str, str]] = []
+    removed = set()
+    if changes is None and sync.fetch_mode == 'archive':
+        complete = True
+        for path, sha, data in _iter_archive(full_name, head_sha, token, include=indexable):
+            if stored_shas.get(path) == sha:
+                unchanged_paths.append(path)
+                continue
+            if known_rejected.get(path) == sha:
+                rejected[path] = sha
+                continue
+            repo_file = _build_repo_file(sync, token, path, sha, blob=data, classifier=classifier)
+            if repo_file is None:
+                rejected[path] = sha
+            else:
+                processed_files.append(repo_file)
+    elif changes is None and mirror:
+        complete = True
+        for path, sha, size in mirror.list_tree(head_sha):
+            if size > MAX_FILE_BYTES or not indexable(path):
+                continue
+            if stored_shas.get(path) == sha:
+                unchanged_paths.append(path)
+            elif known_rejected.get(path) == sha:
+                rejected[path] = sha
+            else:
+                to_fetch.append((path, sha))
+    elif changes is None:
+        tree, complete = _list_tree(full_name, head_sha, token)
+        for node in tree:
+            if node.get('type') != 'blob' or not indexable(node['path']):
+                continue
+            if stored_shas.get(node['path']) == node['sha']:
+                unchanged_paths.append(node['path'])
+            elif known_rejected.get(node['path']) == node['sha']:
+                rejected[node['path']] = node['sha']
+            else:
+                to_fetch.append((node['path'], node['sha']))
+    else:
+        complete = True
+        for change in changes:
+            status = change.get('status')
+            path = change['filename']
+            sha = change.get('sha')
+            if status == 'removed':
+                removed.add(path)
+                continue
+            previous = change.get('previous_filename')
+            if status == 'renamed' and previous:
+                if sha and stored_shas.get(previous) == sha and path not in stored_shas and indexable(path):
+                    # A pure rename keeps its row, and with it its documents.
+                    GitRepoFile.objects.filter(sync=sync, path=previous).update(
+                        path=path, url=_html_url(sync, path),
+                    )
+                    unchanged_paths.append(path)
+                    continue
+                removed.add(previous)
+            if status == 'unchanged' or not sha or stored_shas.get(path) == sha or known_rejected.get(path) == sha:
+                continue
+            if indexable(path):
+                to_fetch.append((path, sha))
+            else:
+                removed.add(path)
+
+    shas = [sha for _, sha in to_fetch]
+    blobs = mirror.read_blobs(shas) if mirror else fetch_blobs_concurrently(full_name, shas, token)
+    for (path, sha), blob in zip(to_fetch, blobs):
+        repo_file = _build_repo_file(sync, token, path, sha, blob=blob, classifier=classifier)
+        if repo_file is None:
+            # The file stopped qualifying (empty, too large or generated now).
+            removed.add(path)
+            rejected[path] = sha
+        else:
+            processed_files.append(repo_file)
 
-        last_update = _get_last_commit_date(full_name, path, token)
-        html_url = f"https://github.com/{full_name}/blob/{quote(branch)}/{path}"
-
-        obj, _created = GitRepoFile.objects.update_or_create(
-            sync=sync, path=path,
-            defaults={
-                'sha': sha,
-                'size': len(blob),
-                'url': html_url,
-                'content': text,
-                'last_updated': last_update,
-            }
+    if changes is not None:
+        removed -= {f.path for f in processed_files}
+        if removed:
+            remove_repo_files(sync, removed)
+        logger.info(
+            "GitHub sync %s compared %s...%s: %s changed, %s removed",
+            sync.pk, sync.last_synced_commit_sha, head_sha, len(processed_files), len(removed),
         )
-        count += 1
-        processed_files.append(obj)
 
-    # bump last_sync_time
-    from django.utils import timezone
-    sync.last_sync_time = timezone.now()
-    sync.save(update_fields=['last_sync_time'])
+    if classifier.skipped:
+        logger.info("GitHub sync %s skipped files: %s", sync.pk, dict(classifier.skipped))
+
+    paths = [f.path for f in processed_files]
+    if mirror:
+        commit_dates = mirror.last_commit_dates(head_sha, paths)
+    else:
+        commit_dates = _get_last_commit_dates(full_name, head_sha, paths, token)
+    for repo_file in processed_files:
+        repo_file.last_updated = commit_dates[repo_file.path]
+
+    # A stored sha means "ingested at this blob", so rows keep their previous
+    # sha until ingest_github_files has saved the new documents; a file whose
+    # ingestion fails is then fetched and ingested again by the next sync.
+    new_shas = {f.path: f.sha for f in processed_files}
+    for repo_file in processed_files:
+        repo_file.sha = stored_shas.get(repo_file.path, '')
+    processed_files = bulk_upsert(
+        GitRepoFile,
+        processed_files,
+        unique_fields=['sync', 'path'],
+        update_fields=['sha', 'size', 'url', 'content', 'last_updated'],
+    )
+    for repo_file in processed_files:
+        repo_file.sha = new_shas[repo_file.path]
+    if changes is None and complete:
+        sweep_repo_files(sync, [f.path for f in processed_files] + unchanged_paths)
 
     documents_ingested = ingest_github_files(sync, files=processed_files)
+
+    # bump last_sync_time; a truncated tree leaves the head unrecorded so the
+    # next sync lists the tree again instead of trusting a partial index.
+    sync.last_sync_time = timezone.now()
+    update_fields = ['last_sync_time'] + _record_rate_limit(sync, token, mirror)
+    if complete:
+        sync.last_synced_commit_sha = head_sha
+        update_fields.append('last_synced_commit_sha')
+    if changes is None and complete:
+        # A complete listing saw every path, so rejections of files that
+        # since changed or disappeared are dropped.
+        sync.rejected_blob_shas = rejected
+    else:
+        stale = removed | set(paths)
+        sync.rejected_blob_shas = {
+            path: sha for path, sha in known_rejected.items() if path not in stale
+        }
+        sync.rejected_blob_shas.update(rejected)
+    update_fields.append('rejected_blob_shas')
+    sync.save(update_fields=update_fields)
+
     logger.info(
         "Synced %s GitHub files and ingested %s documents for sync %s",
-        count,
+        len(processed_files),
         documents_ingested,
         sync.pk,
     )
-    return count, documents_ingested
+    return len(processed_files), documents_ingested
 
 def ingest_github_files(sync: GitRepoSync, files: Iterable[GitRepoFile] | None = None) -> int:
     """
     Ingest files from a GitRepoSync into the document store with embeddings.
-    Returns count of files ingested.
+    Each file's ``sha`` is stored once its documents are saved.
+    Returns count of documents ingested.
     """
     from chat.utils.embeddings import save_document
 
@@ -163,5 +657,6 @@ def ingest_github_files(sync: GitRepoSync, files: Iterable[GitRepoFile] | None =
             source_id=f.id,
             content=f.content
         )
+        GitRepoFile.objects.filter(pk=f.pk).update(sha=f.sha)
         count += len(docs)
     return count
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import logging
+from datetime import timedelta
+from typing import Optional
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+
+from chat.models import HTTPCacheEntry
+
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse:
+    """A 304 answered from ``HTTPCacheEntry``, shaped like the 200 it revalidated."""
+
+    status_code = 200
+    from_cache = True
+
+    def __init__(self, entry: HTTPCacheEntry, not_modified):
+        self.content = bytes(entry.body)
+        self.headers = getattr(not_modified, 'headers', None) or {}
+        self.url = entry.url
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        return None
+
+    def close(self):
+        return None
+
+
+def _expiry_cutoff(ttl_days: Optional[int] = None):
+    return timezone.now() - timedelta(days=settings.HTTP_CACHE_TTL_DAYS if ttl_days is None else ttl_days)
+
+
+def cache_key(credential: str, url: str) -> str:
+    credential_hash = hashlib.sha256(credential.encode()).hexdigest()
+    return hashlib.sha256(f"{credential_hash}\n{url}".encode()).hexdigest()
+
+
+def cached_get(session: requests.Session, url: str, *, credential: str, params=None, headers=None, **kwargs):
+    """``session.get`` with conditional revalidation against the stored validators.
+
+    ``credential`` separates entries of different users of the same URL; only
+    its hash is stored. When the server answers ``304 Not Modified`` the
+    stored body is returned as a 200 ``CachedResponse``; a 200 carrying an
+    ``ETag`` or ``Last-Modified`` header replaces the stored entry.
+
+    Only use it for URLs that are requested again unchanged; URLs naming a
+    commit or a relative time window would each add an entry that is never
+    hit.
+    """
+    full_url = requests.Request('GET', url, params=params).prepare().url
+    key = cache_key(credential, full_url)
+    entry: Optional[HTTPCacheEntry] = HTTPCacheEntry.objects.filter(
+        cache_key=key, updated_at__gte=_expiry_cutoff(),
+    ).first()
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        if entry.etag:
+            request_headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            request_headers['If-Modified-Since'] = entry.last_modified
+
+    response = session.get(url, params=params, headers=request_headers, **kwargs)
+    status_code = getattr(response, 'status_code', None)
+    if status_code == 304 and entry is not None:
+        logger.debug("Not modified: %s", full_url)
+        HTTPCacheEntry.objects.filter(pk=entry.pk).update(updated_at=timezone.now())
+        return CachedResponse(entry, response)
+    if status_code != 200:
+        return response
+
+    response_headers = getattr(response, 'headers', None) or {}
+    etag = response_headers.get('ETag') or ''
+    last_modified = response_headers.get('Last-Modified') or ''
+    body = getattr(response, 'content', None)
+    if not (etag or last_modified) or len(etag) > 500 or len(last_modified) > 100:
+        return response
+    if not isinstance(body, bytes) or len(body) > settings.HTTP_CACHE_MAX_BODY_BYTES:
+        return response
+
+    HTTPCacheEntry.objects.update_or_create(
+        cache_key=key,
+        defaults={'url': full_url, 'etag': etag, 'last_modified': last_modified, 'body': body},
+    )
+    return response
+
+
+def prune_http_cache(ttl_days: Optional[int] = None, max_entries: Optional[int] = None) -> int:
+    """Delete entries unused for ``ttl_days`` and the least recently used beyond ``max_entries``.
+
+    Defaults come from ``HTTP_CACHE_TTL_DAYS`` and ``HTTP_CACHE_MAX_ENTRIES``.
+    Returns the number of entries deleted.
+    """
+    max_entries = settings.HTTP_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+    deleted, _ = HTTPCacheEntry.objects.filter(updated_at__lt=_expiry_cutoff(ttl_days)).delete()
+    excess = list(
+        HTTPCacheEntry.objects.order_by('-updated_at', '-id').values_list('id', flat=True)[max_entries:]
+    )
+    if excess:
+        deleted += HTTPCacheEntry.objects.filter(pk__in=excess).delete()[0]
+    if deleted:
+        logger.info("Pruned %s HTTP cache entries", deleted)
+    return deleted
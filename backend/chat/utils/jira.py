@@ -1,13 +1,24 @@
 import logging
-from typing import Iterable, List, Tuple, Union
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Callable, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 import requests
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from chat.encryption import decrypt_api_key
 from urllib.parse import urlparse
-from chat.models import JiraIssue, JiraComment, JiraSync
-from chat.utils.embeddings import save_document
+from chat.models import Document, JiraIssue, JiraComment, JiraSync
+from chat.utils.embeddings import base_source_id, chunk_text, save_document
+from chat.utils.sweep import sweep_documents, sweep_rows
+from chat.utils.upsert import bulk_upsert
 
 
 logger = logging.getLogger(__name__)
@@ -17,13 +28,17 @@ _REQUEST_TIMEOUT = (5, 30)
 
 def _build_session() -> requests.Session:
     session = requests.Session()
+    # Concurrent comment fetches share this session, so rate limiting is
+    # likely: honour Retry-After on 429/503 and back off exponentially.
     retry = Retry(
-        total=3,
+        total=5,
         backoff_factor=0.5,
         status_forcelist=(429, 500, 502, 503, 504),
         allowed_methods=("GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS", "HEAD"),
+        respect_retry_after_header=True,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    pool_size = max(settings.JIRA_COMMENT_WORKERS, 1)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
     return session
@@ -32,68 +47,151 @@ def _build_session() -> requests.Session:
 _SESSION = _build_session()
 
 
-def extract_plain_text_from_adf(document: Union[dict, list, None]) -> str:
+_ADF_BLOCK_TYPES = frozenset({
+    "paragraph", "heading", "blockquote", "listItem", "codeBlock", "panel",
+    "tableRow", "taskItem", "decisionItem", "expand", "nestedExpand", "rule",
+})
+_ADF_LIST_TYPES = frozenset({"bulletList", "orderedList", "taskList", "decisionList"})
+_ADF_CELL_TYPES = frozenset({"tableCell", "tableHeader"})
+_ADF_INLINE_TYPES = frozenset({
+    "text", "emoji", "mention", "status", "inlineCard", "blockCard", "embedCard", "date",
+})
+
+
+def _adf_inline_text(node_type: str, node: dict) -> Optional[str]:
+    attrs = node.get("attrs") or {}
+    if node_type == "text":
+        text = node.get("text") or ""
+        for mark in node.get("marks") or ():
+            if isinstance(mark, dict) and mark.get("type") == "link":
+                href = (mark.get("attrs") or {}).get("href")
+                if href and href != text:
+                    text = f"{text} ({href})"
+        return text
+    if node_type == "emoji":
+        return attrs.get("shortName") or attrs.get("text")
+    if node_type == "mention":
+        text = attrs.get("text") or attrs.get("displayName")
+        if text:
+            return text if text.startswith("@") else f"@{text}"
+        return "@unknown"
+    if node_type == "status":
+        text = attrs.get("text")
+        return f"[{text}]" if text else None
+    if node_type in {"inlineCard", "blockCard", "embedCard"}:
+        return attrs.get("url")
+    if node_type == "date":
+        try:
+            return datetime.fromtimestamp(int(attrs["timestamp"]) / 1000, tz=dt_timezone.utc).date().isoformat()
+        except (KeyError, TypeError, ValueError, OverflowError, OSError):
+            return None
+    return None
+
+
+# Bump when ``extract_plain_text_from_adf`` changes: the next full reconcile
+# re-converts issues whose documents were built by an older version.
+ADF_TEXT_FORMAT = 1
+
+
+def extract_plain_text_from_adf(document: Union[dict, list, str, None]) -> str:
     """Return the concatenated plain text representation of an ADF document.
 
-    Atlassian comments are provided using the Atlassian Document Format (ADF),
-    which is a nested structure of nodes.  Each node can contain child nodes in
-    the ``content`` key, and leaf nodes may define ``text`` or represent a hard
-    line break.  The structure is permissive and nodes or keys may be missing, so
-    the helper needs to be defensive and never raise when traversing the
-    document.
+    Atlassian descriptions and comments are provided using the Atlassian
+    Document Format (ADF), which is a nested structure of nodes.  Each node can
+    contain child nodes in the ``content`` key, and leaf nodes may define
+    ``text`` or represent a hard line break.  The structure is permissive and
+    nodes or keys may be missing, so the helper needs to be defensive and never
+    raise when traversing the document.
+
+    The walk uses an explicit stack, so arbitrarily deep documents cannot hit
+    the recursion limit. Lists are rendered with ``-``/``1.`` markers indented
+    by nesting depth, table rows as ``|``-separated cells, links as
+    ``text (url)`` and mentions, statuses and dates as their display text.
+    Plain strings (API v2 descriptions) are returned stripped.
     """
-
-    def _maybe_add_newline(parts: List[str]) -> None:
-        if not parts:
-            return
-        if not parts[-1].endswith("\n"):
-            parts.append("\n")
-
-    def _walk(node: Union[dict, list, None], parts: List[str]) -> None:
-        if node is None:
-            return
-
-        if isinstance(node, list):
-            for child in node:
-                _walk(child, parts)
-            return
-
-        if not isinstance(node, dict):
-            return
-
-        node_type = node.get("type")
-
-        if node_type == "text":
-            text = node.get("text")
-            if text:
-                parts.append(text)
-            return
-
-        if node_type == "emoji":
-            short_name = node.get("attrs", {}).get("shortName")
-            if short_name:
-                parts.append(short_name)
-            return
-
-        if node_type == "hardBreak":
-            parts.append("\n")
-            return
-
-        content = node.get("content")
-        if not content:
-            return
-
-        before_len = len(parts)
-        for child in content:
-            _walk(child, parts)
-
-        if node_type in {"paragraph", "heading", "blockquote", "listItem"}:
-            if len(parts) > before_len:
-                _maybe_add_newline(parts)
-
-    collected: List[str] = []
-    _walk(document, collected)
-    return "".join(collected).strip()
+    if isinstance(document, str):
+        return document.strip()
+
+    parts: List[str] = []
+    append = parts.append
+    # Each frame walks one node's children: (children iterator, node type,
+    # list depth, inside a table cell, len(parts) on entry). Children of lists
+    # and table rows are enumerated so their markers can be derived.
+    stack: List[tuple] = [(iter((document,)), None, 0, False, 0)]
+
+    while stack:
+        children, parent_type, depth, in_cell, before_len = stack[-1]
+        indexed = parent_type in _ADF_LIST_TYPES or parent_type == "tableRow"
+
+        for node in children:
+            child_depth = depth
+            child_in_cell = in_cell
+            if indexed:
+                idx, node = node
+                if parent_type == "tableRow":
+                    if idx:
+                        append(" | ")
+                    child_in_cell = True
+                else:
+                    if parts and not parts[-1].endswith("\n"):
+                        append("\n")
+                    if parent_type == "orderedList":
+                        append(f"{'  ' * depth}{idx}. ")
+                    else:
+                        append(f"{'  ' * depth}- ")
+                    child_depth = depth + 1
+
+            if isinstance(node, list):
+                stack.append((iter(node), None, child_depth, child_in_cell, len(parts)))
+                break
+            if not isinstance(node, dict):
+                continue
+
+            node_type = node.get("type")
+
+            if node_type == "text" and "marks" not in node:
+                text = node.get("text")
+                if text:
+                    append(text)
+                continue
+            if node_type == "hardBreak":
+                append("\n")
+                continue
+            if node_type in _ADF_INLINE_TYPES:
+                text = _adf_inline_text(node_type, node)
+                if text:
+                    append(text)
+                continue
+
+            content = node.get("content")
+            if not content or not isinstance(content, list):
+                continue
+
+            if node_type in _ADF_LIST_TYPES:
+                grandchildren = enumerate(content, (node.get("attrs") or {}).get("order") or 1)
+            elif node_type == "tableRow":
+                grandchildren = enumerate(content)
+            else:
+                grandchildren = iter(content)
+            # Descend; this frame's iterator resumes once the child is done.
+            stack.append((grandchildren, node_type, child_depth, child_in_cell, len(parts)))
+            break
+        else:
+            stack.pop()
+            if len(parts) == before_len:
+                continue
+            if parent_type in _ADF_CELL_TYPES:
+                parts[-1] = parts[-1].rstrip()
+            elif parent_type in _ADF_BLOCK_TYPES:
+                if in_cell:
+                    # Blocks inside a table cell are separated by spaces so
+                    # each row stays on one line.
+                    if not parts[-1].endswith((" ", "\n")):
+                        append(" ")
+                elif not parts[-1].endswith("\n"):
+                    append("\n")
+
+    return "".join(parts).strip()
 
 def extract_project_key(board_url):
     # Example: https://yourdomain.atlassian.net/jira/software/c/projects/CPG/boards/1
@@ -156,12 +254,172 @@ def fetch_comments(base_url, issue_key, api_key, email):
 
     return comments
 
-def fetch_jira_issues(sync: JiraSync) -> List[Tuple[JiraIssue, List[JiraComment]]]:
+def _needs_full_sync(sync: JiraSync, now: datetime) -> bool:
+    if sync.last_issue_updated_at is None or sync.last_full_sync_at is None:
+        return True
+    return now - sync.last_full_sync_at >= timedelta(days=settings.JIRA_FULL_SYNC_DAYS)
+
+
+def build_issue_jql(
+    project_key: str,
+    updated_since: Optional[datetime] = None,
+    now: Optional[datetime] = None,
+    after_key: Optional[str] = None,
+) -> str:
+    """Return the search JQL, limited to issues updated since ``updated_since``.
+
+    JQL interprets absolute dates in the Jira user's time zone, so the window
+    is expressed as a relative offset in minutes, widened by
+    ``JIRA_SYNC_SKEW_MINUTES`` to tolerate clock drift and indexing lag.
+    Without ``updated_since`` every issue is listed.
+
+    Issues are listed in key order, starting after ``after_key``: listings
+    page by key rather than by offset, so issues edited or deleted while a
+    listing runs cannot shift another issue past a page boundary, where it
+    would be missed (and, in a full listing, swept).
+    """
+    after = f' AND key > "{after_key}"' if after_key else ""
+    if updated_since is None:
+        return f"project={project_key}{after} ORDER BY key ASC"
+
+    now = now or timezone.now()
+    elapsed = max((now - updated_since).total_seconds(), 0)
+    minutes = math.ceil(elapsed / 60) + settings.JIRA_SYNC_SKEW_MINUTES
+    return f"project={project_key} AND updated >= -{minutes}m{after} ORDER BY key ASC"
+
+
+def fetch_comments_concurrently(base_url, issue_keys: List[str], api_key, email) -> Iterator[List[dict]]:
+    """Yield the comments of each issue in ``issue_keys``, in order.
+
+    Pages are fetched by up to ``JIRA_COMMENT_WORKERS`` threads sharing the
+    module session; callers consume results (and write to the database) on
+    their own thread while later issues are still being fetched.
+    """
+    workers = min(settings.JIRA_COMMENT_WORKERS, len(issue_keys))
+    if workers <= 1:
+        for issue_key in issue_keys:
+            yield fetch_comments(base_url, issue_key, api_key, email)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jira-comments")
+    try:
+        yield from executor.map(
+            lambda issue_key: fetch_comments(base_url, issue_key, api_key, email),
+            issue_keys,
+        )
+    finally:
+        # Do not keep fetching for an abandoned or failed sync.
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+_JIRA_DOCUMENT_ID_RE = re.compile(r"^(?P<issue_key>.+)_(?:comment|thread)_\d+$")
+
+_ISSUE_FIELDS = "summary,description,status,created,updated,comment"
+
+
+def _inline_comments(fields: dict) -> Optional[List[dict]]:
+    """Return the comments embedded in a search result when the page is complete.
+
+    Search results include only the first page of comments, so ``None`` is
+    returned when more exist (or the field is missing) and the caller must
+    page through ``/comment`` instead.
+    """
+    payload = fields.get("comment")
+    if not isinstance(payload, dict):
+        return None
+    comments = payload.get("comments") or []
+    total = payload.get("total")
+    if total is None or total > len(comments):
+        return None
+    return comments
+
+
+def _save_comments(issues_with_comments: List[Tuple[JiraIssue, List[JiraComment]]]) -> None:
+    """Upsert the comments of several issues and drop the ones no longer listed.
+
+    Comments deleted upstream, and rows stored before comment ids were
+    tracked (``comment_id`` is NULL and never matches), are removed.
+    """
+    if not issues_with_comments:
+        return
+    comments = [comment for _, batch in issues_with_comments for comment in batch]
+    with transaction.atomic():
+        bulk_upsert(
+            JiraComment,
+            comments,
+            unique_fields=["issue", "comment_id"],
+            update_fields=["content", "author", "created_at"],
+        )
+        JiraComment.objects.filter(
+            issue__in=[issue.pk for issue, _ in issues_with_comments],
+        ).exclude(pk__in=[comment.pk for comment in comments]).delete()
+
+
+def _document_issue_key(source_id: str) -> Optional[str]:
+    source_id = base_source_id(source_id)
+    match = _JIRA_DOCUMENT_ID_RE.match(source_id)
+    return match.group("issue_key") if match else source_id
+
+
+def _ingested_issue_keys(chatbot_id: int, mode: str, issue_keys: Optional[Iterable[str]] = None) -> Set[str]:
+    """Return the keys (of ``issue_keys``, or all) whose documents for ingest ``mode`` exist."""
+    source = "jira_thread" if mode == "thread" else "jira_issue"
+    documents = Document.objects.filter(chatbot_id=chatbot_id, source=source)
+    if issue_keys is not None:
+        query = Q()
+        for issue_key in issue_keys:
+            query |= Q(source_id=issue_key) | Q(source_id__startswith=f"{issue_key}_")
+        if not query:
+            return set()
+        documents = documents.filter(query)
+    return {_document_issue_key(source_id) for source_id in documents.values_list("source_id", flat=True)}
+
+
+def sweep_jira_issues(sync: JiraSync, listed_keys: List[str]) -> int:
+    """Remove issues missing from a complete listing, with their documents.
+
+    Documents are matched against the issues of every Jira sync of the
+    chatbot, since several projects can feed the same index.
+    """
+    if not listed_keys:
+        logger.warning("Skipping Jira sweep for sync %s: the listing was empty", sync.pk)
+        return 0
+
+    deleted = sweep_rows(JiraIssue.objects.filter(sync=sync), "issue_key", listed_keys)
+    live_keys = set(JiraIssue.objects.filter(sync__chatBot_id=sync.chatBot_id).values_list("issue_key", flat=True))
+    for source in ("jira_issue", "jira_comment", "jira_thread"):
+        sweep_documents(sync.chatBot, source, live_keys, key_of=_document_issue_key)
+    return deleted
+
+
+def fetch_jira_issues(
+    sync: JiraSync,
+    full: Optional[bool] = None,
+    ingest: Optional[Callable[[JiraIssue, List[JiraComment]], object]] = None,
+) -> List[Tuple[JiraIssue, List[JiraComment]]]:
+    """Fetch issues and comments changed since the last sync.
+
+    Only issues updated after the stored high-water mark are requested, and
+    issues whose ``updated`` timestamp matches the stored row and whose
+    documents exist are skipped, so only touched or never-ingested issues are
+    returned. A full reconcile, which also sweeps deleted issues, lists every
+    issue; it runs on the first sync, every ``JIRA_FULL_SYNC_DAYS`` days, or
+    when ``full`` is true.
+
+    ``ingest`` is called for each returned issue before the high-water mark
+    is saved, so an issue whose ingestion fails is listed again next time.
+    """
     api_key = decrypt_api_key(sync.credential._api_key)
     project_key = extract_project_key(sync.board_url)
     base_url = get_base_domain(sync.board_url)
     email = sync.credential.email
 
+    now = timezone.now()
+    if full is None:
+        full = _needs_full_sync(sync, now)
+    updated_since = None if full else sync.last_issue_updated_at
+    jql = build_issue_jql(project_key, updated_since, now=now)
+
     issue_url = f"{base_url}/rest/api/3/search"
     auth = requests.auth.HTTPBasicAuth(email, api_key)
     headers = {
@@ -169,22 +427,16 @@ def fetch_jira_issues(sync: JiraSync) -> List[Tuple[JiraIssue, List[JiraComment]
     }
 
     issues: List[dict] = []
-    start_at = 0
     max_results = 50
 
     while True:
         params = {
-            "jql": f"project={project_key}",
-            "startAt": start_at,
+            "jql": jql,
+            "fields": _ISSUE_FIELDS,
+            "startAt": 0,
             "maxResults": max_results,
         }
-        response = _SESSION.get(
-            issue_url,
-            headers=headers,
-            auth=auth,
-            timeout=_REQUEST_TIMEOUT,
-            params=params,
-        )
+        response = _SESSION.get(issue_url, headers=headers, auth=auth, timeout=_REQUEST_TIMEOUT, params=params)
         response.raise_for_status()
         payload = response.json()
         batch = payload.get("issues", []) or []
@@ -199,63 +451,211 @@ def fetch_jira_issues(sync: JiraSync) -> List[Tuple[JiraIssue, List[JiraComment]
         batch_size = len(batch)
         total = payload.get("total")
         max_results = payload.get("maxResults", max_results) or max_results
-        start_at = payload.get("startAt", start_at) + batch_size
-
-        if total is not None and len(issues) >= total:
-            break
-
-        if batch_size < max_results:
+        if batch_size < max_results or (total is not None and batch_size >= total):
             break
+        # The relative window is re-measured so its start stays at the same
+        # instant while the listing runs.
+        jql = build_issue_jql(project_key, updated_since, after_key=batch[-1]["key"])
+
+    known_updated = {}
+    if issues:
+        stored = JiraIssue.objects.filter(sync=sync)
+        if not full:
+            stored = stored.filter(issue_key__in=[issue["key"] for issue in issues])
+        known_updated = dict(stored.values_list("issue_key", "updated_at"))
+        # Only issues whose documents exist and were built by the current
+        # converter in the sync's ingest mode count as up to date. Touched
+        # rows are reset to format 0 until ingest_jira_issue finishes, so a
+        # failed ingestion is repaired by the next sync that lists the issue.
+        current = set(
+            stored.filter(text_format=ADF_TEXT_FORMAT, ingest_mode=sync.ingest_mode)
+            .values_list("issue_key", flat=True)
+        )
+        unchanged = {
+            issue["key"] for issue in issues
+            if issue["key"] in current
+            and known_updated.get(issue["key"]) == parse_datetime(issue["fields"]["updated"])
+        }
+        ingested = _ingested_issue_keys(sync.chatBot_id, sync.ingest_mode, None if full else unchanged)
+        known_updated = {
+            key: updated for key, updated in known_updated.items() if key in ingested and key in current
+        }
 
-    processed: List[Tuple[JiraIssue, List[JiraComment]]] = []
+    # Keyed by issue key: results can shift between pages and list an issue
+    # twice, which a single upsert batch must not contain.
+    touched: dict[str, Tuple[JiraIssue, Optional[List[dict]]]] = {}
+    high_water = sync.last_issue_updated_at
 
     for issue in issues:
         issue_key = issue["key"]
         fields = issue["fields"]
+        updated_at = parse_datetime(fields["updated"])
+
+        if updated_at is not None and (high_water is None or updated_at > high_water):
+            high_water = updated_at
+        # The skew window re-lists recently synced issues; skip those that
+        # have not changed and are already ingested.
+        if updated_at is not None and known_updated.get(issue_key) == updated_at:
+            continue
 
-        # Save or update the issue
-        jira_issue, _ = JiraIssue.objects.update_or_create(
+        jira_issue = JiraIssue(
             sync=sync,
             issue_key=issue_key,
-            defaults={
-                "summary": fields["summary"],
-                "description": fields.get("description", ""),
-                "status": fields["status"]["name"],
-                "created_at": fields["created"],
-                "updated_at": fields["updated"]
-            }
+            summary=fields["summary"],
+            description=extract_plain_text_from_adf(fields.get("description")),
+            status=fields["status"]["name"],
+            created_at=parse_datetime(fields["created"]),
+            updated_at=updated_at,
         )
+        touched[issue_key] = (jira_issue, _inline_comments(fields))
+
+    bulk_upsert(
+        JiraIssue,
+        [jira_issue for jira_issue, _ in touched.values()],
+        unique_fields=["sync", "issue_key"],
+        update_fields=["summary", "description", "status", "created_at", "updated_at", "text_format"],
+    )
 
-        # Fetch and save comments
-        comments = fetch_comments(base_url, issue_key, api_key, email)
-        synced_comments: List[JiraComment] = []
+    # Page through /comment only for issues whose inline comments were
+    # truncated, concurrently, and save everything here in issue order.
+    processed: List[Tuple[JiraIssue, List[JiraComment]]] = []
+    pending: List[Tuple[JiraIssue, List[JiraComment]]] = []
+    pending_comments = 0
+    comment_batches = fetch_comments_concurrently(
+        base_url,
+        [jira_issue.issue_key for jira_issue, inline in touched.values() if inline is None],
+        api_key,
+        email,
+    )
+    for jira_issue, inline in touched.values():
+        comments = inline if inline is not None else next(comment_batches)
+        synced_comments: dict[str, JiraComment] = {}
         for comment in comments:
             plain_text = extract_plain_text_from_adf(comment.get("body"))
-            comment_obj, _ = JiraComment.objects.update_or_create(
+            synced_comments[str(comment["id"])] = JiraComment(
                 issue=jira_issue,
+                comment_id=str(comment["id"]),
                 content=plain_text if plain_text else "Unknown content",
-                created_at=comment["created"],
-                author=comment["author"]["displayName"]
+                created_at=parse_datetime(comment["created"]),
+                author=(comment.get("author") or {}).get("displayName", "Unknown"),
             )
-            synced_comments.append(comment_obj)
+        pending.append((jira_issue, list(synced_comments.values())))
+        pending_comments += len(synced_comments)
 
-        processed.append((jira_issue, synced_comments))
+        if pending_comments >= settings.SYNC_UPSERT_BATCH_SIZE:
+            _save_comments(pending)
+            processed.extend(pending)
+            pending, pending_comments = [], 0
 
-    if processed:
-        from django.utils import timezone
+    _save_comments(pending)
+    processed.extend(pending)
 
-        sync.last_sync_time = timezone.now()
-        sync.save(update_fields=["last_sync_time"])
+    if full:
+        sweep_jira_issues(sync, [issue["key"] for issue in issues])
 
-    logger.info("Fetched %s Jira issues for sync %s", len(processed), sync.pk)
+    if ingest is not None:
+        for jira_issue, comments in processed:
+            ingest(jira_issue, comments)
+
+    update_fields = ["last_issue_updated_at"]
+    sync.last_issue_updated_at = high_water
+    if full:
+        sync.last_full_sync_at = now
+        update_fields.append("last_full_sync_at")
+    if processed:
+        sync.last_sync_time = now
+        update_fields.append("last_sync_time")
+    sync.save(update_fields=update_fields)
+
+    logger.info(
+        "Fetched %s changed Jira issues (%s listed, %s sync) for sync %s",
+        len(processed),
+        len(issues),
+        "full" if full else "incremental",
+        sync.pk,
+    )
 
     return processed
 
-def ingest_jira_issue(company, chatbot, issue: JiraIssue, comments: Iterable[JiraComment] | None = None):
+def _thread_windows(issue: JiraIssue, comments: Iterable[JiraComment], max_tokens: int) -> List[str]:
+    """Pack the issue and its comments into windows of at most ``max_tokens``.
+
+    Every window starts with the issue header so each one can be retrieved
+    and understood on its own. Blocks too large for a window are split.
+    """
+    header = f"Issue {issue.issue_key}: {issue.summary}\nStatus: {issue.status}\n"
+    budget = max(max_tokens * 4 - len(header), 200)
+
+    blocks: List[str] = []
+    if issue.description:
+        blocks.append(f"Description: {issue.description}")
+    for comment in comments:
+        blocks.append(f"Comment by {comment.author} on {comment.created_at}:\n{comment.content}")
+
+    windows: List[str] = []
+    current: List[str] = []
+    used = 0
+    for block in blocks:
+        for piece in chunk_text(block, max_tokens=budget // 4) if len(block) > budget else [block]:
+            if current and used + len(piece) + 2 > budget:
+                windows.append(header + "\n" + "\n\n".join(current))
+                current, used = [], 0
+            current.append(piece)
+            used += len(piece) + 2
+    if current or not windows:
+        windows.append(header + ("\n" + "\n\n".join(current) if current else ""))
+    return windows
+
+
+def _delete_issue_documents(company, chatbot, issue_key: str, source: str, keep: Iterable[str] = ()) -> None:
+    documents = Document.objects.filter(company=company, chatbot=chatbot, source=source)
+    if source == "jira_issue":
+        documents = documents.filter(Q(source_id=issue_key) | Q(source_id__startswith=f"{issue_key}_part_"))
+    else:
+        suffix = "thread" if source == "jira_thread" else "comment"
+        documents = documents.filter(source_id__startswith=f"{issue_key}_{suffix}_")
+    documents.exclude(source_id__in=list(keep)).delete()
+
+
+def _mark_ingested(issue: JiraIssue, mode: str) -> None:
+    if issue.pk is not None:
+        JiraIssue.objects.filter(pk=issue.pk).update(text_format=ADF_TEXT_FORMAT, ingest_mode=mode)
+
+
+def ingest_jira_issue(
+    company,
+    chatbot,
+    issue: JiraIssue,
+    comments: Iterable[JiraComment] | None = None,
+    mode: str = "comment",
+):
     """
     Ingest a Jira issue and its comments as documents.
+
+    In ``comment`` mode the issue and each comment become separate documents.
+    In ``thread`` mode the issue and its comment thread are packed into
+    ``JIRA_THREAD_WINDOW_TOKENS``-sized ``jira_thread`` windows, and documents
+    left over from the other mode or from a longer thread are removed.
     """
     issue_id = issue.issue_key
+    comments = list(comments or [])
+
+    if mode == "thread":
+        documents = []
+        for idx, window in enumerate(_thread_windows(issue, comments, settings.JIRA_THREAD_WINDOW_TOKENS)):
+            documents.extend(save_document(
+                company=company,
+                chatbot=chatbot,
+                source="jira_thread",
+                source_id=f"{issue_id}_thread_{idx}",
+                content=window,
+            ))
+        _delete_issue_documents(company, chatbot, issue_id, "jira_thread", keep=[doc.source_id for doc in documents])
+        _delete_issue_documents(company, chatbot, issue_id, "jira_issue")
+        _delete_issue_documents(company, chatbot, issue_id, "jira_comment")
+        _mark_ingested(issue, mode)
+        return documents
+
     content = f"Issue: {issue.summary}\n\nDescription: {issue.description}"
     documents = []
     issue_documents = save_document(
@@ -280,4 +680,13 @@ def ingest_jira_issue(company, chatbot, issue: JiraIssue, comments: Iterable[Jir
             )
             documents.extend(comment_documents)
 
+    _delete_issue_documents(
+        company,
+        chatbot,
+        issue_id,
+        "jira_comment",
+        keep=[doc.source_id for doc in documents if doc.source == "jira_comment"],
+    )
+    _delete_issue_documents(company, chatbot, issue_id, "jira_thread")
+    _mark_ingested(issue, mode)
     return documents
@@ -0,0 +1,261 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from time import monotonic
+from typing import List, Optional
+
+from django.conf import settings
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    OpenAI,
+    RateLimitError,
+)
+
+from chat.utils.timing import record_metric
+
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying on the fallback model: the primary model is slow,
+# unreachable, overloaded or rate limited, but the request itself is fine.
+_FALLBACK_ERRORS = (APITimeoutError, APIConnectionError, InternalServerError, RateLimitError)
+
+# Below this many seconds there is no point starting another request.
+_MIN_ATTEMPT_SECONDS = 1.0
+
+_hedge_executor = ThreadPoolExecutor(max_workers=settings.OPENAI_HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+
+
+class LLMDeadlineExceeded(RuntimeError):
+    """Raised when a completion does not finish within its stage deadline."""
+
+
+@dataclass
+class CompletionResult:
+    content: str
+    model: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    hedged: bool = False
+
+
+class RequestDeadline:
+    """One time budget for a whole chat request, shared out between its stages.
+
+    Each stage asks for ``budget(stage_limit)`` and gets the smaller of its own
+    limit and the time left, so the stages together can never outlast the
+    request deadline.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(self.expires_at - monotonic(), 0.0)
+
+    def budget(self, stage_limit: float) -> float:
+        remaining = self.remaining()
+        if remaining < _MIN_ATTEMPT_SECONDS:
+            raise LLMDeadlineExceeded(f"Request exceeded its {self.seconds:.1f}s deadline")
+        return min(stage_limit, remaining)
+
+
+def attempt_timeout(budget: float) -> float:
+    """Split ``budget`` across the OpenAI client's internal retries."""
+    return max(budget / (settings.OPENAI_MAX_RETRIES + 1), 0.1)
+
+
+def _complete_once(client: OpenAI, model: str, messages: List[dict], budget: float, **kwargs) -> CompletionResult:
+    response = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        timeout=attempt_timeout(budget),
+        **kwargs,
+    )
+    usage = getattr(response, "usage", None)
+    return CompletionResult(
+        content=response.choices[0].message.content,
+        model=model,
+        prompt_tokens=getattr(usage, "prompt_tokens", None),
+        completion_tokens=getattr(usage, "completion_tokens", None),
+    )
+
+
+class _StreamingAttempt:
+    """One streamed completion that signals when its first token arrives or it ends."""
+
+    def __init__(self, client: OpenAI, model: str, messages: List[dict], budget: float, progress: threading.Event, kwargs: dict):
+        self.client = client
+        self.model = model
+        self.messages = messages
+        self.budget = budget
+        self.progress = progress
+        self.kwargs = kwargs
+        self.has_token = False
+        self.cancelled = False
+        self._stream_lock = threading.Lock()
+        self._open_stream = None
+
+    def cancel(self) -> None:
+        """Stop the attempt, closing its stream so the worker thread is freed now."""
+        with self._stream_lock:
+            self.cancelled = True
+            stream = self._open_stream
+        if stream is not None:
+            stream.close()
+
+    def run(self) -> CompletionResult:
+        try:
+            return self._stream()
+        finally:
+            self.progress.set()
+
+    def _stream(self) -> CompletionResult:
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=self.messages,
+            timeout=attempt_timeout(self.budget),
+            stream=True,
+            stream_options={"include_usage": True},
+            **self.kwargs,
+        )
+        with self._stream_lock:
+            self._open_stream = stream
+            cancelled = self.cancelled
+        parts: List[str] = []
+        usage = None
+        try:
+            for chunk in () if cancelled else stream:
+                if self.cancelled:
+                    break
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                for choice in chunk.choices or []:
+                    delta = getattr(choice.delta, "content", None)
+                    if delta:
+                        parts.append(delta)
+                        if not self.has_token:
+                            self.has_token = True
+                            self.progress.set()
+        except Exception:
+            # Closing the stream from ``cancel`` interrupts the read.
+            if not self.cancelled:
+                raise
+        finally:
+            if self.cancelled:
+                stream.close()
+        return CompletionResult(
+            content="".join(parts),
+            model=self.model,
+            prompt_tokens=getattr(usage, "prompt_tokens", None),
+            completion_tokens=getattr(usage, "completion_tokens", None),
+        )
+
+
+def _complete_hedged(client: OpenAI, model: str, messages: List[dict], budget: float, hedge_after: float, **kwargs) -> CompletionResult:
+    """Stream a completion and send a duplicate if no token arrives within ``hedge_after``.
+
+    Whichever request produces a token first wins; the other stream is closed.
+    """
+    start = monotonic()
+    deadline = start + budget
+    progress = threading.Event()
+    primary = _StreamingAttempt(client, model, messages, budget, progress, kwargs)
+    attempts = [(primary, _hedge_executor.submit(primary.run))]
+
+    hedge_at = start + hedge_after
+    winner = None
+    while True:
+        progress.clear()
+        winner = next((item for item in attempts if item[0].has_token), None)
+        if winner is None:
+            winner = next((item for item in attempts if item[1].done() and not item[1].exception()), None)
+        if winner is not None or all(future.done() for _attempt, future in attempts):
+            break
+
+        now = monotonic()
+        if now >= deadline:
+            break
+        if hedge_at is not None and now >= hedge_at:
+            hedge_at = None
+            remaining = deadline - now
+            if remaining > _MIN_ATTEMPT_SECONDS:
+                hedge = _StreamingAttempt(client, model, messages, remaining, progress, kwargs)
+                attempts.append((hedge, _hedge_executor.submit(hedge.run)))
+                record_metric("hedged", True)
+                logger.info("Hedging %s completion after %.2fs without a first token", model, hedge_after)
+
+        wake_at = deadline if hedge_at is None else min(hedge_at, deadline)
+        progress.wait(max(wake_at - now, 0))
+
+    if winner is None:
+        # Nothing produced a token in time; surface the primary's error or time out.
+        winner = attempts[0]
+
+    winner_attempt, winner_future = winner
+    for attempt, _future in attempts:
+        if attempt is not winner_attempt:
+            attempt.cancel()
+
+    try:
+        result = winner_future.result(timeout=max(deadline - monotonic(), 0))
+    except FutureTimeoutError as exc:
+        winner_attempt.cancel()
+        raise LLMDeadlineExceeded(f"{model} completion exceeded its {budget:.1f}s deadline") from exc
+    result.hedged = len(attempts) > 1
+    return result
+
+
+def complete_chat(
+    client: OpenAI,
+    messages: List[dict],
+    *,
+    deadline: Optional[float] = None,
+    hedge: bool = False,
+    model: Optional[str] = None,
+    **kwargs,
+) -> CompletionResult:
+    """Run a chat completion bounded by ``deadline`` seconds.
+
+    When ``OPENAI_FALLBACK_MODEL`` is configured, the primary model gets the
+    deadline minus ``OPENAI_FALLBACK_RESERVE`` and the remainder is used to
+    retry on the fallback model if the primary is slow or failing. With
+    ``hedge`` and ``OPENAI_HEDGE_AFTER`` set (roughly the p95 time to first
+    token), a stalled primary request is duplicated.
+    """
+    model = model or settings.OPENAI_CHAT_MODEL
+    deadline = settings.OPENAI_COMPLETION_TIMEOUT if deadline is None else deadline
+    fallback_model = settings.OPENAI_FALLBACK_MODEL
+    if fallback_model == model:
+        fallback_model = ""
+    hedge_after = settings.OPENAI_HEDGE_AFTER if hedge else 0
+
+    start = monotonic()
+    primary_budget = deadline
+    if fallback_model:
+        primary_budget = max(deadline - settings.OPENAI_FALLBACK_RESERVE, _MIN_ATTEMPT_SECONDS)
+
+    def attempt(attempt_model: str, budget: float) -> CompletionResult:
+        if hedge_after and hedge_after < budget:
+            return _complete_hedged(client, attempt_model, messages, budget, hedge_after, **kwargs)
+        return _complete_once(client, attempt_model, messages, budget, **kwargs)
+
+    try:
+        return attempt(model, primary_budget)
+    except _FALLBACK_ERRORS + (LLMDeadlineExceeded,) as exc:
+        remaining = deadline - (monotonic() - start)
+        if not fallback_model or remaining < _MIN_ATTEMPT_SECONDS:
+            raise
+        logger.warning(
+            "Completion on %s failed after %.2fs (%s); falling back to %s",
+            model,
+            monotonic() - start,
+            type(exc).__name__,
+            fallback_model,
+        )
+        record_metric("fallback_model", fallback_model)
+        return attempt(fallback_model, remaining)
@@ -1,25 +1,57 @@
 from openai import APIConnectionError, APITimeoutError, RateLimitError
 from django.conf import settings
-from chat.utils.embeddings import get_openai_client, search_documents
+from chat.models import Conversation
+from chat.utils.citations import resolve_citations
+from chat.utils.conversation import condense_question, load_history, record_turn
+from chat.utils.embeddings import embed_text, get_openai_client, search_documents
+from chat.utils.faq import match_faq
+from chat.utils.llm import LLMDeadlineExceeded, RequestDeadline, complete_chat
+from chat.utils.timing import collect_timings, record_metric, stage
 
 
-def generate_answer(company_id: int, chatbot_id: int, query: str, top_k: int = 5) -> dict:
+def generate_answer(
+    company_id: int,
+    chatbot_id: int,
+    query: str,
+    top_k: int = 5,
+    conversation: Conversation | None = None,
+    debug: bool = False,
+    use_faq: bool = False,
+) -> dict:
     """
     Generate an answer using RAG:
+    - Condense follow-up questions using the conversation history (if any)
+    - With ``use_faq``, answer opening questions from the vetted FAQ store
     - Search documents for context
-    - Build a prompt with query + docs
+    - Build a prompt with query + docs + bounded history
     - Ask OpenAI LLM for an answer
+
+    Per-stage timings and token counts are always logged; with ``debug`` they
+    are also returned under the ``debug`` key. All stages share one
+    ``OPENAI_REQUEST_DEADLINE`` counted from the start of the call; running out
+    raises ``LLMDeadlineExceeded``.
     """
     if not settings.OPENAI_API_KEY:
         raise ValueError("OPENAI_API_KEY is not set in environment or settings.py")
 
-    # 1. Retrieve context
-    docs = search_documents(company_id, chatbot_id, query, top_k)
+    with collect_timings(
+        "generate_answer",
+        detailed=debug,
+        company_id=company_id,
+        chatbot_id=chatbot_id,
+    ) as timings:
+        result = _generate_answer(company_id, chatbot_id, query, top_k, conversation, use_faq)
+
+    if debug:
+        result["debug"] = timings.as_dict()
+    return result
+
 
-    # 2. Build context string
+def _build_messages(query: str, docs: list, summary: str, history: list) -> list:
+    # Build context string
     context_text = "\n\n".join([f"[{d['source']}:{d['source_id']}]\n{d['content']}" for d in docs])
 
-    # 3. Build prompt
+    # Build prompt
     system_prompt = (
         "You are a helpful assistant that answers questions "
         "using only the provided company documents (Jira, Confluence, GitHub). "
@@ -30,21 +62,89 @@ def generate_answer(company_id: int, chatbot_id: int, query: str, top_k: int = 5
     )
     user_prompt = f"Context:\n{context_text}\n\nQuestion: {query}"
 
+    messages = [{"role": "system", "content": system_prompt}]
+    if summary:
+        messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+    messages.extend(history)
+    messages.append({"role": "user", "content": user_prompt})
+    return messages
+
+
+def _generate_answer(company_id, chatbot_id, query, top_k, conversation, use_faq=False):
     client = get_openai_client()
+    deadline = RequestDeadline(settings.OPENAI_REQUEST_DEADLINE)
+
+    summary = ""
+    history = []
+    retrieval_query = query
+    if conversation is not None:
+        with stage("history_load"):
+            summary, history = load_history(conversation)
+        with stage("condense"):
+            retrieval_query = condense_question(
+                client, summary, history, query, timeout=deadline.budget(settings.OPENAI_HISTORY_TIMEOUT)
+            )
+
+    # Follow-ups depend on earlier turns, so only opening questions can be
+    # answered from the vetted store.
+    query_embedding = None
+    if use_faq and not summary and not history:
+        with stage("embed"):
+            query_embedding = embed_text(query, timeout=deadline.budget(settings.OPENAI_EMBEDDING_TIMEOUT))
+        with stage("faq_match"):
+            faq = match_faq(chatbot_id, query_embedding)
+        record_metric("faq_hit", faq is not None)
+        if faq is not None:
+            result = {"answer": faq["answer"], "sources": [], "faq_id": faq["id"]}
+            if conversation is not None:
+                with stage("history_update"):
+                    message = record_turn(conversation, query, faq["answer"])
+                result["message_id"] = message.pk
+            return result
 
+    # 1. Retrieve context
+    docs = search_documents(
+        company_id,
+        chatbot_id,
+        retrieval_query,
+        top_k,
+        query_embedding=query_embedding,
+        embedding_timeout=deadline.budget(settings.OPENAI_EMBEDDING_TIMEOUT),
+    )
+    with stage("citations"):
+        resolve_citations(chatbot_id, docs)
+
+    # 2. Build prompt with context + bounded history
+    with stage("prompt_build"):
+        messages = _build_messages(query, docs, summary, history)
+
+    # 3. Ask the LLM
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.2,
-        )
+        with stage("completion"):
+            completion = complete_chat(
+                client,
+                messages,
+                deadline=deadline.budget(settings.OPENAI_COMPLETION_TIMEOUT),
+                hedge=True,
+                temperature=0.2,
+            )
     except RateLimitError as exc:
         raise RuntimeError("OpenAI rate limit exceeded while generating an answer") from exc
-    except (APIConnectionError, APITimeoutError) as exc:
+    except APITimeoutError as exc:
+        raise LLMDeadlineExceeded("OpenAI did not answer within the completion deadline") from exc
+    except APIConnectionError as exc:
         raise RuntimeError("Failed to reach OpenAI while generating an answer") from exc
 
-    answer = response.choices[0].message.content
-    return {"answer": answer, "sources": docs}
+    record_metric("model", completion.model)
+    record_metric("prompt_tokens", completion.prompt_tokens)
+    record_metric("completion_tokens", completion.completion_tokens)
+
+    answer = completion.content
+    result = {"answer": answer, "sources": docs}
+
+    if conversation is not None:
+        with stage("history_update"):
+            message = record_turn(conversation, query, answer)
+        result["message_id"] = message.pk
+
+    return result
@@ -0,0 +1,67 @@
+import logging
+from typing import Callable, Collection, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import models, transaction
+
+from chat.models import Document
+from chat.utils.embeddings import base_source_id
+
+
+logger = logging.getLogger(__name__)
+
+
+def delete_in_batches(model: type[models.Model], pks: List[int], batch_size: Optional[int] = None) -> int:
+    """Delete ``model`` rows by primary key, one transaction per batch."""
+    batch_size = batch_size or settings.SYNC_SWEEP_BATCH_SIZE
+    deleted = 0
+    for start in range(0, len(pks), batch_size):
+        with transaction.atomic():
+            count, _ = model.objects.filter(pk__in=pks[start:start + batch_size]).delete()
+        deleted += count
+    return deleted
+
+
+def sweep_rows(queryset: models.QuerySet, key_field: str, seen_keys: Collection) -> int:
+    """Delete rows of ``queryset`` whose ``key_field`` was not seen in a complete listing.
+
+    Only call this after the upstream listing finished; a partial listing
+    would delete live rows.
+    """
+    seen = set(seen_keys)
+    stale = [
+        pk
+        for pk, key in queryset.values_list('pk', key_field).iterator()
+        if key not in seen
+    ]
+    if not stale:
+        return 0
+    deleted = delete_in_batches(queryset.model, stale)
+    logger.info("Swept %s stale %s rows", len(stale), queryset.model.__name__)
+    return deleted
+
+
+def sweep_documents(
+    chatbot,
+    source: str,
+    live_keys: Iterable[str],
+    key_of: Callable[[str], Optional[str]] = base_source_id,
+) -> int:
+    """Delete ``source`` documents of ``chatbot`` whose source row no longer exists.
+
+    ``key_of`` maps a document ``source_id`` (including ``_part_<n>`` chunks)
+    to the key of the row it was built from; documents it maps to ``None``
+    are kept.
+    """
+    live = set(live_keys)
+    stale = []
+    documents = Document.objects.filter(chatbot=chatbot, source=source).values_list('pk', 'source_id')
+    for pk, source_id in documents.iterator():
+        key = key_of(source_id)
+        if key is not None and key not in live:
+            stale.append(pk)
+    if not stale:
+        return 0
+    deleted = delete_in_batches(Document, stale)
+    logger.info("Swept %s stale %s documents for chatbot %s", deleted, source, chatbot.pk)
+    return deleted
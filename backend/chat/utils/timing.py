@@ -0,0 +1,83 @@
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Iterator, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimings:
+    """Per-request latency breakdown collected while answering a chat or query."""
+
+    def __init__(self, event: str, detailed: bool = False, **fields):
+        self.event = event
+        self.detailed = detailed
+        self.fields = fields
+        self.stages: dict = {}
+        self.metrics: dict = {}
+        self.total_ms: Optional[float] = None
+
+    def add_stage(self, name: str, elapsed_ms: float) -> None:
+        self.stages[name] = round(self.stages.get(name, 0.0) + elapsed_ms, 2)
+
+    def record(self, name: str, value) -> None:
+        self.metrics[name] = value
+
+    def as_dict(self) -> dict:
+        return {
+            "total_ms": self.total_ms,
+            "stages_ms": dict(self.stages),
+            **self.metrics,
+        }
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("chat_request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current_timings.get()
+
+
+@contextmanager
+def collect_timings(event: str, detailed: bool = False, **fields) -> Iterator[RequestTimings]:
+    """Collect stage timings for the enclosed block and log them as one record.
+
+    Nested calls (e.g. ``search_documents`` inside ``generate_answer``) reuse the
+    outer collector so a request produces a single structured log line.
+    """
+    outer = _current_timings.get()
+    if outer is not None:
+        yield outer
+        return
+
+    timings = RequestTimings(event, detailed=detailed, **fields)
+    token = _current_timings.set(timings)
+    start = perf_counter()
+    try:
+        yield timings
+    finally:
+        timings.total_ms = round((perf_counter() - start) * 1000, 2)
+        _current_timings.reset(token)
+        record = {"event": event, **fields, **timings.as_dict()}
+        logger.info("%s timings %s", event, json.dumps(record, default=str, sort_keys=True), extra={"timings": record})
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as ``name`` on the active collector, if any."""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add_stage(name, (perf_counter() - start) * 1000)
+
+
+def record_metric(name: str, value) -> None:
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.record(name, value)
@@ -0,0 +1,39 @@
+import logging
+from typing import List, Optional, Sequence, TypeVar
+
+from django.conf import settings
+from django.db import models, transaction
+
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=models.Model)
+
+
+def bulk_upsert(
+    model: type[ModelT],
+    objs: Sequence[ModelT],
+    unique_fields: List[str],
+    update_fields: List[str],
+    batch_size: Optional[int] = None,
+) -> List[ModelT]:
+    """Insert or update ``objs`` on their natural key in batched transactions.
+
+    Each batch is a single ``INSERT ... ON CONFLICT DO UPDATE`` committed on
+    its own, so a large sync neither issues per-row queries nor holds one
+    huge transaction open. Primary keys are populated on the returned objects
+    (PostgreSQL and SQLite 3.35+ return them from the upsert), so callers can
+    link child rows and ingest documents without re-reading.
+    """
+    batch_size = batch_size or settings.SYNC_UPSERT_BATCH_SIZE
+    saved: List[ModelT] = []
+    for start in range(0, len(objs), batch_size):
+        batch = list(objs[start:start + batch_size])
+        with transaction.atomic():
+            saved.extend(model.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=update_fields,
+            ))
+    return saved
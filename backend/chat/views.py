@@ -1,7 +1,7 @@
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, permissions, status
 from rest_framework.authentication import SessionAuthentication
-from .models import Company, ChatBotInstance, JiraSync, ConfluenceSync, ChatFeedback, Credential, GitCredential, GitRepoSync, GitRepoFile, SyncJob, SyncStatusMixin
+from .models import Company, ChatBotInstance, JiraSync, ConfluenceSync, ChatFeedback, Credential, GitCredential, GitRepoSync, GitRepoFile, SyncJob, SyncStatusMixin, Conversation, ConversationMessage
 from .serializers import CompanySerializer, ChatBotInstanceSerializer, JiraSyncSerializer, ConfluenceSyncSerializer, ChatFeedbackSerializer, UserSerializer, CredentialSerializer, GitCredentialSerializer, GitCredentialSummarySerializer, GitRepoSyncSerializer, GitRepoFileSerializer
 from django.contrib.auth import get_user_model
 import logging
@@ -10,8 +10,11 @@ from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied, ValidationError, NotFound
 from rest_framework.decorators import action, api_view
 from rest_framework.views import APIView
+from chat.utils.citations import resolve_citations
 from chat.utils.embeddings import search_documents
+from chat.utils.llm import LLMDeadlineExceeded
 from chat.utils.rag import generate_answer
+from chat.utils.timing import collect_timings
 from django.contrib.auth import authenticate, login, logout
 from django.conf import settings
 from django.utils.decorators import method_decorator
@@ -34,7 +37,7 @@ def _build_sync_status_response(sync):
             job_status = job_obj.status
             job_message = job_obj.status_message
 
-    return {
+    response = {
         'job_id': job_id,
         'status': sync.sync_status,
         'message': sync.sync_status_message,
@@ -42,11 +45,29 @@ def _build_sync_status_response(sync):
         'job_status': job_status,
         'job_message': job_message,
     }
+    if hasattr(sync, 'rate_limit_remaining'):
+        response['rate_limit'] = {
+            'remaining': sync.rate_limit_remaining,
+            'reset_at': sync.rate_limit_reset_at,
+        }
+    return response
 
 
 User = get_user_model()
 
 
+def _is_truthy(value):
+    if isinstance(value, str):
+        return value.strip().lower() in {'1', 'true', 'yes', 'on'}
+    return bool(value)
+
+
+def _discard_new_conversation(conversation, created):
+    """Delete a conversation started by a request whose answer failed, so it is not left empty."""
+    if created:
+        conversation.delete()
+
+
 class IsAdminOrReadOnly(permissions.BasePermission):
     """Allow non-admin users to perform read-only requests."""
 
@@ -380,7 +401,30 @@ class ChatFeedbackViewSet(viewsets.ModelViewSet):
         chatBot = chatBot or self._get_chatbot_from_request()
         if chatBot.company != self.request.user.company:
             raise PermissionDenied("You cannot create feedback for a chatbot outside your company")
-        serializer.save(chatBot=chatBot)
+
+        message = serializer.validated_data.get('message')
+        if message is None:
+            missing = [field for field in ('question', 'answer') if not serializer.validated_data.get(field)]
+            if missing:
+                raise ValidationError({field: ['This field is required.'] for field in missing})
+            serializer.save(chatBot=chatBot, user=self.request.user)
+            return
+
+        # Rate the answer as the server recorded it, never text sent by the client.
+        conversation = message.conversation
+        if (
+            message.role != ConversationMessage.Role.ASSISTANT
+            or conversation.chatBot_id != chatBot.pk
+            or conversation.user_id != self.request.user.pk
+        ):
+            raise ValidationError({'message': ['Not an answer from one of your conversations with this chatbot.']})
+        question = (
+            conversation.messages.filter(role=ConversationMessage.Role.USER, id__lt=message.pk)
+            .order_by('-id')
+            .values_list('content', flat=True)
+            .first()
+        )
+        serializer.save(chatBot=chatBot, user=self.request.user, question=question or '', answer=message.content)
 
 class GitCredentialViewSet(viewsets.ModelViewSet):
     serializer_class = GitCredentialSerializer
@@ -461,17 +505,31 @@ def query_documents(request, chatbot_id):
     Example POST:
     {
         "query": "How do I deploy the app with Docker?",
-        "top_k": 5
+        "top_k": 5,
+        "debug": false
     }
+
+    With ``debug`` the response becomes ``{"results": [...], "debug": {...}}``
+    including the per-stage latency breakdown.
     """
     query = request.data.get("query")
     company_id = request.user.company_id
     top_k = int(request.data.get("top_k", 5))
+    debug = _is_truthy(request.data.get("debug"))
     if not query:
         return Response({"error": "Missing 'query' in request body"}, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        results = search_documents(company_id, chatbot_id, query, top_k)
+        with collect_timings(
+            "search_documents",
+            detailed=debug,
+            company_id=company_id,
+            chatbot_id=chatbot_id,
+        ) as timings:
+            results = search_documents(company_id, chatbot_id, query, top_k)
+            resolve_citations(chatbot_id, results)
+        if debug:
+            return Response({"results": results, "debug": timings.as_dict()})
         return Response(results)
     except Exception as e:
         logger.error(f"Error querying documents: {e}")
@@ -484,17 +542,56 @@ def chat_with_bot(request, chatbot_id):
 
     Example POST:
     {
-        "query": "How do I deploy the app with Docker?"
+        "query": "How do I deploy the app with Docker?",
+        "conversation_id": 12,
+        "debug": false
     }
+
+    ``conversation_id`` is optional; when omitted a new conversation is started
+    and its id is returned so follow-up questions can reference it. The
+    returned ``message_id`` identifies the answer to rate via ``/api/feedbacks/``.
     """
     query = request.data.get("query")
     company_id = request.user.company_id
+    debug = _is_truthy(request.data.get("debug"))
     if not query:
         return Response({"error": "Missing 'query' in request body"}, status=status.HTTP_400_BAD_REQUEST)
-    
+
+    chatbot = get_object_or_404(ChatBotInstance, pk=chatbot_id, company_id=company_id)
+    conversation_id = request.data.get("conversation_id")
+    if conversation_id:
+        try:
+            conversation_id = int(conversation_id)
+        except (TypeError, ValueError):
+            return Response({"error": "'conversation_id' must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        conversation = get_object_or_404(
+            Conversation,
+            pk=conversation_id,
+            chatBot=chatbot,
+            user=request.user,
+        )
+        created = False
+    else:
+        conversation = Conversation.objects.create(chatBot=chatbot, user=request.user)
+        created = True
+
     try:
-        response = generate_answer(company_id, chatbot_id, query, top_k=5)
+        response = generate_answer(
+            company_id,
+            chatbot_id,
+            query,
+            top_k=5,
+            conversation=conversation,
+            debug=debug,
+            use_faq=True,
+        )
+        response["conversation_id"] = conversation.id
         return Response(response)
+    except LLMDeadlineExceeded as e:
+        logger.warning(f"Timed out generating answer: {e}")
+        _discard_new_conversation(conversation, created)
+        return Response({"error": "Timed out generating answer"}, status=status.HTTP_504_GATEWAY_TIMEOUT)
     except Exception as e:
         logger.error(f"Error generating answer: {e}")
-        return Response({"error": "Failed to generate answer"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        _discard_new_conversation(conversation, created)
+        return Response({"error": "Failed to generate answer"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
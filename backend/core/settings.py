@@ -24,9 +24,92 @@ fernet = Fernet(ENCRYPTION_KEY.encode() if isinstance(ENCRYPTION_KEY, str) else
 
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='test-openai-key')
 
+# OpenAI request budgets (seconds), each including the client's retries. A chat
+# request as a whole is bounded by OPENAI_REQUEST_DEADLINE, which must stay
+# comfortably below the gunicorn worker timeout (60s) so slow requests fail
+# cleanly; each stage gets the smaller of its own budget and the time left.
+OPENAI_BASE_URL = config('OPENAI_BASE_URL', default=None)
+OPENAI_MAX_RETRIES = config('OPENAI_MAX_RETRIES', default=1, cast=int)
+OPENAI_REQUEST_DEADLINE = config('OPENAI_REQUEST_DEADLINE', default=50.0, cast=float)
+OPENAI_EMBEDDING_TIMEOUT = config('OPENAI_EMBEDDING_TIMEOUT', default=10.0, cast=float)
+OPENAI_COMPLETION_TIMEOUT = config('OPENAI_COMPLETION_TIMEOUT', default=40.0, cast=float)
+OPENAI_HISTORY_TIMEOUT = config('OPENAI_HISTORY_TIMEOUT', default=8.0, cast=float)
+OPENAI_CHAT_MODEL = config('OPENAI_CHAT_MODEL', default='gpt-4o-mini')
+# Faster model used when the primary model fails or stalls; empty disables it.
+# The last OPENAI_FALLBACK_RESERVE seconds of the completion deadline are kept for it.
+OPENAI_FALLBACK_MODEL = config('OPENAI_FALLBACK_MODEL', default='')
+OPENAI_FALLBACK_RESERVE = config('OPENAI_FALLBACK_RESERVE', default=10.0, cast=float)
+# Send a duplicate completion when no token has arrived after this many
+# seconds (set to the observed p95 time to first token); 0 disables hedging.
+# Streams run on a per-process pool of OPENAI_HEDGE_WORKERS threads; the
+# losing stream is closed as soon as the other produces a token.
+OPENAI_HEDGE_AFTER = config('OPENAI_HEDGE_AFTER', default=0.0, cast=float)
+OPENAI_HEDGE_WORKERS = config('OPENAI_HEDGE_WORKERS', default=8, cast=int)
+
+# Conversation memory: recent turns are kept verbatim up to this many tokens,
+# older turns are folded into a running summary capped at the summary budget.
+CHAT_HISTORY_TOKEN_BUDGET = config('CHAT_HISTORY_TOKEN_BUDGET', default=1500, cast=int)
+CHAT_SUMMARY_TOKEN_BUDGET = config('CHAT_SUMMARY_TOKEN_BUDGET', default=400, cast=int)
+
+# Vetted answers promoted from helpful feedback are served without retrieval
+# or an LLM call when a new question embeds at least this close to them.
+FAQ_MATCH_THRESHOLD = config('FAQ_MATCH_THRESHOLD', default=0.92, cast=float)
+FAQ_CACHE_TTL = config('FAQ_CACHE_TTL', default=300, cast=int)
+FAQ_PREWARM_TOP_N = config('FAQ_PREWARM_TOP_N', default=50, cast=int)
+# Distinct users who must rate an answer helpful before it is served verbatim.
+FAQ_MIN_RATERS = config('FAQ_MIN_RATERS', default=3, cast=int)
+
+# Source rows (issues, comments, pages, files) are upserted in batches of this size.
+SYNC_UPSERT_BATCH_SIZE = config('SYNC_UPSERT_BATCH_SIZE', default=500, cast=int)
+# Rows and documents removed upstream are deleted in batches of this size.
+SYNC_SWEEP_BATCH_SIZE = config('SYNC_SWEEP_BATCH_SIZE', default=1000, cast=int)
+
+# Jira syncs only fetch issues updated since the last high-water mark (minus
+# a skew allowance for clock drift and indexing lag), with a full reconcile
+# every JIRA_FULL_SYNC_DAYS days.
+JIRA_SYNC_SKEW_MINUTES = config('JIRA_SYNC_SKEW_MINUTES', default=10, cast=int)
+JIRA_FULL_SYNC_DAYS = config('JIRA_FULL_SYNC_DAYS', default=7, cast=int)
+# Issue comments are fetched through this many concurrent connections.
+JIRA_COMMENT_WORKERS = config('JIRA_COMMENT_WORKERS', default=8, cast=int)
+# Confluence syncs follow the same incremental scheme, keyed on page lastmodified.
+CONFLUENCE_SYNC_SKEW_MINUTES = config('CONFLUENCE_SYNC_SKEW_MINUTES', default=10, cast=int)
+CONFLUENCE_FULL_SYNC_DAYS = config('CONFLUENCE_FULL_SYNC_DAYS', default=7, cast=int)
+# Bodies of new or changed pages are downloaded through this many concurrent connections.
+CONFLUENCE_FETCH_WORKERS = config('CONFLUENCE_FETCH_WORKERS', default=8, cast=int)
+# Token budget of each issue+comments window in 'thread' ingest mode.
+JIRA_THREAD_WINDOW_TOKENS = config('JIRA_THREAD_WINDOW_TOKENS', default=800, cast=int)
+# Last-commit dates of synced GitHub files are looked up this many paths per GraphQL query.
+GITHUB_COMMIT_DATE_BATCH_SIZE = config('GITHUB_COMMIT_DATE_BATCH_SIZE', default=50, cast=int)
+# GitHub blobs are downloaded through this many concurrent connections; once
+# fewer than GITHUB_RATE_LIMIT_RESERVE requests remain in the rate-limit
+# window, requests are spread over the rest of the window.
+GITHUB_BLOB_WORKERS = config('GITHUB_BLOB_WORKERS', default=8, cast=int)
+GITHUB_RATE_LIMIT_RESERVE = config('GITHUB_RATE_LIMIT_RESERVE', default=100, cast=int)
+# GitHub branch refs are revalidated with ETag/Last-Modified, since GitHub
+# does not charge 304s against the rate limit; bodies larger than this are not
+# cached. process_sync_jobs runs prune_http_cache after every sync job, deleting
+# entries unused for HTTP_CACHE_TTL_DAYS and the least recently used beyond
+# HTTP_CACHE_MAX_ENTRIES; the prune_http_cache command does the same by hand.
+HTTP_CACHE_MAX_BODY_BYTES = config('HTTP_CACHE_MAX_BODY_BYTES', default=1_000_000, cast=int)
+HTTP_CACHE_TTL_DAYS = config('HTTP_CACHE_TTL_DAYS', default=14, cast=int)
+HTTP_CACHE_MAX_ENTRIES = config('HTTP_CACHE_MAX_ENTRIES', default=5000, cast=int)
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Repositories synced in 'mirror' fetch mode are kept as bare clones under
+# GIT_MIRROR_ROOT and fetched from GIT_MIRROR_REMOTE_TEMPLATE. In production it
+# must be a persistent volume, or every deploy re-clones every repository; a
+# clone is deleted with its GitRepoSync or when it leaves 'mirror' fetch mode.
+GIT_MIRROR_ROOT = config('GIT_MIRROR_ROOT', default=str(BASE_DIR / 'git-mirrors'))
+GIT_MIRROR_REMOTE_TEMPLATE = config('GIT_MIRROR_REMOTE_TEMPLATE', default='https://github.com/{full_name}.git')
+# Seconds a single git command (the initial clone included) may run before the
+# sync fails, so a stalled remote cannot hang the worker.
+GIT_MIRROR_TIMEOUT = config('GIT_MIRROR_TIMEOUT', default=900, cast=int)
+# Commits walked to find each changed file's last commit date; files not seen
+# within them fall back to the head commit date.
+GIT_MIRROR_LOG_MAX_COMMITS = config('GIT_MIRROR_LOG_MAX_COMMITS', default=10000, cast=int)
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/